@@ -0,0 +1,387 @@
+import re
+import json
+import time
+import random
+import zlib
+import argparse
+import threading
+import logging
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from email import policy
+from email.parser import BytesParser
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 실제 KRW 마켓 일부 (그 이후는 KRW-SYN0001 형식의 가상 마켓)
+KNOWN_MARKETS = [
+    'KRW-BTC', 'KRW-ETH', 'KRW-XRP', 'KRW-ADA', 'KRW-DOT', 'KRW-LINK', 'KRW-BCH',
+    'KRW-SOL', 'KRW-AVAX', 'KRW-ATOM', 'KRW-DOGE', 'KRW-TRX', 'KRW-ETC', 'KRW-NEAR',
+]
+
+
+def make_markets(count):
+    """
+    count 개의 KRW 마켓 코드를 만듭니다.
+    """
+    markets = KNOWN_MARKETS[:count]
+    markets += [f"KRW-SYN{i:04d}" for i in range(1, count - len(markets) + 1)]
+    return markets
+
+
+class FakeUpbitExchange:
+    def __init__(self, markets, seed=0, latency=0.0, jitter=0.0, rate_limit_ratio=0.0,
+                 error_ratio=0.0, recorded=None, now=None, ticker_unit_seconds=3600):
+        """
+        결정적인 가상 시세를 제공하는 업비트/텔레그램 대역
+
+        같은 (seed, 마켓, 캔들 시각)은 항상 같은 가격을 돌려줍니다.
+
+        Args:
+            markets (list): 제공할 마켓 코드
+            seed (int): 가상 시세 시드
+            latency (float): 모든 응답에 더할 지연(초)
+            jitter (float): 0~jitter 초의 무작위 추가 지연
+            rate_limit_ratio (float): 429 를 돌려줄 요청 비율
+            error_ratio (float): 500 을 돌려줄 요청 비율
+            recorded (dict): 녹화된 응답 {마켓: [캔들, ...]} (있으면 가상 시세 대신 사용)
+            now (float): 고정할 현재 시각(epoch 초). 없으면 실제 시각
+            ticker_unit_seconds (int): 현재가가 따라갈 캔들 길이(초). 현재가는 이 단위의 진행 중 캔들 종가
+        """
+        self.markets = list(markets)
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.error_ratio = error_ratio
+        self.recorded = recorded or {}
+        self.now = now
+        self.ticker_unit_seconds = ticker_unit_seconds
+        self.random = random.Random(seed)
+        self.messages = []
+        self.updates = []
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def current_time(self):
+        return self.now if self.now is not None else time.time()
+
+    def _market_seed(self, market):
+        return (zlib.crc32(market.encode()) ^ self.seed) & 0xffffffff
+
+    def prices(self, market, steps):
+        """
+        마켓의 캔들 인덱스 배열에 대한 결정적인 가격을 계산합니다.
+        """
+        market_seed = self._market_seed(market)
+        base = 10 ** (1 + market_seed % 7)
+        phase = (market_seed % 1000) / 1000 * 2 * np.pi
+        steps = np.asarray(steps, dtype=np.float64)
+        noise = np.modf(np.abs(np.sin(steps * 12.9898 + market_seed) * 43758.5453))[0] - 0.5
+        wave = 0.03 * np.sin(steps / 37 + phase) + 0.01 * np.sin(steps / 5.3 + 2 * phase)
+        return base * (1 + wave + 0.004 * noise)
+
+    def candles(self, market, unit_seconds, count, to=None):
+        """
+        to 시각(미포함) 이전의 캔들을 최신순으로 count 개 만듭니다.
+        """
+        if market in self.recorded:
+            records = self.recorded[market]
+            if to is not None:
+                to_text = datetime.fromtimestamp(to, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+                records = [record for record in records if record['candle_date_time_utc'] < to_text]
+            return records[:count]
+
+        end = self.current_time() if to is None else to - 1
+        last = int(end // unit_seconds)
+        steps = np.arange(last, last - count, -1)
+        close = self.prices(market, steps)
+        open_ = self.prices(market, steps - 1)
+        spread = np.abs(close - open_) + close * 0.001
+        volume = 100 + 50 * (np.modf(np.abs(np.sin(steps * 78.233)) * 1e4)[0])
+
+        records = []
+        for i, step in enumerate(steps):
+            start = int(step) * unit_seconds
+            records.append({
+                'market': market,
+                'candle_date_time_utc': datetime.fromtimestamp(start, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S'),
+                'candle_date_time_kst': datetime.fromtimestamp(start + 9 * 3600, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S'),
+                'opening_price': float(open_[i]),
+                'high_price': float(max(open_[i], close[i]) + spread[i] / 2),
+                'low_price': float(min(open_[i], close[i]) - spread[i] / 2),
+                'trade_price': float(close[i]),
+                'timestamp': (start + unit_seconds - 1) * 1000,
+                'candle_acc_trade_price': float(volume[i] * close[i]),
+                'candle_acc_trade_volume': float(volume[i]),
+                'unit': unit_seconds // 60,
+            })
+        return records
+
+    def tickers(self, markets):
+        now = self.current_time()
+        result = []
+        for market in markets:
+            if market in self.recorded and self.recorded[market]:
+                price = self.recorded[market][0]['trade_price']
+            else:
+                price = float(self.prices(market, [now // self.ticker_unit_seconds])[0])
+            result.append({'market': market, 'trade_price': price, 'timestamp': int(now * 1000)})
+        return result
+
+    def orderbooks(self, markets, depth=15):
+        """
+        현재가 주변의 결정적인 호가를 만듭니다. (마켓마다 매수/매도 잔량 비율이 다름)
+        """
+        now = self.current_time()
+        result = []
+        for ticker in self.tickers(markets):
+            price = ticker['trade_price']
+            market_seed = self._market_seed(ticker['market'])
+            tick = price * 0.0005
+            bid_weight = 0.5 + (market_seed % 100) / 100
+            units = []
+            for level in range(depth):
+                size = 1000 / price * (1 + level * 0.2)
+                units.append({
+                    'ask_price': price + tick * (level + 1),
+                    'bid_price': price - tick * level,
+                    'ask_size': size,
+                    'bid_size': size * bid_weight,
+                })
+            result.append({
+                'market': ticker['market'],
+                'timestamp': int(now * 1000),
+                'total_ask_size': sum(unit['ask_size'] for unit in units),
+                'total_bid_size': sum(unit['bid_size'] for unit in units),
+                'orderbook_units': units,
+            })
+        return result
+
+    def trades(self, market, count, trade_seconds=0.2):
+        """
+        trade_seconds 마다 한 건씩 체결되는 결정적인 체결 내역을 최신순으로 count 개 만듭니다.
+        """
+        last = int(self.current_time() // trade_seconds)
+        steps = np.arange(last, last - count, -1)
+        price = self.prices(market, steps * trade_seconds / 60)
+        volume = 0.01 + np.modf(np.abs(np.sin(steps * 78.233)) * 1e4)[0]
+        return [{
+            'market': market,
+            'trade_date_utc': datetime.fromtimestamp(step * trade_seconds, tz=timezone.utc).strftime('%Y-%m-%d'),
+            'trade_time_utc': datetime.fromtimestamp(step * trade_seconds, tz=timezone.utc).strftime('%H:%M:%S'),
+            'timestamp': int(round(step * trade_seconds * 1000)),
+            'trade_price': float(price[i]),
+            'trade_volume': float(volume[i]),
+            'ask_bid': 'BID' if step % 2 else 'ASK',
+            'sequential_id': int(step),
+        } for i, step in enumerate(steps)]
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def inject_fault(self):
+        """
+        지연을 적용하고, 주입할 오류 상태 코드를 반환합니다. (없으면 None)
+        """
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        roll = self.random.random()
+        if roll < self.rate_limit_ratio:
+            return 429
+        if roll < self.rate_limit_ratio + self.error_ratio:
+            return 500
+        return None
+
+
+def parse_to(value):
+    """
+    업비트 to 파라미터를 epoch 초로 변환합니다.
+    """
+    value = value.replace('T', ' ').rstrip('Z')
+    return int(datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp())
+
+
+def parse_multipart(body, content_type):
+    """
+    multipart/form-data 본문의 필드를 읽습니다. (파일 필드는 bytes 그대로)
+    """
+    message = BytesParser(policy=policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        payload = part.get_payload(decode=True)
+        name = part.get_param('name', header='content-disposition')
+        fields[name] = payload if part.get_filename() else payload.decode()
+    return fields
+
+
+def make_handler(exchange):
+    """
+    FakeUpbitExchange 를 제공하는 요청 핸들러 클래스를 만듭니다.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _params(self):
+            parsed = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            if self.command == 'POST':
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                content_type = self.headers.get('Content-Type', '')
+                if content_type.startswith('application/json'):
+                    params.update(json.loads(body.decode() or '{}'))
+                elif content_type.startswith('multipart/form-data'):
+                    params.update(parse_multipart(body, content_type))
+                else:
+                    params.update({key: values[-1] for key, values in parse_qs(body.decode()).items()})
+            return parsed.path, params
+
+        def do_GET(self):
+            self._dispatch()
+
+        def do_POST(self):
+            self._dispatch()
+
+        def _dispatch(self):
+            path, params = self._params()
+
+            # 대역 상태 조회용 (오류 주입 대상 아님)
+            if path == '/_fake/stats':
+                return self._send(200, {'requests': exchange.requests, 'messages': len(exchange.messages)})
+            if path == '/_fake/messages':
+                return self._send(200, exchange.messages)
+
+            exchange.count(re.sub(r'/bot[^/]+/', '/bot<token>/', path))
+            fault = exchange.inject_fault()
+            if fault == 429:
+                return self._send(429, {'error': {'name': 'too_many_requests', 'message': 'Too many requests'}})
+            if fault == 500:
+                return self._send(500, {'error': {'name': 'server_error', 'message': 'Injected error'}})
+
+            telegram = re.match(r'^/bot[^/]+/(\w+)$', path)
+            if telegram:
+                return self._telegram(telegram.group(1), params)
+
+            if path == '/v1/market/all':
+                return self._send(200, [{'market': market, 'korean_name': market, 'english_name': market}
+                                        for market in exchange.markets])
+
+            candle = re.match(r'^/v1/candles/(minutes/(\d+)|days)$', path)
+            if candle:
+                market = params.get('market')
+                if market not in exchange.markets:
+                    return self._send(404, {'error': {'name': 'market_not_found', 'message': market}})
+                unit_seconds = int(candle.group(2)) * 60 if candle.group(2) else 86400
+                count = min(int(params.get('count', 1)), 200)
+                to = parse_to(params['to']) if params.get('to') else None
+                return self._send(200, exchange.candles(market, unit_seconds, count, to))
+
+            if path == '/v1/ticker':
+                markets = [m for m in params.get('markets', '').split(',') if m in exchange.markets]
+                return self._send(200, exchange.tickers(markets))
+
+            if path == '/v1/orderbook':
+                markets = [m for m in params.get('markets', '').split(',') if m in exchange.markets]
+                return self._send(200, exchange.orderbooks(markets))
+
+            if path == '/v1/trades/ticks':
+                market = params.get('market')
+                if market not in exchange.markets:
+                    return self._send(404, {'error': {'name': 'market_not_found', 'message': market}})
+                return self._send(200, exchange.trades(market, min(int(params.get('count', 1)), 500)))
+
+            return self._send(404, {'error': {'name': 'not_found', 'message': path}})
+
+        def _telegram(self, method, params):
+            if method in ('sendMessage', 'sendPhoto'):
+                message = {'message_id': len(exchange.messages) + 1, 'chat': {'id': params.get('chat_id')},
+                           'text': params.get('text', params.get('caption', '')), 'date': int(time.time())}
+                if isinstance(params.get('photo'), bytes):
+                    message['photo'] = [{'file_size': len(params['photo'])}]
+                with exchange._lock:
+                    exchange.messages.append(message)
+                return self._send(200, {'ok': True, 'result': message})
+            if method == 'getUpdates':
+                offset = int(params.get('offset', 0))
+                with exchange._lock:
+                    updates = [update for update in exchange.updates if update['update_id'] >= offset]
+                return self._send(200, {'ok': True, 'result': updates})
+            return self._send(404, {'ok': False, 'description': f'Unknown method {method}'})
+
+    return Handler
+
+
+def start_server(exchange, host='127.0.0.1', port=0):
+    """
+    대역 서버를 백그라운드 스레드에서 시작합니다.
+
+    Returns:
+        tuple: (서버, 업비트 API 주소, 텔레그램 API 주소)
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(exchange))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='fake-upbit', daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1", f"http://{host}:{port}"
+
+
+def main():
+    """
+    메인 함수 - 대역 서버 실행
+    """
+    parser = argparse.ArgumentParser(description="업비트/텔레그램 로컬 대역 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--markets', type=int, default=len(KNOWN_MARKETS), help="제공할 마켓 수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="무작위 추가 지연 최대값(초)")
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help="429 응답 비율")
+    parser.add_argument('--error-ratio', type=float, default=0.0, help="500 응답 비율")
+    parser.add_argument('--ticker-unit', type=int, default=60, help="현재가가 따라갈 캔들 단위(분)")
+    parser.add_argument('--recorded', help="녹화된 캔들 JSON 파일 ({마켓: [캔들, ...]})")
+    args = parser.parse_args()
+
+    # 로깅 설정
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    recorded = None
+    if args.recorded:
+        with open(args.recorded) as f:
+            recorded = json.load(f)
+    markets = sorted(recorded) if recorded else make_markets(args.markets)
+
+    exchange = FakeUpbitExchange(markets, seed=args.seed, latency=args.latency, jitter=args.jitter,
+                                 rate_limit_ratio=args.rate_limit_ratio, error_ratio=args.error_ratio,
+                                 recorded=recorded, ticker_unit_seconds=args.ticker_unit * 60)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(exchange))
+    logger.info(f"대역 서버 시작: http://{args.host}:{args.port} (마켓 {len(markets)}개)")
+    logger.info(f"UPBIT_API_URL=http://{args.host}:{args.port}/v1 TELEGRAM_API_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("대역 서버 종료")
+
+
+if __name__ == "__main__":
+    main()
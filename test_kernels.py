@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from upbit_kernels import wilder_rsi, ema, macd, RsiStream, MacdStream
+
+# 커널은 순차 계산과 1e-9 이내로 같아야 함
+TOLERANCE = 1e-9
+
+
+def random_closes(symbols=3, length=400, seed=7):
+    """
+    (종목, 시간) 가상 종가. 두 번째 종목은 중간에 상장한 것처럼 앞쪽이 NaN
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, length)), axis=1))
+    close[1, :57] = np.nan
+    return close
+
+
+def sequential_smooth(x, period, alpha, seed='sma'):
+    """
+    한 종목의 지수 평활을 원소마다 계산하는 기준 구현
+    """
+    y = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if not len(valid):
+        return y
+    start = valid[0]
+    seed_index = start + (period - 1 if seed == 'sma' else 0)
+    if seed_index >= len(x):
+        return y
+    y[seed_index] = np.mean(x[start:seed_index + 1]) if seed == 'sma' else x[seed_index]
+    for t in range(seed_index + 1, len(x)):
+        y[t] = (1 - alpha) * y[t - 1] + alpha * x[t]
+    return y
+
+
+def sequential_rsi(close, period=14):
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0))
+    loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0))
+    avg_gain = sequential_smooth(gain, period, 1 / period)
+    avg_loss = sequential_smooth(loss, period, 1 / period)
+    return 100 * avg_gain / (avg_gain + avg_loss)
+
+
+def sequential_macd(close, fast=12, slow=26, signal=9):
+    line = (sequential_smooth(close, fast, 2 / (fast + 1))
+            - sequential_smooth(close, slow, 2 / (slow + 1)))
+    signal_line = sequential_smooth(line, signal, 2 / (signal + 1))
+    return line, signal_line, line - signal_line
+
+
+def assert_close(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True)
+
+
+def test_wilder_rsi_matches_sequential():
+    close = random_closes()
+    rsi = wilder_rsi(close)
+    for i in range(len(close)):
+        assert_close(rsi[i], sequential_rsi(close[i]))
+    # 1차원 입력도 같은 결과
+    assert_close(wilder_rsi(close[0]), rsi[0])
+
+
+@pytest.mark.parametrize('period', [5, 12, 26])
+def test_ema_first_seed_matches_pandas(period):
+    close = random_closes()[0]
+    expected = pd.Series(close).ewm(span=period, adjust=False).mean().to_numpy()
+    assert_close(ema(close, period, seed='first'), expected)
+
+
+def test_ema_sma_seed_matches_sequential():
+    close = random_closes()
+    result = ema(close, 20)
+    for i in range(len(close)):
+        assert_close(result[i], sequential_smooth(close[i], 20, 2 / 21))
+
+
+def test_macd_matches_sequential():
+    close = random_closes()
+    line, signal_line, histogram = macd(close)
+    for i in range(len(close)):
+        expected = sequential_macd(close[i])
+        assert_close(line[i], expected[0])
+        assert_close(signal_line[i], expected[1])
+        assert_close(histogram[i], expected[2])
+
+
+def test_rsi_stream_matches_batch():
+    close = random_closes()
+    split = 300
+    stream = RsiStream.from_history(close[:, :split])
+    expected = wilder_rsi(close)
+    for t in range(split, close.shape[1]):
+        # 미리 보기는 상태를 바꾸지 않음
+        preview = stream.update(close[:, t], commit=False)
+        assert_close(stream.update(close[:, t]), preview)
+        assert_close(stream.value, expected[:, t])
+
+
+def test_macd_stream_matches_batch():
+    close = random_closes()
+    split = 300
+    stream = MacdStream.from_history(close[:, :split])
+    expected = macd(close)
+    for t in range(split, close.shape[1]):
+        result = stream.update(close[:, t])
+        for actual, batch in zip(result, expected):
+            assert_close(actual, batch[:, t])
@@ -0,0 +1,128 @@
+import heapq
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePollScheduler:
+    def __init__(self, symbols, min_interval=60, max_interval=3600, retry_interval=300,
+                 rsi_threshold=50, band_width_threshold=0.3, far_distance=3.0):
+        """
+        종목별 조회 주기를 알림 조건과의 거리에 따라 조절하는 스케줄러
+
+        조건과의 거리(distance)는 다음 세 값 중 가장 큰 값입니다.
+        - 밴드폭 초과율: max(밴드폭 / 기준 밴드폭 - 1, 0)
+        - RSI 초과율: max(RSI - 기준 RSI, 0) / 기준 RSI
+        - 밴드 이격률: 가까운 밴드까지 거리 / 밴드 절반 폭 (밴드 밖이면 0)
+
+        거리가 0 이면 min_interval, far_distance 이상이면 max_interval 이며,
+        그 사이는 로그 스케일로 보간합니다.
+
+        Args:
+            symbols (list): 감시 종목 목록
+            min_interval (float): 조건에 가장 가까운 종목의 조회 주기(초)
+            max_interval (float): 조건에서 먼 종목의 조회 주기(초)
+            retry_interval (float): 분석에 실패한 종목의 재시도 주기(초)
+            rsi_threshold (float): 알림 조건의 RSI 기준
+            band_width_threshold (float): 알림 조건의 밴드폭 기준(%)
+            far_distance (float): max_interval 을 적용할 거리
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_interval = retry_interval
+        self.rsi_threshold = rsi_threshold
+        self.band_width_threshold = band_width_threshold
+        self.far_distance = far_distance
+        self.intervals = {}
+        self.polls = 0
+        self.started_at = time.time()
+        self._queue = []
+
+        now = time.time()
+        for symbol in symbols:
+            self.intervals[symbol] = min_interval
+            heapq.heappush(self._queue, (now, symbol))
+
+    def distance(self, analysis):
+        """
+        분석 결과가 알림 조건에서 얼마나 떨어져 있는지 계산합니다.
+
+        Args:
+            analysis (dict): analyze_symbol 결과
+
+        Returns:
+            float: 0 이상의 거리 (0 이면 모든 조건 만족)
+        """
+        band_excess = max(analysis['band_width'] / self.band_width_threshold - 1, 0)
+        rsi_excess = max(analysis['rsi'] - self.rsi_threshold, 0) / self.rsi_threshold
+
+        half_width = (analysis['upper_band'] - analysis['lower_band']) / 2
+        gap = min(analysis['upper_band'] - analysis['current_price'],
+                  analysis['current_price'] - analysis['lower_band'])
+        gap_ratio = max(gap, 0) / half_width if half_width > 0 else 0
+
+        return max(band_excess, rsi_excess, gap_ratio)
+
+    def interval_for(self, analysis):
+        """
+        분석 결과로부터 다음 조회까지의 주기(초)를 계산합니다.
+        """
+        if analysis is None:
+            return self.retry_interval
+        distance = self.distance(analysis)
+        if math.isnan(distance):
+            return self.retry_interval
+        ratio = min(distance / self.far_distance, 1.0)
+        return self.min_interval * (self.max_interval / self.min_interval) ** ratio
+
+    def pop_due(self, now=None):
+        """
+        조회 시점이 된 종목들을 꺼내 반환합니다.
+        """
+        now = time.time() if now is None else now
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, symbol = heapq.heappop(self._queue)
+            due.append(symbol)
+        self.polls += len(due)
+        return due
+
+    def update(self, symbol, analysis, now=None):
+        """
+        분석 결과를 반영해 종목의 다음 조회 시점을 예약합니다.
+        """
+        now = time.time() if now is None else now
+        interval = self.interval_for(analysis)
+        self.intervals[symbol] = interval
+        heapq.heappush(self._queue, (now + interval, symbol))
+        return interval
+
+    def sync(self, symbols, now=None):
+        """
+        감시 종목 변경을 반영합니다. 새 종목은 바로 조회하고, 빠진 종목은 더 이상 조회하지 않습니다.
+        """
+        now = time.time() if now is None else now
+        symbols = set(symbols)
+        for symbol in symbols - set(self.intervals):
+            self.intervals[symbol] = self.min_interval
+            heapq.heappush(self._queue, (now, symbol))
+        removed = set(self.intervals) - symbols
+        if removed:
+            for symbol in removed:
+                del self.intervals[symbol]
+            self._queue = [entry for entry in self._queue if entry[1] not in removed]
+            heapq.heapify(self._queue)
+
+    def seconds_until_next(self, now=None):
+        now = time.time() if now is None else now
+        if not self._queue:
+            return self.max_interval
+        return max(self._queue[0][0] - now, 0)
+
+    def calls_per_hour(self):
+        """
+        현재 주기 설정 기준 시간당 예상 API 호출 수
+        """
+        return sum(3600 / interval for interval in self.intervals.values())
@@ -4,8 +4,10 @@ import numpy as np
 import time
 import schedule
 import json
+import os
 from datetime import datetime
 import logging
+from upbit_leader import leader_from_env
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,6 +39,9 @@ class UpbitTechnicalAnalyzer:
             'KRW-AVAX',  # 아발란체
             'KRW-ATOM',  # 코스모스
         ]
+        
+        # 다른 배포와 중복 스캔 방지 (LEADER_BACKEND 미설정 시 사용 안 함)
+        self.leader = leader_from_env()
     
     def get_candles(self, market, count=200):
         """
@@ -185,15 +190,26 @@ class UpbitTechnicalAnalyzer:
         """
         모든 종목의 조건을 체크하고 조건에 맞는 종목이 있으면 알림을 보냅니다.
         """
+        if self.leader is not None and not self.leader.is_leader():
+            logger.info("대기 인스턴스 - 리더가 스캔하므로 건너뜁니다.")
+            return
+        
         logger.info("기술적 분석 조건 체크 시작")
         
         alerts = []
+        candle_start = int(time.time()) // 3600 * 3600
         
         for symbol in self.symbols:
+            # 다른 인스턴스가 이미 스캔한 (종목, 캔들)은 건너뜀
+            if self.leader is not None and not self.leader.claim(symbol, candle_start):
+                logger.info(f"다른 인스턴스가 이번 캔들을 이미 스캔했습니다 ({symbol})")
+                continue
+            
             try:
                 analysis = self.analyze_symbol(symbol)
                 
                 if analysis is None:
+                    self.unclaim(symbol, candle_start)
                     continue
                 
                 # 조건 체크: RSI <= 50 and 밴드폭 <= 0.2%
@@ -222,6 +238,7 @@ class UpbitTechnicalAnalyzer:
                 
             except Exception as e:
                 logger.error(f"종목 체크 중 오류 ({symbol}): {e}")
+                self.unclaim(symbol, candle_start)
                 continue
         
         # 조건에 맞는 종목이 있으면 텔레그램으로 알림 전송
@@ -231,6 +248,13 @@ class UpbitTechnicalAnalyzer:
         else:
             logger.info("조건을 만족하는 종목이 없습니다.")
     
+    def unclaim(self, symbol, candle_start):
+        """
+        분석에 실패한 종목의 캔들 점유를 풀어 다른 인스턴스가 다시 시도할 수 있게 합니다.
+        """
+        if self.leader is not None:
+            self.leader.unclaim(symbol, candle_start)
+    
     def format_alert_message(self, alerts):
         """
         알림 메시지를 포맷팅합니다.
@@ -283,6 +307,10 @@ class UpbitTechnicalAnalyzer:
         
         logger.info("스케줄러 시작 - 매시간 정시에 기술적 분석을 수행합니다.")
         
+        if self.leader is not None:
+            self.leader.is_leader()
+            self.leader.start_heartbeat()
+        
         # 프로그램 시작 시 한 번 체크
         self.check_conditions()
         
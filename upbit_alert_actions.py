@@ -2,18 +2,16 @@ import requests
 import pandas as pd
 import numpy as np
 import os
+import time
 from datetime import datetime
 import logging
+from upbit_resilience import ResilientFetcher, ScanDeadline, CircuitOpenError, ScanDeadlineExceeded, TokenBucket
+from upbit_leader import leader_from_env
+from upbit_candles import candle_epoch
+from upbit_snapshot import DashboardSnapshot
+from upbit_logging import setup_logging, with_scan_id
+from upbit_kernels import wilder_rsi, RSI_METHODS
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('upbit_alert.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class UpbitTechnicalAnalyzer:
@@ -21,7 +19,8 @@ class UpbitTechnicalAnalyzer:
         """
         업비트 기술적 분석 자동 알림 시스템 (GitHub Actions 버전)
         """
-        self.base_url = "https://api.upbit.com/v1"
+        self.base_url = os.getenv('UPBIT_API_URL', "https://api.upbit.com/v1")
+        self.telegram_api_url = os.getenv('TELEGRAM_API_URL', "https://api.telegram.org")
         
         # 환경변수에서 설정 로드
         self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -45,6 +44,33 @@ class UpbitTechnicalAnalyzer:
             'KRW-ATOM',  # 코스모스
         ]
         
+        # 스캔 마감 시간 / 헤지 요청 / 서킷 브레이커 설정
+        self.scan_deadline_seconds = float(os.getenv('SCAN_DEADLINE_SECONDS', '120')) or None
+        self.request_delay = float(os.getenv('REQUEST_DELAY_SECONDS', '0.1'))
+        # 초당 요청 예산 (0 이면 종목마다 REQUEST_DELAY_SECONDS 만큼 대기)
+        self.rate_budget = float(os.getenv('RATE_BUDGET', '8'))
+        self.request_bucket = TokenBucket(self.rate_budget, capacity=1) if self.rate_budget > 0 else None
+        self.fetcher = ResilientFetcher(
+            timeout=10,
+            hedge_percentile=float(os.getenv('HEDGE_PERCENTILE', '90')),
+            failure_threshold=int(os.getenv('BREAKER_FAILURES', '5')),
+            recovery_timeout=float(os.getenv('BREAKER_COOLDOWN_SECONDS', '60'))
+        )
+        self.scan_deadline = None
+        self.skip_reasons = {}
+        
+        # RSI 평활 방식: sma (단순 이동평균) 또는 wilder (업비트 차트와 같은 Wilder 평활)
+        self.rsi_method = os.getenv('RSI_METHOD', 'sma')
+        if self.rsi_method not in RSI_METHODS:
+            raise ValueError(f"RSI_METHOD 는 {' 또는 '.join(RSI_METHODS)} 이어야 합니다: {self.rsi_method}")
+        
+        # 다른 배포(클라우드 데몬 등)와 중복 스캔 방지 (LEADER_BACKEND 미설정 시 사용 안 함)
+        self.leader = leader_from_env()
+        
+        # 정적 대시보드 스냅샷 (DASHBOARD_DIR 미설정 시 사용 안 함)
+        self.dashboard_dir = os.getenv('DASHBOARD_DIR')
+        self.series = {}
+        
         logger.info("업비트 기술적 분석 시스템 초기화 완료")
         logger.info(f"모니터링 종목: {len(self.symbols)}개")
     
@@ -52,17 +78,15 @@ class UpbitTechnicalAnalyzer:
         """
         업비트에서 캔들 데이터를 가져옵니다.
         """
+        endpoint = 'candles/minutes/60'
         try:
-            url = f"{self.base_url}/candles/minutes/60"
+            url = f"{self.base_url}/{endpoint}"
             params = {
                 'market': market,
                 'count': count
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.fetcher.get_json(endpoint, url, params=params, deadline=self.scan_deadline)
             df = pd.DataFrame(data)
             
             # 시간 순서로 정렬 (오래된 것부터)
@@ -70,8 +94,15 @@ class UpbitTechnicalAnalyzer:
             
             return df
             
+        except CircuitOpenError:
+            self.skip_reasons[market] = "서킷 브레이커 차단"
+            return None
+        except ScanDeadlineExceeded:
+            self.skip_reasons[market] = "스캔 마감 시간 초과"
+            return None
         except Exception as e:
             logger.error(f"캔들 데이터 조회 실패 ({market}): {e}")
+            self.skip_reasons[market] = f"요청 실패: {e}"
             return None
     
     def calculate_rsi(self, prices, period=14):
@@ -79,6 +110,9 @@ class UpbitTechnicalAnalyzer:
         RSI (Relative Strength Index) 계산
         """
         try:
+            if self.rsi_method == 'wilder':
+                return pd.Series(wilder_rsi(prices.to_numpy(dtype=np.float64), period), index=prices.index)
+            
             delta = prices.diff()
             gain = delta.where(delta > 0, 0)
             loss = -delta.where(delta < 0, 0)
@@ -122,6 +156,7 @@ class UpbitTechnicalAnalyzer:
             df = self.get_candles(symbol)
             if df is None or len(df) < 50:
                 logger.warning(f"충분한 데이터가 없습니다 ({symbol}): {len(df) if df is not None else 0}개")
+                self.skip_reasons.setdefault(symbol, f"데이터 부족 ({len(df) if df is not None else 0}개)")
                 return None
             
             # 종가 데이터
@@ -139,8 +174,20 @@ class UpbitTechnicalAnalyzer:
             # NaN 값 체크
             if pd.isna(current_rsi) or pd.isna(current_band_width):
                 logger.warning(f"계산된 지표에 NaN 값이 있습니다 ({symbol})")
+                self.skip_reasons[symbol] = "지표 계산 불가 (NaN)"
                 return None
             
+            # 대시보드 이력은 이미 계산한 지표를 그대로 사용 (추가 요청 없음)
+            if self.dashboard_dir:
+                self.series[symbol] = {
+                    'timestamp': candle_epoch(df['candle_date_time_utc']),
+                    'close': close_prices.values,
+                    'upper': upper_band.values,
+                    'middle': middle_band.values,
+                    'lower': lower_band.values,
+                    'rsi': rsi.values,
+                }
+            
             return {
                 'symbol': symbol,
                 'current_price': current_price,
@@ -153,6 +200,7 @@ class UpbitTechnicalAnalyzer:
             
         except Exception as e:
             logger.error(f"분석 실패 ({symbol}): {e}")
+            self.skip_reasons[symbol] = f"분석 실패: {e}"
             return None
     
     def send_telegram_message(self, message):
@@ -160,7 +208,7 @@ class UpbitTechnicalAnalyzer:
         텔레그램으로 메시지를 전송합니다.
         """
         try:
-            url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
+            url = f"{self.telegram_api_url}/bot{self.telegram_bot_token}/sendMessage"
             data = {
                 'chat_id': self.telegram_chat_id,
                 'text': message,
@@ -174,6 +222,7 @@ class UpbitTechnicalAnalyzer:
         except Exception as e:
             logger.error(f"텔레그램 메시지 전송 실패: {e}")
     
+    @with_scan_id
     def check_conditions(self):
         """
         모든 종목의 조건을 체크하고 조건에 맞는 종목이 있으면 알림을 보냅니다.
@@ -181,12 +230,30 @@ class UpbitTechnicalAnalyzer:
         logger.info("기술적 분석 조건 체크 시작")
         
         alerts = []
+        records = []
+        claimed_elsewhere = []
+        self.skip_reasons = {}
+        self.scan_deadline = ScanDeadline(self.scan_deadline_seconds)
+        candle_start = int(time.time()) // 3600 * 3600
         
-        for symbol in self.symbols:
+        for index, symbol in enumerate(self.symbols):
+            # 마감 시간이 지나면 남은 종목은 건너뛰고 지금까지의 결과로 마무리
+            if self.scan_deadline.expired():
+                for skipped in self.symbols[index:]:
+                    self.skip_reasons[skipped] = "스캔 마감 시간 초과"
+                logger.warning(f"스캔 마감 시간({self.scan_deadline_seconds:.0f}초) 초과 - 남은 {len(self.symbols) - index}개 종목 건너뜀")
+                break
+            
+            # 다른 인스턴스가 이미 스캔한 (종목, 캔들)은 건너뜀
+            if self.leader is not None and not self.leader.claim(symbol, candle_start):
+                claimed_elsewhere.append(symbol)
+                continue
+            
             try:
                 analysis = self.analyze_symbol(symbol)
                 
                 if analysis is None:
+                    self.unclaim(symbol, candle_start)
                     continue
                 
                 # 조건 체크: RSI ≤ 50 + 밴드폭 ≤ 0.3% + 밴드 돌파
@@ -197,7 +264,15 @@ class UpbitTechnicalAnalyzer:
                 band_breakout = upper_breakout or lower_breakout
                 
                 # 모든 조건을 만족해야 알림
-                if rsi_condition and band_width_condition and band_breakout:
+                alert = rsi_condition and band_width_condition and band_breakout
+                records.append((analysis, {
+                    'rsi': rsi_condition,
+                    'band_width': band_width_condition,
+                    'upper_breakout': upper_breakout,
+                    'lower_breakout': lower_breakout,
+                    'alert': alert
+                }))
+                if alert:
                     alerts.append(analysis)
                     
                     # 어떤 돌파인지 확인
@@ -207,25 +282,73 @@ class UpbitTechnicalAnalyzer:
                         breakout_type = f"하단돌파 (현재가: {analysis['current_price']:,.0f} < 하단: {analysis['lower_band']:,.0f})"
                     
                     reason = f"RSI: {analysis['rsi']:.2f}, 밴드폭: {analysis['band_width']:.3f}%, {breakout_type}"
-                    logger.info(f"조건 만족: {symbol} - {reason}")
+                    logger.info("조건 만족: %s - %s", symbol, reason)
                 
-                # API 호출 제한을 위한 딜레이
-                import time
-                time.sleep(0.1)
+                # API 호출 제한을 위한 딜레이 (요청 예산 기준)
+                self.pace()
                 
             except Exception as e:
-                logger.error(f"종목 체크 중 오류 ({symbol}): {e}")
+                logger.error("종목 체크 중 오류 (%s): %s", symbol, e)
+                self.skip_reasons[symbol] = f"체크 오류: {e}"
+                self.unclaim(symbol, candle_start)
                 continue
         
+        self.scan_deadline = None
+        
+        if claimed_elsewhere:
+            logger.info(f"다른 인스턴스가 이번 캔들을 이미 스캔한 종목 {len(claimed_elsewhere)}개 건너뜀")
+        
+        self.write_dashboard(records)
+        
+        # 건너뛴 종목과 사유 보고
+        if self.skip_reasons:
+            logger.warning(f"건너뛴 종목 {len(self.skip_reasons)}개: " + ", ".join(f"{symbol}({reason})" for symbol, reason in self.skip_reasons.items()))
+        
         # 조건에 맞는 종목이 있으면 텔레그램으로 알림 전송
         if alerts:
-            message = self.format_alert_message(alerts)
+            message = self.format_alert_message(alerts, self.skip_reasons)
             self.send_telegram_message(message)
             logger.info(f"{len(alerts)}개 종목에서 조건 만족 - 알림 전송 완료")
         else:
             logger.info("조건을 만족하는 종목이 없습니다.")
     
-    def format_alert_message(self, alerts):
+    def pace(self):
+        """
+        다음 API 요청 전에 요청 예산(RATE_BUDGET)에 맞춰 대기합니다.
+        """
+        if self.request_bucket is not None:
+            self.request_bucket.acquire()
+        else:
+            time.sleep(self.request_delay)
+    
+    def unclaim(self, symbol, candle_start):
+        """
+        분석에 실패한 종목의 캔들 점유를 풀어 다른 인스턴스가 다시 시도할 수 있게 합니다.
+        """
+        if self.leader is not None:
+            self.leader.unclaim(symbol, candle_start)
+    
+    def write_dashboard(self, records):
+        """
+        이번 실행의 분석 결과로 정적 대시보드 스냅샷을 기록합니다. (DASHBOARD_DIR 미설정 시 무시)
+        
+        Args:
+            records (list): (분석 결과, 조건 결과) 목록
+        """
+        if not self.dashboard_dir or not records:
+            return
+        try:
+            snapshot = DashboardSnapshot(
+                self.dashboard_dir,
+                history_points=int(os.getenv('DASHBOARD_HISTORY_POINTS', '168'))
+            )
+            for analysis, conditions in records:
+                snapshot.add_market(analysis, conditions, self.series.get(analysis['symbol']))
+            snapshot.write()
+        except Exception as e:
+            logger.error(f"대시보드 스냅샷 기록 실패: {e}")
+    
+    def format_alert_message(self, alerts, skipped=None):
         """
         알림 메시지를 포맷팅합니다.
         """
@@ -258,6 +381,12 @@ class UpbitTechnicalAnalyzer:
             elif lower_breakout:
                 message += "📉 하단 돌파 (약세 신호)\n\n"
         
+        if skipped:
+            message += f"⏭️ <b>건너뛴 종목 ({len(skipped)}개):</b>\n"
+            for symbol, reason in skipped.items():
+                message += f"• {symbol.replace('KRW-', '')}: {reason}\n"
+            message += "\n"
+        
         message += "⚠️ <i>투자 결정은 신중하게 하시기 바랍니다.</i>\n"
         message += "🤖 <i>이 알림은 GitHub Actions로 자동 생성되었습니다.</i>"
         
@@ -268,10 +397,23 @@ def main():
     """
     메인 함수 - 프로그램 설정 및 실행
     """
+    # 로깅 설정 (큐 기반 비동기 기록, JSON lines 파일은 크기/시간 기준 교체 후 압축)
+    setup_logging()
+    
     try:
         # 분석기 초기화 및 실행
         analyzer = UpbitTechnicalAnalyzer()
-        analyzer.check_conditions()
+        
+        # 다른 인스턴스가 리더이면 이번 실행은 건너뜀
+        if analyzer.leader is not None and not analyzer.leader.is_leader():
+            logger.info("다른 인스턴스가 리더입니다 - 이번 실행은 건너뜁니다.")
+            return
+        
+        try:
+            analyzer.check_conditions()
+        finally:
+            if analyzer.leader is not None:
+                analyzer.leader.release()
         
         logger.info("GitHub Actions 실행 완료")
         
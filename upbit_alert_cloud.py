@@ -7,20 +7,34 @@ import json
 import os
 from datetime import datetime
 import logging
+import threading
 from dotenv import load_dotenv
+from upbit_resilience import ResilientFetcher, ScanDeadline, CircuitOpenError, ScanDeadlineExceeded, TokenBucket
+from upbit_adaptive import AdaptivePollScheduler
+from upbit_fastcheck import FastBreakoutChecker
+from upbit_candles import candle_endpoint, format_to, candles_to_frame, candle_epoch, unit_seconds
+from upbit_alignment import align_candles, fill_candle_gaps
+from upbit_shm_cache import CandleCacheWriter
+from upbit_timeframes import MultiTimeframeScanner, parse_timeframes
+from upbit_history import SignalHistory
+from upbit_screener import MarketScreener, parse_weights
+from upbit_volume import volume_spike_stats
+from upbit_market_stats import compute_market_stats
+from upbit_bot import TelegramCommandBot
+from upbit_leader import leader_from_env
+from upbit_paper import paper_trader_from_env, format_summary
+from upbit_rate_planner import RateBudgetPlanner, FetchTask, build_tasks, PRIORITY_NORMAL, DEFAULT_RATE
+from upbit_orderbook import fetch_orderbooks, DEFAULT_BATCH_SIZE
+from upbit_logging import setup_logging, with_scan_id
+from upbit_sharding import shard_pool_from_env
+from upbit_kernels import wilder_rsi, RSI_METHODS
+from upbit_chart import ChartRenderer
+from upbit_reports import SignalReports
+from upbit_ticks import tick_runner_from_env
 
 # 환경변수 로드
 load_dotenv()
 
-# 로깅 설정
-logging.basicConfig(
-    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('upbit_alert.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class UpbitTechnicalAnalyzer:
@@ -28,7 +42,8 @@ class UpbitTechnicalAnalyzer:
         """
         업비트 기술적 분석 자동 알림 시스템 (클라우드 버전)
         """
-        self.base_url = "https://api.upbit.com/v1"
+        self.base_url = os.getenv('UPBIT_API_URL', "https://api.upbit.com/v1")
+        self.telegram_api_url = os.getenv('TELEGRAM_API_URL', "https://api.telegram.org")
         
         # 환경변수에서 설정 로드
         self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -52,46 +67,209 @@ class UpbitTechnicalAnalyzer:
             'KRW-ATOM',  # 코스모스
         ]
         
+        # 스캔 마감 시간 / 헤지 요청 / 서킷 브레이커 설정
+        self.scan_deadline_seconds = float(os.getenv('SCAN_DEADLINE_SECONDS', '120')) or None
+        self.request_delay = float(os.getenv('REQUEST_DELAY_SECONDS', '0.1'))
+        # 초당 요청 예산 (0 이면 종목마다 REQUEST_DELAY_SECONDS 만큼 대기)
+        self.rate_budget = float(os.getenv('RATE_BUDGET', '8'))
+        self.request_bucket = TokenBucket(self.rate_budget, capacity=1) if self.rate_budget > 0 else None
+        self.fetcher = ResilientFetcher(
+            timeout=10,
+            hedge_percentile=float(os.getenv('HEDGE_PERCENTILE', '90')),
+            failure_threshold=int(os.getenv('BREAKER_FAILURES', '5')),
+            recovery_timeout=float(os.getenv('BREAKER_COOLDOWN_SECONDS', '60'))
+        )
+        self.scan_deadline = None
+        self.skip_reasons = {}
+        
+        # 알림 조건 기준: RSI 상한, 밴드폭 상한(%) (스크리너/적응형 스케줄러도 같은 기준 사용)
+        self.rsi_threshold = 50
+        self.band_width_threshold = 0.3
+        
+        # 스케줄러 모드: fixed (매시간 정시 + 30분마다) 또는 adaptive (종목별 주기 조절)
+        self.scheduler_mode = os.getenv('SCHEDULER_MODE', 'fixed')
+        self.alerted_candles = {}
+        
+        # 캔들 사이 빠른 돌파 체크 주기(초), 0 이면 사용 안 함
+        self.fast_check_seconds = int(os.getenv('FAST_CHECK_SECONDS', '0'))
+        
+        # 멀티 타임프레임 (예: 5m,15m,60m,240m,1d), 비어 있으면 60분봉만 분석
+        self.timeframes = parse_timeframes(os.getenv('TIMEFRAMES', ''))
+        
+        # RSI 평활 방식: sma (단순 이동평균) 또는 wilder (업비트 차트와 같은 Wilder 평활)
+        self.rsi_method = os.getenv('RSI_METHOD', 'sma')
+        if self.rsi_method not in RSI_METHODS:
+            raise ValueError(f"RSI_METHOD 는 {' 또는 '.join(RSI_METHODS)} 이어야 합니다: {self.rsi_method}")
+        
+        # 거래가 없어 빠진 캔들을 직전 종가로 채운 뒤 지표 계산
+        self.fill_candle_gaps = os.getenv('FILL_CANDLE_GAPS', '1') == '1'
+        # 최근 스캔에서 받은 종목별 캔들 (종목 간 계산용)
+        self.candle_frames = {}
+        
+        # 다른 로컬 프로세스와 공유하는 메모리 매핑 캔들 캐시 (이 프로세스가 작성자)
+        self.candle_cache = None
+        cache_path = os.getenv('CANDLE_CACHE_PATH')
+        if cache_path:
+            try:
+                self.candle_cache = CandleCacheWriter(
+                    cache_path,
+                    max_markets=int(os.getenv('CANDLE_CACHE_MAX_MARKETS', '512')),
+                    capacity=int(os.getenv('CANDLE_CACHE_CAPACITY', '1024'))
+                )
+                logger.info(f"공유 캔들 캐시 사용: {cache_path}")
+            except (RuntimeError, ValueError) as e:
+                logger.warning(f"공유 캔들 캐시를 사용할 수 없습니다: {e}")
+        
+        # 스캔별 지표/조건 결과 기록 (SQLite)
+        self.history = None
+        history_path = os.getenv('HISTORY_DB_PATH')
+        if history_path:
+            self.history = SignalHistory(history_path)
+            logger.info(f"시그널 기록 저장: {history_path}")
+        
+        # 신호별 1/4/24시간 성과를 스캔마다 누적 집계해 일간/주간 리포트 전송 (SQLite)
+        self.reports = None
+        report_path = os.getenv('REPORT_DB_PATH')
+        if report_path:
+            self.reports = SignalReports(report_path)
+            logger.info(f"신호 리포트 집계 저장: {report_path}")
+        # 성과 확인용 /ticker 조회 최소 간격(초). 틱 스캔처럼 자주 집계해도 요청이 몰리지 않게 함
+        self.report_price_interval = 60
+        self.report_prices_at = 0
+        
+        # 종목별 최신 분석 결과와 분석 시각 (스크리너/봇 명령이 재사용)
+        self.last_results = {}
+        self.result_times = {}
+        self.last_scan_at = 0
+        self.cache_lock = threading.Lock()
+        # /market/all 마켓 목록 캐시 (봇의 /watch 종목 확인용)
+        self.listed_markets = None
+        self.listed_markets_at = 0
+        # 상위 종목 요약 주기 (분, 0 이면 사용 안 함)
+        self.digest_interval_minutes = int(os.getenv('DIGEST_INTERVAL_MINUTES', '0'))
+        
+        # 거래량 급증 조건 (직전 캔들 거래량 중앙값 대비 배수, 0 이면 사용 안 함)
+        self.volume_window = int(os.getenv('VOLUME_WINDOW', '20'))
+        self.volume_spike_ratio = float(os.getenv('VOLUME_SPIKE_RATIO', '0'))
+        # and: 밴드 돌파 조건과 함께 만족해야 알림, alone: 거래량 급증만으로도 알림
+        self.volume_spike_mode = os.getenv('VOLUME_SPIKE_MODE', 'and')
+        if self.volume_spike_mode not in ('and', 'alone'):
+            raise ValueError(f"VOLUME_SPIKE_MODE 는 and 또는 alone 이어야 합니다: {self.volume_spike_mode}")
+        
+        # 시장 전체 상관관계/시장 폭 (스캔마다 정렬된 종가 행렬로 계산)
+        self.market_stats_enabled = os.getenv('MARKET_STATS', '0') == '1'
+        self.correlation_window = int(os.getenv('CORRELATION_WINDOW', '48'))
+        # 많은 종목이 동시에 돌파할 때 시장 동조 종목의 알림을 제외
+        self.market_filter = os.getenv('MARKET_FILTER', '0') == '1'
+        self.market_filter_breadth = float(os.getenv('MARKET_FILTER_BREADTH', '20'))
+        self.market_stats = None
+        
+        # 호가 불균형/스프레드 (스캔마다 전체 종목 호가를 묶음 요청으로 조회)
+        self.orderbook_enabled = os.getenv('ORDERBOOK', '0') == '1'
+        self.orderbook_levels = int(os.getenv('ORDERBOOK_LEVELS', '5'))
+        self.orderbook_batch_size = int(os.getenv('ORDERBOOK_BATCH_SIZE', str(DEFAULT_BATCH_SIZE)))
+        # 돌파 방향의 호가 우위 최소값 (0~1, 0 이면 조건으로 쓰지 않음)
+        self.orderbook_imbalance = float(os.getenv('ORDERBOOK_IMBALANCE', '0'))
+        # 허용하는 최대 스프레드 (%, 0 이면 조건으로 쓰지 않음)
+        self.orderbook_max_spread = float(os.getenv('ORDERBOOK_MAX_SPREAD', '0'))
+        
+        # 여러 배포가 같은 종목을 중복 스캔하지 않도록 리더 선출 (LEADER_BACKEND 미설정 시 사용 안 함)
+        self.leader = leader_from_env()
+        if self.leader is not None:
+            logger.info(f"리더 선출 사용: {self.leader.name} (인스턴스 {self.leader.owner}, 임대 {self.leader.ttl:.0f}초)")
+        
+        # 알림 규칙 모의 매매 (PAPER_TRADING=1)
+        self.paper = paper_trader_from_env()
+        if self.paper is not None:
+            logger.info(f"모의 매매 사용: 익절 {self.paper.rules.take_profit * 100:g}%, 손절 {self.paper.rules.stop_loss * 100:g}%, "
+                        f"수수료 {self.paper.rules.fee * 100:g}%, 슬리피지 {self.paper.rules.slippage * 100:g}%")
+        
+        # 종목 분석을 여러 워커 프로세스/서버에 나눠 맡김 (SHARD_WORKERS, SHARD_LISTEN)
+        self.shards = shard_pool_from_env()
+        if self.shards is not None:
+            logger.info(f"샤드 스캔 사용: 워커 {len(self.shards.coordinator.ring)}개")
+        
+        # 알림마다 가격/볼린저 밴드/RSI 미니 차트 첨부 (ALERT_CHARTS=1)
+        self.charts = None
+        self.chart_max_per_scan = int(os.getenv('CHART_MAX_PER_SCAN', '5'))
+        if os.getenv('ALERT_CHARTS', '0') == '1':
+            self.charts = ChartRenderer(points=int(os.getenv('CHART_POINTS', '96')))
+        
         logger.info("업비트 기술적 분석 시스템 초기화 완료")
         logger.info(f"모니터링 종목: {len(self.symbols)}개")
     
-    def get_candles(self, market, count=200):
+    def fetch_candles(self, market, count=200, unit=60, to=None, deadline=None):
+        """
+        업비트에서 캔들 데이터를 가져옵니다. (실패하면 예외, 분석기 상태는 바꾸지 않음)
+        
+        Args:
+            market (str): 마켓 코드 (예: KRW-BTC)
+            count (int): 가져올 캔들 개수
+            unit (str|int): 캔들 단위 (분 또는 'days')
+            to (int): 이 시각(UTC epoch 초) 이전 캔들만 조회 (기본값: 최신)
+            deadline (ScanDeadline): 스캔 마감 시간
+            
+        Returns:
+            pd.DataFrame: 오래된 것부터 정렬된 캔들 데이터
+        """
+        endpoint = candle_endpoint(unit)
+        url = f"{self.base_url}/{endpoint}"
+        params = {
+            'market': market,
+            'count': count
+        }
+        if to is not None:
+            params['to'] = format_to(to)
+        
+        data = self.fetcher.get_json(endpoint, url, params=params, deadline=deadline)
+        df = pd.DataFrame(data)
+        if df.empty:
+            return df
+        
+        # 시간 순서로 정렬 (오래된 것부터)
+        return df.sort_values('candle_date_time_kst').reset_index(drop=True)
+    
+    def get_candles(self, market, count=200, unit=60, to=None):
         """
-        업비트에서 캔들 데이터를 가져옵니다.
+        스캔 중 캔들 데이터를 가져옵니다. 실패하면 건너뛴 사유를 남기고 None 을 반환합니다.
         
         Args:
             market (str): 마켓 코드 (예: KRW-BTC)
             count (int): 가져올 캔들 개수
+            unit (str|int): 캔들 단위 (분 또는 'days')
+            to (int): 이 시각(UTC epoch 초) 이전 캔들만 조회 (기본값: 최신)
             
         Returns:
             pd.DataFrame: 캔들 데이터
         """
         try:
-            url = f"{self.base_url}/candles/minutes/60"
-            params = {
-                'market': market,
-                'count': count
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            df = pd.DataFrame(data)
+            df = self.fetch_candles(market, count, unit, to, deadline=self.scan_deadline)
+            if df.empty:
+                return df
             
-            # 시간 순서로 정렬 (오래된 것부터)
-            df = df.sort_values('candle_date_time_kst').reset_index(drop=True)
+            # 최신 캔들은 공유 캐시에도 기록
+            if self.candle_cache is not None and to is None and unit_seconds(unit) == self.candle_cache.unit_seconds:
+                self.candle_cache.write_candles(market, candles_to_frame(df, float_dtype=np.float64))
             
             return df
             
+        except CircuitOpenError:
+            self.skip_reasons[market] = "서킷 브레이커 차단"
+            return None
+        except ScanDeadlineExceeded:
+            self.skip_reasons[market] = "스캔 마감 시간 초과"
+            return None
         except requests.exceptions.Timeout:
             logger.error(f"캔들 데이터 조회 타임아웃 ({market})")
+            self.skip_reasons[market] = "응답 시간 초과"
             return None
         except requests.exceptions.RequestException as e:
             logger.error(f"캔들 데이터 조회 실패 ({market}): {e}")
+            self.skip_reasons[market] = f"요청 실패: {e}"
             return None
         except Exception as e:
             logger.error(f"캔들 데이터 처리 오류 ({market}): {e}")
+            self.skip_reasons[market] = f"데이터 처리 오류: {e}"
             return None
     
     def calculate_rsi(self, prices, period=14):
@@ -106,6 +284,9 @@ class UpbitTechnicalAnalyzer:
             pd.Series: RSI 값
         """
         try:
+            if self.rsi_method == 'wilder':
+                return pd.Series(wilder_rsi(prices.to_numpy(dtype=np.float64), period), index=prices.index)
+            
             delta = prices.diff()
             gain = delta.where(delta > 0, 0)
             loss = -delta.where(delta < 0, 0)
@@ -158,12 +339,50 @@ class UpbitTechnicalAnalyzer:
         Returns:
             dict: 분석 결과
         """
+        # 캔들 데이터 가져오기
+        df = self.get_candles(symbol)
+        if df is not None and not df.empty:
+            self.candle_frames[symbol] = df
+        return self.analyze_candles(symbol, df)
+    
+    def analyze_candles(self, symbol, df):
+        """
+        캔들 데이터로 기술적 분석을 수행합니다. 분석할 수 없으면 건너뛴 사유를 남깁니다.
+        
+        Args:
+            symbol (str): 종목 코드
+            df (pd.DataFrame): 오래된 것부터 정렬된 캔들 데이터
+            
+        Returns:
+            dict: 분석 결과
+        """
+        analysis, reason = self.compute_analysis(symbol, df)
+        if analysis is None:
+            logger.warning(f"분석 건너뜀 ({symbol}): {reason}")
+            # 캔들 조회 실패 사유가 이미 있으면 그대로 둠
+            self.skip_reasons.setdefault(symbol, reason)
+        return analysis
+    
+    def compute_analysis(self, symbol, df):
+        """
+        캔들 데이터로 지표를 계산합니다.
+        
+        분석기 상태(건너뛴 종목, 로그)를 바꾸지 않으므로 스캔과 동시에 도는
+        스레드(봇 명령, 초 단위 봉)에서도 안전하게 쓸 수 있습니다.
+        
+        Args:
+            symbol (str): 종목 코드
+            df (pd.DataFrame): 오래된 것부터 정렬된 캔들 데이터
+            
+        Returns:
+            tuple: (분석 결과 또는 None, 분석하지 못한 사유)
+        """
         try:
-            # 캔들 데이터 가져오기
-            df = self.get_candles(symbol)
+            if self.fill_candle_gaps and df is not None and not df.empty:
+                df = fill_candle_gaps(df)
+            
             if df is None or len(df) < 50:
-                logger.warning(f"충분한 데이터가 없습니다 ({symbol}): {len(df) if df is not None else 0}개")
-                return None
+                return None, f"데이터 부족 ({len(df) if df is not None else 0}개)"
             
             # 종가 데이터
             close_prices = df['trade_price']
@@ -177,24 +396,206 @@ class UpbitTechnicalAnalyzer:
             current_band_width = band_width.iloc[-1]
             current_price = close_prices.iloc[-1]
             
+            # 거래량 급증 (진행 중인 캔들은 경과 비율로 환산)
+            volume_ratio, volume_zscore = self.calculate_volume_spike(df)
+            
             # NaN 값 체크
             if pd.isna(current_rsi) or pd.isna(current_band_width):
-                logger.warning(f"계산된 지표에 NaN 값이 있습니다 ({symbol})")
-                return None
+                return None, "지표 계산 불가 (NaN)"
             
-            return {
+            analysis = {
                 'symbol': symbol,
                 'current_price': current_price,
                 'rsi': current_rsi,
                 'band_width': current_band_width,
                 'upper_band': upper_band.iloc[-1],
                 'lower_band': lower_band.iloc[-1],
-                'middle_band': middle_band.iloc[-1]
+                'middle_band': middle_band.iloc[-1],
+                'volume_ratio': volume_ratio,
+                'volume_zscore': volume_zscore,
+                'candle_time': df['candle_date_time_kst'].iloc[-1]
             }
+            if self.charts is not None:
+                analysis['chart_series'] = self.charts.series(close_prices, upper_band, middle_band, lower_band, rsi)
+            return analysis, None
             
         except Exception as e:
-            logger.error(f"분석 실패 ({symbol}): {e}")
+            return None, f"분석 실패: {e}"
+    
+    def lookup_symbol(self, symbol):
+        """
+        스캔과 별개로 한 종목을 조회해 분석합니다. (텔레그램 명령용)
+        
+        진행 중인 스캔의 건너뛴 종목, 종목 간 계산용 캔들, 스캔 마감 시간을
+        건드리지 않습니다.
+        
+        Returns:
+            dict: 분석 결과 (조회/분석 실패 시 None)
+        """
+        try:
+            df = self.fetch_candles(symbol)
+        except Exception as e:
+            logger.warning(f"종목 조회 실패 ({symbol}): {e}")
+            return None
+        analysis, reason = self.compute_analysis(symbol, df)
+        if analysis is None:
+            logger.info(f"종목 분석 불가 ({symbol}): {reason}")
+        return analysis
+    
+    def is_listed(self, symbol, max_age=3600):
+        """
+        /market/all 목록에 있는 마켓인지 확인합니다. (목록은 max_age 초 동안 재사용)
+        
+        Returns:
+            bool: 상장된 마켓이면 True, 목록을 받지 못하면 None
+        """
+        # 봇 명령 스레드와 스캔이 함께 부를 수 있으므로 목록과 갱신 시각은 잠금 안에서 함께 교체
+        with self.cache_lock:
+            listed = self.listed_markets
+            fresh = listed is not None and time.time() - self.listed_markets_at <= max_age
+        if not fresh:
+            try:
+                data = self.fetcher.get_json('market/all', f"{self.base_url}/market/all", params={'isDetails': 'false'})
+            except Exception as e:
+                logger.warning(f"마켓 목록 조회 실패: {e}")
+                return None
+            listed = {item['market'] for item in data}
+            with self.cache_lock:
+                self.listed_markets = listed
+                self.listed_markets_at = time.time()
+        return symbol in listed
+    
+    def calculate_volume_spike(self, df):
+        """
+        마지막 캔들 거래량을 직전 캔들 거래량 중앙값과 비교합니다.
+        
+        Args:
+            df (pd.DataFrame): 오래된 것부터 정렬된 캔들 데이터
+            
+        Returns:
+            tuple: (중앙값 대비 배수, 로그 거래량 z-score), 계산 불가 시 NaN
+        """
+        if 'candle_acc_trade_volume' not in df or len(df) < 2:
+            return float('nan'), float('nan')
+        
+        # 마지막 캔들이 얼마나 진행됐는지 (완성된 캔들이면 1 이상)
+        starts = candle_epoch(df['candle_date_time_utc'].iloc[-2:])
+        span = starts[1] - starts[0]
+        elapsed = (time.time() - starts[1]) / span if span > 0 else 1.0
+        
+        ratio, zscore = volume_spike_stats(
+            df['candle_acc_trade_volume'].values,
+            window=self.volume_window,
+            elapsed=elapsed
+        )
+        return float(ratio), float(zscore)
+    
+    def update_volume_spikes(self, results, unit_seconds=3600):
+        """
+        이번 스캔에서 분석한 모든 종목의 거래량 급증 지표를 (종목, 캔들) 배열 한 번으로 다시 계산해
+        분석 결과에 반영합니다.
+        
+        Args:
+            results (dict): 이번 스캔의 종목별 분석 결과
+            unit_seconds (int): 캔들 길이(초)
+            
+        Returns:
+            pd.DataFrame: 종목별 volume_ratio, volume_zscore (배수 내림차순, 계산할 종목이 없으면 None)
+        """
+        symbols = [symbol for symbol, analysis in results.items()
+                   if analysis is not None and symbol in self.candle_frames]
+        if not symbols:
+            return None
+        aligned = self.aligned_candles(symbols, unit_seconds)
+        elapsed = (time.time() - aligned.timestamps[-1]) / unit_seconds if len(aligned.timestamps) else None
+        ratio, zscore = volume_spike_stats(aligned.volume, window=self.volume_window, elapsed=elapsed)
+        for i, symbol in enumerate(aligned.symbols):
+            results[symbol]['volume_ratio'] = float(ratio[i])
+            results[symbol]['volume_zscore'] = float(zscore[i])
+        return pd.DataFrame(
+            {'volume_ratio': ratio, 'volume_zscore': zscore},
+            index=aligned.symbols
+        ).sort_values('volume_ratio', ascending=False)
+    
+    def aligned_candles(self, symbols=None, unit_seconds=3600):
+        """
+        최근 스캔에서 받은 캔들을 공통 시간 축의 (필드, 종목, 시간) 배열로 정렬합니다.
+        
+        Args:
+            symbols (list): 포함할 종목 (기본값: 캔들을 받은 모든 종목)
+            unit_seconds (int): 캔들 길이(초)
+            
+        Returns:
+            AlignedCandles: 빈 캔들이 채워진 정렬 배열과 유효 마스크
+        """
+        symbols = [symbol for symbol in (symbols or self.symbols) if symbol in self.candle_frames]
+        frames = {symbol: candles_to_frame(self.candle_frames[symbol], float_dtype=np.float64) for symbol in symbols}
+        return align_candles(frames, unit_seconds)
+    
+    def update_market_stats(self, results, unit_seconds=3600):
+        """
+        감시 종목 전체의 캔들로 시장 지표를 계산하고 분석 결과에 종목별 시장 지표를 붙입니다.
+        
+        적응형/빠른 체크 스캔처럼 일부 종목만 다시 받은 경우에도 시장 폭이 몇 개 종목으로
+        왜곡되지 않도록, 이번 스캔에 없던 감시 종목은 최근에 받은 캔들을 함께 씁니다.
+        이번 스캔에서 분석에 실패한 종목은 제외합니다.
+        
+        Args:
+            results (dict): 이번 스캔의 종목별 분석 결과 (일부 종목만 있을 수 있음)
+            unit_seconds (int): 캔들 길이(초)
+            
+        Returns:
+            MarketStats: 계산 결과 (종목이 부족하면 None)
+        """
+        # 감시 목록에서 빠진 종목의 캔들은 버림
+        watched = set(self.symbols)
+        for symbol in [symbol for symbol in self.candle_frames if symbol not in watched]:
+            del self.candle_frames[symbol]
+        
+        symbols = [symbol for symbol in self.symbols
+                   if symbol in self.candle_frames and (symbol not in results or results[symbol] is not None)]
+        if len(symbols) < 3:
+            return None
+        aligned = self.aligned_candles(symbols, unit_seconds)
+        stats = compute_market_stats(aligned.symbols, aligned.close, window=self.correlation_window,
+                                     band_width_threshold=self.band_width_threshold)
+        broad = stats.breadth['above_upper'] + stats.breadth['below_lower'] >= self.market_filter_breadth
+        
+        for symbol, analysis in results.items():
+            if analysis is None:
+                continue
+            market = stats.symbol(symbol)
+            if market is not None:
+                market['broad_move'] = broad
+            analysis['market'] = market
+        
+        breadth = stats.breadth
+        logger.info(f"시장 폭 ({breadth['markets']}개): 상단 돌파 {breadth['above_upper']:.1f}%, 하단 이탈 {breadth['below_lower']:.1f}%, "
+                    f"수축 {breadth['squeeze']:.1f}%, 상승 {breadth['advancing']:.1f}%, 평균 상관계수 {breadth['mean_correlation']:.2f}")
+        self.market_stats = stats
+        return stats
+    
+    def update_orderbooks(self, analyses):
+        """
+        분석한 종목들의 호가를 묶음 요청으로 받아 분석 결과에 호가 지표를 붙입니다.
+        
+        Args:
+            analyses (list): 이번 스캔의 분석 결과 (같은 종목의 여러 타임프레임 결과는 호가를 함께 씀)
+            
+        Returns:
+            OrderbookSnapshot: 받은 호가 (조회할 종목이 없으면 None)
+        """
+        analyses = [analysis for analysis in analyses if analysis is not None]
+        symbols = list(dict.fromkeys(analysis['symbol'] for analysis in analyses))
+        if not symbols:
             return None
+        snapshot = fetch_orderbooks(self.fetcher, self.base_url, symbols,
+                                    batch_size=self.orderbook_batch_size, levels=self.orderbook_levels)
+        for analysis in analyses:
+            analysis['orderbook'] = snapshot.symbol(analysis['symbol'])
+        logger.info(f"호가 조회: {len(snapshot)}/{len(symbols)}개 종목 "
+                    f"(요청 {-(-len(symbols) // self.orderbook_batch_size)}회, 상위 {self.orderbook_levels}호가)")
+        return snapshot
     
     def send_telegram_message(self, message):
         """
@@ -204,7 +605,7 @@ class UpbitTechnicalAnalyzer:
             message (str): 전송할 메시지
         """
         try:
-            url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
+            url = f"{self.telegram_api_url}/bot{self.telegram_bot_token}/sendMessage"
             data = {
                 'chat_id': self.telegram_chat_id,
                 'text': message,
@@ -222,62 +623,441 @@ class UpbitTechnicalAnalyzer:
         except Exception as e:
             logger.error(f"텔레그램 메시지 전송 중 예상치 못한 오류: {e}")
     
-    def check_conditions(self):
+    def send_telegram_photo(self, photo, caption):
+        """
+        텔레그램으로 이미지를 전송합니다.
+        
+        Args:
+            photo (bytes): PNG 이미지
+            caption (str): 이미지 설명 (HTML)
+        """
+        try:
+            url = f"{self.telegram_api_url}/bot{self.telegram_bot_token}/sendPhoto"
+            data = {
+                'chat_id': self.telegram_chat_id,
+                'caption': caption,
+                'parse_mode': 'HTML'
+            }
+            
+            response = requests.post(url, data=data, files={'photo': ('chart.png', photo, 'image/png')}, timeout=10)
+            response.raise_for_status()
+            logger.info("텔레그램 이미지 전송 완료")
+            
+        except requests.exceptions.Timeout:
+            logger.error("텔레그램 이미지 전송 타임아웃")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"텔레그램 이미지 전송 실패: {e}")
+        except Exception as e:
+            logger.error(f"텔레그램 이미지 전송 중 예상치 못한 오류: {e}")
+    
+    def send_chart(self, analysis):
+        """
+        분석 결과의 미니 차트를 전송합니다. 같은 캔들의 차트는 캐시된 이미지를 다시 씁니다.
+        
+        Args:
+            analysis (dict): chart_series 가 붙은 분석 결과
+            
+        Returns:
+            bool: 전송 여부 (차트를 쓰지 않거나 시계열이 없으면 False)
+        """
+        if self.charts is None or analysis.get('chart_series') is None:
+            return False
+        timeframe = analysis.get('timeframe', '60m')
+        try:
+            photo = self.charts.render(analysis['symbol'], timeframe, analysis['candle_time'], analysis['chart_series'])
+        except Exception as e:
+            logger.error(f"차트 생성 실패 ({analysis['symbol']}): {e}")
+            return False
+        caption = (f"📈 <b>{analysis['symbol']}</b> [{timeframe}] {analysis['current_price']:,.0f}원, "
+                   f"RSI {analysis['rsi']:.1f}, 밴드폭 {analysis['band_width']:.3f}%")
+        self.send_telegram_photo(photo, caption)
+        return True
+    
+    def send_alert_charts(self, alerts):
+        """
+        알림 종목의 미니 차트를 최대 chart_max_per_scan 개까지 전송합니다.
+        """
+        if self.charts is None:
+            return
+        sent = sum(self.send_chart(analysis) for analysis in alerts[:self.chart_max_per_scan])
+        if len(alerts) > self.chart_max_per_scan:
+            logger.info(f"차트 전송 제한으로 {len(alerts) - self.chart_max_per_scan}건 생략")
+        stats = self.charts.stats()
+        if sent and 'mean_ms' in stats:
+            logger.info(f"차트 {sent}건 전송 (렌더 {stats['renders']}회, 평균 {stats['mean_ms']:.1f}ms, "
+                        f"p95 {stats['p95_ms']:.1f}ms, 캐시 재사용 {stats['hits']}회)")
+    
+    def evaluate_conditions(self, analysis):
+        """
+        분석 결과에 알림 조건을 적용합니다.
+        
+        Args:
+            analysis (dict): analyze_symbol 결과
+            
+        Returns:
+            dict: 조건별 만족 여부와 최종 알림 여부
+        """
+        # 조건 체크: RSI ≤ 기준 + 밴드폭 ≤ 기준 + 밴드 돌파
+        rsi_condition = analysis['rsi'] <= self.rsi_threshold
+        band_width_condition = analysis['band_width'] <= self.band_width_threshold
+        upper_breakout = analysis['current_price'] > analysis['upper_band']  # 상단 돌파
+        lower_breakout = analysis['current_price'] < analysis['lower_band']  # 하단 돌파
+        band_breakout = upper_breakout or lower_breakout
+        
+        # 모든 조건을 만족해야 알림
+        alert = rsi_condition and band_width_condition and band_breakout
+        
+        # 거래량 급증 조건 (예: 3배 거래량 동반 돌파)
+        volume_ratio = analysis.get('volume_ratio')
+        volume_spike = (self.volume_spike_ratio > 0 and volume_ratio is not None
+                        and not pd.isna(volume_ratio) and volume_ratio >= self.volume_spike_ratio)
+        if self.volume_spike_ratio > 0:
+            alert = (alert and volume_spike) if self.volume_spike_mode == 'and' else (alert or volume_spike)
+        
+        # 시장 전체가 함께 움직이는 중이고 이 종목도 시장을 따라가면 시장 동조로 판단
+        market = analysis.get('market')
+        market_driven = bool(market) and market['broad_move'] and market['market_driven']
+        if self.market_filter and market_driven:
+            alert = False
+        
+        # 호가 확인: 돌파 방향으로 잔량이 쏠려 있고 스프레드가 좁아야 함 (호가가 없으면 적용 안 함)
+        orderbook = analysis.get('orderbook')
+        orderbook_confirmed = True
+        if orderbook:
+            if self.orderbook_imbalance > 0 and upper_breakout:
+                orderbook_confirmed = orderbook['imbalance'] >= self.orderbook_imbalance
+            elif self.orderbook_imbalance > 0 and lower_breakout:
+                orderbook_confirmed = orderbook['imbalance'] <= -self.orderbook_imbalance
+            if self.orderbook_max_spread > 0 and orderbook['spread'] > self.orderbook_max_spread:
+                orderbook_confirmed = False
+        alert = alert and orderbook_confirmed
+        
+        return {
+            'rsi': rsi_condition,
+            'band_width': band_width_condition,
+            'upper_breakout': upper_breakout,
+            'lower_breakout': lower_breakout,
+            'volume_spike': volume_spike,
+            'market_driven': market_driven,
+            'orderbook_confirmed': orderbook_confirmed,
+            'alert': alert
+        }
+    
+    @with_scan_id
+    def check_conditions(self, symbols=None, once_per_candle=False):
         """
-        모든 종목의 조건을 체크하고 조건에 맞는 종목이 있으면 알림을 보냅니다.
+        종목들의 조건을 체크하고 조건에 맞는 종목이 있으면 알림을 보냅니다.
+        
+        Args:
+            symbols (list): 체크할 종목 목록 (기본값: 전체 감시 종목)
+            once_per_candle (bool): 같은 캔들에서 이미 알린 종목은 다시 알리지 않음
+            
+        Returns:
+            dict: 종목별 분석 결과 (분석에 실패한 종목은 None)
         """
+        if self.leader is not None and not self.leader.is_leader():
+            logger.info("대기 인스턴스 - 리더가 스캔하므로 건너뜁니다.")
+            return {}
+        
         logger.info("기술적 분석 조건 체크 시작")
         
+        symbols = self.symbols if symbols is None else symbols
+        candle_start = int(time.time()) // 3600 * 3600
+        claimed_elsewhere = []
         alerts = []
+        results = {}
+        records = []
+        self.skip_reasons = {}
+        self.scan_deadline = ScanDeadline(self.scan_deadline_seconds)
+        sharded = self.scan_shards(symbols)
         
-        for symbol in self.symbols:
+        for index, symbol in enumerate(symbols):
+            # 마감 시간이 지나면 남은 종목은 건너뛰고 지금까지의 결과로 마무리
+            if sharded is None and self.scan_deadline.expired():
+                for skipped in symbols[index:]:
+                    self.skip_reasons[skipped] = "스캔 마감 시간 초과"
+                logger.warning(f"스캔 마감 시간({self.scan_deadline_seconds:.0f}초) 초과 - 남은 {len(symbols) - index}개 종목 건너뜀")
+                break
+            
+            # 다른 인스턴스가 이미 스캔한 (종목, 캔들)은 건너뜀
+            if self.leader is not None and not self.leader.claim(symbol, candle_start):
+                claimed_elsewhere.append(symbol)
+                continue
+            
             try:
-                analysis = self.analyze_symbol(symbol)
+                analysis = sharded.get(symbol) if sharded is not None else self.analyze_symbol(symbol)
+                results[symbol] = analysis
                 
                 if analysis is None:
+                    self.unclaim(symbol, candle_start)
                     continue
                 
-                # 조건 체크: RSI ≤ 50 + 밴드폭 ≤ 0.3% + 밴드 돌파
-                rsi_condition = analysis['rsi'] <= 50
-                band_width_condition = analysis['band_width'] <= 0.3
-                upper_breakout = analysis['current_price'] > analysis['upper_band']  # 상단 돌파
-                lower_breakout = analysis['current_price'] < analysis['lower_band']  # 하단 돌파
-                band_breakout = upper_breakout or lower_breakout
+                conditions = self.evaluate_conditions(analysis)
+                records.append((analysis, conditions))
+                upper_breakout = conditions['upper_breakout']
+                # 종목별 로그는 인자를 넘겨 DEBUG 가 꺼져 있으면 문자열을 만들지 않음
+                logger.debug("분석: %s 현재가 %s, RSI %.2f, 밴드폭 %.3f%%, 알림 %s",
+                             symbol, analysis['current_price'], analysis['rsi'], analysis['band_width'], conditions['alert'])
                 
-                # 모든 조건을 만족해야 알림
-                if rsi_condition and band_width_condition and band_breakout:
+                if conditions['alert'] and once_per_candle and self.alerted_candles.get(symbol) == analysis['candle_time']:
+                    logger.info("이미 알림을 보낸 캔들입니다 (%s, %s)", symbol, analysis['candle_time'])
+                elif conditions['alert']:
                     alerts.append(analysis)
+                    self.alerted_candles[symbol] = analysis['candle_time']
                     
                     # 어떤 돌파인지 확인
                     if upper_breakout:
                         breakout_type = f"상단돌파 (현재가: {analysis['current_price']:,.0f} > 상단: {analysis['upper_band']:,.0f})"
-                    else:
+                    elif conditions['lower_breakout']:
                         breakout_type = f"하단돌파 (현재가: {analysis['current_price']:,.0f} < 하단: {analysis['lower_band']:,.0f})"
+                    else:
+                        breakout_type = f"거래량 급증 ({analysis['volume_ratio']:.1f}배)"
                     
                     reason = f"RSI: {analysis['rsi']:.2f}, 밴드폭: {analysis['band_width']:.3f}%, {breakout_type}"
-                    logger.info(f"조건 만족: {symbol} - {reason}")
+                    logger.info("조건 만족: %s - %s", symbol, reason)
                 
-                # API 호출 제한을 위한 딜레이
-                time.sleep(0.1)
+                # 요청 예산에 맞춘 딜레이 (샤드 스캔은 워커가 조회하면서 대기)
+                if sharded is None:
+                    self.pace()
                 
             except Exception as e:
-                logger.error(f"종목 체크 중 오류 ({symbol}): {e}")
+                logger.error("종목 체크 중 오류 (%s): %s", symbol, e)
+                self.skip_reasons[symbol] = f"체크 오류: {e}"
+                self.unclaim(symbol, candle_start)
                 continue
         
+        self.scan_deadline = None
+        
+        if claimed_elsewhere:
+            logger.info(f"다른 인스턴스가 이번 캔들을 이미 스캔한 종목 {len(claimed_elsewhere)}개 건너뜀")
+        
+        self.finish_scan(results, records, alerts)
+        
+        return results
+    
+    def finish_scan(self, results, records, alerts, unit_seconds=3600):
+        """
+        스캔 후처리: 시장 지표/호가로 조건을 다시 평가한 뒤 시그널 기록, 모의 매매,
+        분석 캐시 반영, 건너뛴 종목 보고, 알림 전송을 합니다.
+        
+        check_conditions 와 멀티 타임프레임 스캔이 함께 씁니다.
+        
+        Args:
+            results (dict): 종목별 대표 분석 결과 (분석 캐시와 시장 지표 대상, 실패한 종목은 None)
+            records (list): 이번 스캔의 (분석 결과, 조건 결과) 목록 (타임프레임별 결과 포함)
+            alerts (list): 알림 후보 분석 결과
+            unit_seconds (int): results 캔들 길이(초)
+            
+        Returns:
+            list: 시장/호가 확인 후 실제로 보낸 알림
+        """
+        # 거래량 급증은 모든 종목을 한 번에 다시 계산한 뒤 조건을 다시 평가
+        if results:
+            try:
+                if self.update_volume_spikes(results, unit_seconds) is not None:
+                    records = [(analysis, self.evaluate_conditions(analysis)) for analysis, _ in records]
+                    alerts = [alert for alert in alerts if self.evaluate_conditions(alert)['alert']]
+            except Exception as e:
+                logger.error(f"거래량 급증 계산 실패: {e}")
+        
+        # 시장 지표를 붙인 뒤 조건을 다시 평가 (시장 동조 알림 제외)
+        if self.market_stats_enabled and results:
+            try:
+                if self.update_market_stats(results, unit_seconds) is not None:
+                    records = [(analysis, self.evaluate_conditions(analysis)) for analysis, _ in records]
+                    kept = [alert for alert in alerts if self.evaluate_conditions(alert)['alert']]
+                    if len(kept) < len(alerts):
+                        logger.info(f"시장 동조 알림 {len(alerts) - len(kept)}건 제외")
+                    alerts = kept
+            except Exception as e:
+                logger.error(f"시장 지표 계산 실패: {e}")
+        
+        # 호가 지표를 붙인 뒤 조건을 다시 평가 (호가 확인이 안 되는 알림 제외)
+        if self.orderbook_enabled and records:
+            try:
+                if self.update_orderbooks([analysis for analysis, _ in records]) is not None:
+                    records = [(analysis, self.evaluate_conditions(analysis)) for analysis, _ in records]
+                    kept = [alert for alert in alerts if self.evaluate_conditions(alert)['alert']]
+                    if len(kept) < len(alerts):
+                        logger.info(f"호가 확인 실패 알림 {len(alerts) - len(kept)}건 제외")
+                    alerts = kept
+            except Exception as e:
+                logger.error(f"호가 지표 계산 실패: {e}")
+        
+        self.record_history(records)
+        self.record_paper_trades(records)
+        self.store_results(results)
+        
+        # 건너뛴 종목과 사유 보고
+        if self.skip_reasons:
+            logger.warning(f"건너뛴 종목 {len(self.skip_reasons)}개: " + ", ".join(f"{symbol}({reason})" for symbol, reason in self.skip_reasons.items()))
+        
         # 조건에 맞는 종목이 있으면 텔레그램으로 알림 전송
         if alerts:
-            message = self.format_alert_message(alerts)
+            message = self.format_alert_message(alerts, self.skip_reasons)
             self.send_telegram_message(message)
+            self.send_alert_charts(alerts)
             logger.info(f"{len(alerts)}개 종목에서 조건 만족 - 알림 전송 완료")
         else:
             logger.info("조건을 만족하는 종목이 없습니다.")
+        
+        return alerts
+    
+    def scan_shards(self, symbols):
+        """
+        샤드 워커들에게 종목 분석을 나눠 맡기고 결과를 모읍니다.
+        
+        Args:
+            symbols (list): 분석할 종목 목록
+            
+        Returns:
+            dict: 종목별 분석 결과 (샤드를 쓰지 않거나 워커가 없으면 None 이며 직접 분석)
+        """
+        if self.shards is None:
+            return None
+        if not self.shards.ready():
+            logger.warning("합류한 샤드 워커가 없어 이 프로세스에서 직접 분석합니다.")
+            return None
+        scan = self.shards.scan(symbols, timeout=self.scan_deadline.remaining())
+        self.candle_frames.update(scan.frames)
+        self.skip_reasons.update(scan.reasons)
+        return scan.analyses
+    
+    def pace(self):
+        """
+        다음 API 요청 전에 요청 예산(RATE_BUDGET)에 맞춰 대기합니다.
+        """
+        if self.request_bucket is not None:
+            self.request_bucket.acquire()
+        else:
+            time.sleep(self.request_delay)
+    
+    def unclaim(self, symbol, candle_start):
+        """
+        분석에 실패한 종목의 캔들 점유를 풀어 다른 인스턴스가 다시 시도할 수 있게 합니다.
+        """
+        if self.leader is not None:
+            self.leader.unclaim(symbol, candle_start)
+    
+    def store_results(self, results, scan=True):
+        """
+        분석 결과를 종목별 최신 분석 캐시에 반영합니다.
+        
+        Args:
+            results (dict): 종목별 분석 결과
+            scan (bool): 스캔 결과이면 마지막 스캔 시각도 갱신
+        """
+        now = time.time()
+        with self.cache_lock:
+            self.last_results.update(results)
+            for symbol in results:
+                self.result_times[symbol] = now
+            if scan:
+                self.last_scan_at = now
+    
+    def is_active(self):
+        """
+        이 인스턴스가 스캔/알림을 담당하는지 반환합니다. (리더 선출 미사용 시 항상 True)
+        """
+        return self.leader is None or self.leader.leader
+    
+    def watch(self, symbol):
+        """
+        감시 종목을 추가합니다. (스캔 중인 목록을 바꾸지 않도록 새 목록으로 교체)
+        
+        Returns:
+            bool: 새로 추가했으면 True
+        """
+        if symbol in self.symbols:
+            return False
+        self.symbols = self.symbols + [symbol]
+        logger.info(f"감시 종목 추가: {symbol} (총 {len(self.symbols)}개)")
+        return True
+    
+    def unwatch(self, symbol):
+        """
+        감시 종목에서 제외합니다.
+        
+        Returns:
+            bool: 제외했으면 True
+        """
+        if symbol not in self.symbols:
+            return False
+        self.symbols = [existing for existing in self.symbols if existing != symbol]
+        logger.info(f"감시 종목 제외: {symbol} (총 {len(self.symbols)}개)")
+        return True
+    
+    def record_history(self, records):
+        """
+        스캔 결과를 시그널 기록과 신호 리포트 집계에 저장합니다. (사용하지 않으면 무시)
+        
+        Args:
+            records (list): (분석 결과, 조건 결과) 목록
+        """
+        if not records:
+            return
+        if self.history is not None:
+            try:
+                self.history.append(records)
+                self.history.maybe_apply_retention()
+            except Exception as e:
+                logger.error(f"시그널 기록 저장 실패: {e}")
+        if self.reports is not None:
+            try:
+                fired, resolved = self.reports.update(records, prices=self.report_prices(records))
+                if fired or resolved:
+                    logger.info(f"신호 리포트 집계: 새 신호 {fired}건, 성과 확인 {resolved}건")
+            except Exception as e:
+                logger.error(f"신호 리포트 집계 실패: {e}")
+    
+    def report_prices(self, records):
+        """
+        성과 확인 시간이 지났지만 이번 스캔에 없는 종목의 현재가를 /ticker 한 번으로 받습니다.
+        
+        report_price_interval 초에 한 번만 조회하고, 요청 전에 요청 예산에 맞춰 대기합니다.
+        
+        Args:
+            records (list): (분석 결과, 조건 결과) 목록
+            
+        Returns:
+            dict: {종목: 현재가} (조회할 종목이 없거나 실패하면 빈 dict)
+        """
+        scanned = {analysis['symbol'] for analysis, _ in records if analysis is not None}
+        missing = [symbol for symbol in self.reports.due_symbols() if symbol not in scanned]
+        if not missing or time.time() - self.report_prices_at < self.report_price_interval:
+            return {}
+        self.report_prices_at = time.time()
+        try:
+            self.pace()
+            data = self.fetcher.get_json('ticker', f"{self.base_url}/ticker", params={'markets': ','.join(missing)})
+        except Exception as e:
+            logger.warning(f"성과 확인용 현재가 조회 실패 ({len(missing)}개 종목): {e}")
+            return {}
+        return {ticker['market']: float(ticker['trade_price']) for ticker in data}
+    
+    def record_paper_trades(self, records):
+        """
+        스캔 결과로 모의 매매를 진행합니다. (모의 매매를 사용하지 않으면 무시)
+        
+        Args:
+            records (list): (분석 결과, 조건 결과) 목록
+        """
+        if self.paper is None or not records:
+            return
+        try:
+            fills = self.paper.on_scan(records)
+            if fills:
+                logger.info(f"모의 매매 누적: {format_summary(self.paper.summary())}")
+        except Exception as e:
+            logger.error(f"모의 매매 처리 실패: {e}")
     
-    def format_alert_message(self, alerts):
+    def format_alert_message(self, alerts, skipped=None):
         """
         알림 메시지를 포맷팅합니다.
         
         Args:
             alerts (list): 조건을 만족한 종목들의 분석 결과
+            skipped (dict): 이번 스캔에서 건너뛴 종목과 사유
             
         Returns:
             str: 포맷팅된 메시지
@@ -285,40 +1065,195 @@ class UpbitTechnicalAnalyzer:
         message = "🚨 <b>업비트 기술적 분석 알림</b> 🚨\n\n"
         message += f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
         message += "💡 <b>알림 조건 (모두 만족):</b>\n"
-        message += "🔸 RSI ≤ 50 (중립~약세)\n"
-        message += "🔸 밴드폭 ≤ 0.3% (매우 좁은 횡보)\n"
-        message += "🔸 밴드 돌파 (상단 또는 하단 통과)\n\n"
+        message += f"🔸 RSI ≤ {self.rsi_threshold:g} (중립~약세)\n"
+        message += f"🔸 밴드폭 ≤ {self.band_width_threshold:g}% (매우 좁은 횡보)\n"
+        message += "🔸 밴드 돌파 (상단 또는 하단 통과)\n"
+        if self.volume_spike_ratio > 0 and self.volume_spike_mode == 'and':
+            message += f"🔸 거래량 ≥ 직전 {self.volume_window}개 캔들 중앙값의 {self.volume_spike_ratio:g}배\n"
+        elif self.volume_spike_ratio > 0:
+            message += f"🔊 또는 거래량 ≥ 직전 {self.volume_window}개 캔들 중앙값의 {self.volume_spike_ratio:g}배\n"
+        if self.orderbook_enabled and self.orderbook_imbalance > 0:
+            message += f"🔸 돌파 방향 호가 우위 ≥ {self.orderbook_imbalance * 100:g}% (상위 {self.orderbook_levels}호가)\n"
+        if self.orderbook_enabled and self.orderbook_max_spread > 0:
+            message += f"🔸 스프레드 ≤ {self.orderbook_max_spread:g}%\n"
+        message += "\n"
+        
+        if self.market_stats is not None and any(alert.get('market') for alert in alerts):
+            breadth = self.market_stats.breadth
+            message += (f"🌐 <b>시장 ({breadth['markets']}개):</b> 상단 돌파 {breadth['above_upper']:.0f}% · "
+                        f"하단 이탈 {breadth['below_lower']:.0f}% · 수축 {breadth['squeeze']:.0f}% · "
+                        f"상승 {breadth['advancing']:.0f}% · 평균 상관 {breadth['mean_correlation']:.2f}\n\n")
         
         for alert in alerts:
             symbol_name = alert['symbol'].replace('KRW-', '')
-            message += f"📈 <b>{symbol_name}</b>\n"
+            if alert.get('timeframe'):
+                message += f"📈 <b>{symbol_name}</b> [{alert['timeframe']}]\n"
+            else:
+                message += f"📈 <b>{symbol_name}</b>\n"
             message += f"💰 현재가: {alert['current_price']:,.0f}원\n"
             message += f"📊 RSI: {alert['rsi']:.2f}\n"
             message += f"📏 밴드폭: {alert['band_width']:.2f}%\n"
             message += f"🔸 상단밴드: {alert['upper_band']:,.0f}원\n"
             message += f"🔹 하단밴드: {alert['lower_band']:,.0f}원\n"
+            if not pd.isna(alert.get('volume_ratio', float('nan'))):
+                message += f"🔊 거래량: 중앙값의 {alert['volume_ratio']:.1f}배 (z {alert['volume_zscore']:.1f})\n"
+            if alert.get('market'):
+                market = alert['market']
+                if market['idiosyncratic']:
+                    message += f"🧭 개별 움직임 (잔차 z {market['residual_z']:.1f}, R² {market['r_squared']:.2f})\n"
+                elif market['market_driven']:
+                    message += f"🧭 시장 동조 (R² {market['r_squared']:.2f}, β {market['beta']:.2f})\n"
+                else:
+                    message += f"🧭 시장 연관 낮음 (R² {market['r_squared']:.2f})\n"
+            if alert.get('orderbook'):
+                orderbook = alert['orderbook']
+                side = "매수" if orderbook['imbalance'] >= 0 else "매도"
+                message += (f"📚 호가: {side} 우위 {abs(orderbook['imbalance']) * 100:.0f}% "
+                            f"(상위 {orderbook['levels']}호가), 스프레드 {orderbook['spread']:.3f}%\n")
     
             # 조건 만족 여부 표시
             # 돌파 유형 확인
             upper_breakout = alert['current_price'] > alert['upper_band']
             lower_breakout = alert['current_price'] < alert['lower_band']
 
+            conditions = self.evaluate_conditions(alert)
+            if not (conditions['rsi'] and conditions['band_width'] and (upper_breakout or lower_breakout)):
+                # 거래량 급증만으로 알림 (VOLUME_SPIKE_MODE=alone)
+                message += f"✅ <b>만족 조건:</b> 🔊 거래량 급증 ({alert['volume_ratio']:.1f}배)\n\n"
+                continue
+
             message += "✅ <b>만족 조건:</b> "
-            message += f"RSI {alert['rsi']:.1f}≤50, 밴드폭 {alert['band_width']:.3f}%≤0.3%, "
+            message += f"RSI {alert['rsi']:.1f}≤{self.rsi_threshold:g}, 밴드폭 {alert['band_width']:.3f}%≤{self.band_width_threshold:g}%, "
+            if conditions['volume_spike']:
+                message += f"거래량 {alert['volume_ratio']:.1f}배, "
+            if alert.get('orderbook') and self.orderbook_imbalance > 0:
+                message += f"호가 우위 {abs(alert['orderbook']['imbalance']) * 100:.0f}%, "
 
             if upper_breakout:
                 message += "🚀 상단 돌파 (강세 신호)\n\n"
             elif lower_breakout:
                 message += "📉 하단 돌파 (약세 신호)\n\n"
         
+        if skipped:
+            message += f"⏭️ <b>건너뛴 종목 ({len(skipped)}개):</b>\n"
+            for symbol, reason in skipped.items():
+                message += f"• {symbol.replace('KRW-', '')}: {reason}\n"
+            message += "\n"
+        
         message += "⚠️ <i>투자 결정은 신중하게 하시기 바랍니다.</i>"
         
         return message
     
+    def schedule_digest(self):
+        """
+        DIGEST_INTERVAL_MINUTES 가 설정되어 있으면 상위 종목 요약을 주기적으로 보내도록 등록합니다.
+        """
+        if self.digest_interval_minutes <= 0:
+            return
+        screener = MarketScreener(
+            self,
+            k=int(os.getenv('SCREENER_TOP_K', '10')),
+            weights=parse_weights(os.getenv('SCREENER_WEIGHTS', '0.4,0.4,0.2')),
+            all_markets=os.getenv('SCREENER_ALL_MARKETS', '0') == '1',
+            max_age=self.digest_interval_minutes * 60
+        )
+        schedule.every(self.digest_interval_minutes).minutes.do(lambda: self.is_active() and screener.run())
+        logger.info(f"종목 스크리너 사용 - {self.digest_interval_minutes}분마다 상위 {screener.k}개 종목 요약을 보냅니다.")
+    
+    def send_report(self, period):
+        """
+        누적 집계로 만든 일간(daily) 또는 주간(weekly) 신호 리포트를 전송합니다.
+        """
+        if self.reports is None or not self.is_active():
+            return
+        try:
+            started = time.perf_counter()
+            message = self.reports.daily_report() if period == 'daily' else self.reports.weekly_report()
+            logger.info(f"신호 리포트 생성 ({period}, {(time.perf_counter() - started) * 1000:.1f}ms)")
+            self.send_telegram_message(message)
+        except Exception as e:
+            logger.error(f"신호 리포트 생성 실패: {e}")
+    
+    def schedule_reports(self):
+        """
+        REPORT_DB_PATH 가 설정되어 있으면 매일 REPORT_TIME 에 전날 리포트를,
+        매주 REPORT_WEEKLY_DAY 같은 시각에 지난 7일 리포트를 보내도록 등록합니다.
+        """
+        if self.reports is None:
+            return
+        report_time = os.getenv('REPORT_TIME', '09:00')
+        weekly_day = os.getenv('REPORT_WEEKLY_DAY', 'monday').lower()
+        if weekly_day and weekly_day not in ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'):
+            raise ValueError(f"REPORT_WEEKLY_DAY 는 요일 이름(monday ~ sunday) 이어야 합니다: {weekly_day}")
+        schedule.every().day.at(report_time).do(self.send_report, 'daily')
+        if weekly_day:
+            getattr(schedule.every(), weekly_day).at(report_time).do(self.send_report, 'weekly')
+        logger.info(f"신호 리포트 사용 - 매일 {report_time} 일간 리포트"
+                    + (f", 매주 {weekly_day} 주간 리포트" if weekly_day else ""))
+    
+    def report_rate_plan(self):
+        """
+        현재 설정의 요청 계획을 만들어 요청 예산(RATE_BUDGET) 안에 들어오는지 시작 시 알립니다.
+
+        캔들 마감 직후의 스캔 요청은 긴급, 빠른 체크/마켓 목록 조회는 일반 작업으로 봅니다.
+
+        Returns:
+            FetchPlan: 계획 결과
+        """
+        all_markets = os.getenv('SCREENER_ALL_MARKETS', '0') == '1'
+        tasks = build_tasks(
+            self.symbols,
+            self.timeframes[:1] or ['60m'],
+            metadata_period=self.digest_interval_minutes * 60 if all_markets else 0
+        )
+        if self.scheduler_mode != 'adaptive' and not self.timeframes:
+            # 고정 스케줄은 정시와 30분마다 전체를 다시 스캔
+            tasks[0] = tasks[0]._replace(period=1800)
+        if self.fast_check_seconds > 0:
+            tasks.append(FetchTask('ticker', self.fast_check_seconds, [None], PRIORITY_NORMAL))
+
+        plan = RateBudgetPlanner(
+            rate=self.rate_budget or DEFAULT_RATE,
+            critical_window=float(os.getenv('RATE_PLAN_CRITICAL_SECONDS', '60'))
+        ).plan(tasks)
+        if plan.feasible:
+            logger.info(plan.summary())
+        else:
+            logger.warning(plan.summary())
+        return plan
+    
     def run_scheduler(self):
         """
         스케줄러를 실행합니다.
         """
+        if self.leader is not None:
+            self.leader.is_leader()
+            self.leader.start_heartbeat()
+        
+        self.schedule_digest()
+        self.schedule_reports()
+        self.report_rate_plan()
+        
+        # 텔레그램 명령은 별도 스레드에서 캐시로 응답 (스캔을 막지 않음)
+        if os.getenv('TELEGRAM_COMMANDS', '0') == '1':
+            TelegramCommandBot(
+                self,
+                stale_seconds=float(os.getenv('BOT_STALE_SECONDS', '300'))
+            ).start()
+        
+        # 체결 틱으로 초 단위 봉을 만들어 같은 지표/조건으로 분석 (TICK_BARS 설정 시)
+        tick_runner = tick_runner_from_env(self)
+        if tick_runner is not None:
+            tick_runner.start()
+        
+        if self.scheduler_mode == 'adaptive':
+            self.run_adaptive_scheduler()
+            return
+        
+        if self.timeframes:
+            self.run_multi_timeframe_scheduler()
+            return
+        
         # 매시간 정시에 체크
         schedule.every().hour.at(":00").do(self.check_conditions)
         
@@ -327,13 +1262,57 @@ class UpbitTechnicalAnalyzer:
         
         logger.info("스케줄러 시작 - 매시간 정시와 30분마다 기술적 분석을 수행합니다.")
         
+        # 캔들 사이에는 캐시된 밴드와 현재가만 비교하는 빠른 체크
+        poll_seconds = 60
+        if self.fast_check_seconds > 0:
+            fast_checker = FastBreakoutChecker(self)
+            schedule.every(self.fast_check_seconds).seconds.do(fast_checker.check)
+            poll_seconds = min(poll_seconds, self.fast_check_seconds)
+            logger.info(f"빠른 돌파 체크 사용 - {self.fast_check_seconds}초마다 현재가를 확인합니다.")
+        
         # 프로그램 시작 시 한 번 체크
         self.check_conditions()
         
         while True:
             try:
                 schedule.run_pending()
-                time.sleep(60)  # 1분마다 스케줄 체크
+                time.sleep(poll_seconds)  # 스케줄 체크 주기
+            except KeyboardInterrupt:
+                logger.info("프로그램이 사용자에 의해 중단되었습니다.")
+                break
+            except Exception as e:
+                logger.error(f"스케줄러 실행 중 오류: {e}")
+                time.sleep(60)  # 오류 발생 시 1분 대기 후 재시도
+
+    
+    def run_adaptive_scheduler(self):
+        """
+        종목별로 알림 조건과의 거리에 따라 조회 주기를 조절하며 실행합니다.
+        조건에 가까운 종목은 1분마다, 먼 종목은 1시간마다 조회합니다.
+        """
+        scheduler = AdaptivePollScheduler(
+            self.symbols,
+            min_interval=float(os.getenv('ADAPTIVE_MIN_INTERVAL_SECONDS', '60')),
+            max_interval=float(os.getenv('ADAPTIVE_MAX_INTERVAL_SECONDS', '3600')),
+            rsi_threshold=self.rsi_threshold,
+            band_width_threshold=self.band_width_threshold
+        )
+        
+        logger.info("적응형 스케줄러 시작 - 조건과의 거리에 따라 종목별 조회 주기를 조절합니다.")
+        
+        while True:
+            try:
+                scheduler.sync(self.symbols)
+                due = scheduler.pop_due()
+                if due:
+                    results = self.check_conditions(due, once_per_candle=True)
+                    for symbol in due:
+                        interval = scheduler.update(symbol, results.get(symbol))
+                        logger.debug(f"다음 조회: {symbol} - {interval / 60:.1f}분 후")
+                    logger.info(f"예상 API 호출: 시간당 {scheduler.calls_per_hour():.0f}회 (고정 주기 대비 {len(self.symbols) * 2}회)")
+                
+                schedule.run_pending()
+                time.sleep(min(max(scheduler.seconds_until_next(), 1), 60))
             except KeyboardInterrupt:
                 logger.info("프로그램이 사용자에 의해 중단되었습니다.")
                 break
@@ -341,16 +1320,51 @@ class UpbitTechnicalAnalyzer:
                 logger.error(f"스케줄러 실행 중 오류: {e}")
                 time.sleep(60)  # 오류 발생 시 1분 대기 후 재시도
 
+    
+    def run_multi_timeframe_scheduler(self):
+        """
+        가장 짧은 타임프레임 캔들만 받아 모든 타임프레임을 한 번에 분석하며 실행합니다.
+        가장 짧은 타임프레임 주기마다 스캔합니다.
+        """
+        scanner = MultiTimeframeScanner(
+            self,
+            self.timeframes,
+            max_history_pages=int(os.getenv('TIMEFRAME_MAX_HISTORY_PAGES', '80'))
+        )
+        schedule.every(max(scanner.base_minutes, 1)).minutes.do(scanner.scan)
+        
+        logger.info(f"멀티 타임프레임 스케줄러 시작 - {scanner.base_minutes}분마다 {', '.join(scanner.timeframes)} 을(를) 분석합니다.")
+        
+        # 프로그램 시작 시 한 번 체크
+        scanner.scan()
+        
+        while True:
+            try:
+                schedule.run_pending()
+                time.sleep(min(60, scanner.base_minutes * 60))
+            except KeyboardInterrupt:
+                logger.info("프로그램이 사용자에 의해 중단되었습니다.")
+                break
+            except Exception as e:
+                logger.error(f"스케줄러 실행 중 오류: {e}")
+                time.sleep(60)  # 오류 발생 시 1분 대기 후 재시도
 
 def main():
     """
     메인 함수 - 프로그램 설정 및 실행
     """
+    # 로깅 설정 (큐 기반 비동기 기록, JSON lines 파일은 크기/시간 기준 교체 후 압축)
+    setup_logging()
+    
     try:
         # 분석기 초기화 및 실행
         analyzer = UpbitTechnicalAnalyzer()
         analyzer.run_scheduler()
         
+        # 정상 종료 시 리더 임대를 반납해 대기 인스턴스가 바로 이어받도록 함
+        if analyzer.leader is not None:
+            analyzer.leader.release()
+        
     except KeyboardInterrupt:
         logger.info("프로그램이 사용자에 의해 중단되었습니다.")
     except ValueError as e:
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from upbit_candles import candles_to_frame, to_analysis_frame, candle_epoch
+
+# 정렬 배열의 필드 순서
+FIELDS = ('open', 'high', 'low', 'close', 'volume', 'value')
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+
+class AlignedCandles:
+    def __init__(self, symbols, timestamps, data, mask):
+        """
+        여러 종목의 캔들을 같은 시간 축에 맞춘 연속 배열
+
+        Args:
+            symbols (list): 종목 목록 (행 순서)
+            timestamps (np.ndarray): 캔들 시작 UTC epoch 초, shape (시간,)
+            data (np.ndarray): shape (필드, 종목, 시간) 의 C 연속 float64 배열
+            mask (np.ndarray): shape (종목, 시간), 실제 거래가 있던 캔들이면 True
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.timestamps = timestamps
+        self.data = data
+        self.mask = mask
+
+    def field(self, name):
+        """
+        (종목, 시간) 행렬 하나를 복사 없이 반환합니다.
+        """
+        return self.data[FIELD_INDEX[name]]
+
+    @property
+    def close(self):
+        return self.field('close')
+
+    @property
+    def volume(self):
+        return self.field('volume')
+
+    def frame(self, symbol):
+        """
+        한 종목을 candles_to_frame 형식의 데이터프레임으로 꺼냅니다. (첫 캔들 이전 구간 제외)
+        """
+        i = self.index[symbol]
+        valid = ~np.isnan(self.data[FIELD_INDEX['close'], i])
+        frame = pd.DataFrame({'timestamp': self.timestamps[valid]})
+        for name in FIELDS:
+            frame[name] = self.data[FIELD_INDEX[name], i, valid]
+        return frame
+
+
+def align_candles(frames, unit_seconds, end=None, length=None):
+    """
+    종목별 캔들을 공통 시간 축에 맞춰 하나의 배열로 만들고 빈 캔들을 채웁니다.
+
+    업비트는 거래가 없던 구간의 캔들을 보내지 않습니다. 빈 캔들은 직전 종가로
+    시가/고가/저가/종가를 채우고 거래량/거래대금은 0 으로 둡니다. 종목의 첫
+    캔들 이전 구간은 NaN 입니다. 종목별 reindex 대신 모든 종목을 한 번에
+    흩뿌린(scatter) 뒤 누적 최대값 인덱스로 앞 값을 채웁니다.
+
+    Args:
+        frames (dict): {종목: candles_to_frame 형식 데이터프레임}
+        unit_seconds (int): 캔들 길이(초)
+        end (int): 마지막 캔들 시작 시각 (기본값: 모든 종목 중 가장 최근 캔들)
+        length (int): 시간 축 길이 (기본값: 가장 이른 캔들부터 end 까지)
+
+    Returns:
+        AlignedCandles: 정렬된 캔들
+    """
+    symbols = list(frames)
+    non_empty = [frame for frame in frames.values() if frame is not None and not frame.empty]
+    if end is None:
+        end = max(int(frame['timestamp'].values[-1]) for frame in non_empty) if non_empty else 0
+    end = end - end % unit_seconds
+    if length is None:
+        start = min(int(frame['timestamp'].values[0]) for frame in non_empty) if non_empty else end
+        length = (end - start) // unit_seconds + 1
+    start = end - (length - 1) * unit_seconds
+    timestamps = start + np.arange(length, dtype=np.int64) * unit_seconds
+
+    data = np.full((len(FIELDS), len(symbols), length), np.nan)
+    mask = np.zeros((len(symbols), length), dtype=bool)
+
+    # 모든 종목의 캔들을 한 번에 격자 위치로 흩뿌림
+    rows, columns, values = [], [], []
+    for row, symbol in enumerate(symbols):
+        frame = frames[symbol]
+        if frame is None or frame.empty:
+            continue
+        rows.append(np.full(len(frame), row))
+        columns.append((frame['timestamp'].values.astype(np.int64) - start) // unit_seconds)
+        values.append(frame[list(FIELDS)].values.astype(np.float64))
+    if rows:
+        rows = np.concatenate(rows)
+        columns = np.concatenate(columns)
+        values = np.concatenate(values)
+        inside = (columns >= 0) & (columns < length)
+        rows, columns, values = rows[inside], columns[inside], values[inside]
+        data[:, rows, columns] = values.T
+        mask[rows, columns] = True
+
+    # 각 칸의 마지막 실제 캔들 위치 (없으면 -1)
+    positions = np.where(mask, np.arange(length), -1)
+    last = np.maximum.accumulate(positions, axis=1)
+    filled = ~mask & (last >= 0)
+    if filled.any():
+        fill_rows, fill_columns = np.nonzero(filled)
+        previous_close = data[FIELD_INDEX['close'], fill_rows, last[fill_rows, fill_columns]]
+        for name in ('open', 'high', 'low', 'close'):
+            data[FIELD_INDEX[name], fill_rows, fill_columns] = previous_close
+        for name in ('volume', 'value'):
+            data[FIELD_INDEX[name], fill_rows, fill_columns] = 0.0
+
+    return AlignedCandles(symbols, timestamps, np.ascontiguousarray(data), mask)
+
+
+def infer_unit_seconds(timestamps):
+    """
+    캔들 시각 간격의 최솟값으로 캔들 길이(초)를 추정합니다.
+    """
+    gaps = np.diff(np.asarray(timestamps, dtype=np.int64))
+    gaps = gaps[gaps > 0]
+    return int(gaps.min()) if len(gaps) else 60
+
+
+def fill_candle_gaps(df, unit_seconds=None):
+    """
+    업비트 응답 형식의 한 종목 캔들에서 빠진 캔들을 채웁니다.
+
+    Args:
+        df (pd.DataFrame): 업비트 캔들 응답 (candle_date_time_utc 포함)
+        unit_seconds (int): 캔들 길이(초) (기본값: 시각 간격으로 추정)
+
+    Returns:
+        pd.DataFrame: 빈 캔들이 채워진 업비트 응답 형식 데이터
+    """
+    if len(df) < 2:
+        return df
+    # 간격이 모두 캔들 길이와 같으면 빈 캔들이 없으므로 변환 없이 그대로 사용
+    gaps = np.diff(candle_epoch(df['candle_date_time_utc']))
+    if (gaps == (unit_seconds or gaps.min())).all() and gaps[0] > 0:
+        return df
+    frame = candles_to_frame(df, float_dtype=np.float64)
+    if len(frame) < 2:
+        return df
+    unit_seconds = unit_seconds or infer_unit_seconds(frame['timestamp'].values)
+    aligned = align_candles({'_': frame}, unit_seconds)
+    if aligned.mask.all():
+        return df
+    return to_analysis_frame(aligned.frame('_'))
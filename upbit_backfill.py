@@ -0,0 +1,389 @@
+import os
+import json
+import time
+import argparse
+import importlib.util
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import requests
+
+from upbit_candles import CANDLE_DTYPES, candle_endpoint, candles_to_frame, format_to, unit_seconds
+from upbit_resilience import TokenBucket
+from upbit_prefix_index import PrefixIndexStore
+
+logger = logging.getLogger(__name__)
+
+# pyarrow 가 있으면 Parquet, 없으면 NumPy .npz 로 저장
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+def month_key(timestamp):
+    """
+    epoch 초를 파티션 월 키(YYYY-MM, UTC)로 변환합니다.
+    """
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime('%Y-%m')
+
+
+class CandleStore:
+    def __init__(self, root):
+        """
+        시장/단위/월로 파티션된 컬럼형 캔들 저장소
+
+        경로: {root}/market={market}/unit={unit}/month={YYYY-MM}/candles.parquet
+        (pyarrow 가 없으면 candles.npz)
+
+        Args:
+            root (str): 저장소 최상위 디렉토리
+        """
+        self.root = root
+
+    def partition_dir(self, market, unit, month):
+        return os.path.join(self.root, f"market={market}", f"unit={unit}", f"month={month}")
+
+    def _partition_file(self, market, unit, month):
+        directory = self.partition_dir(market, unit, month)
+        for name in ('candles.parquet', 'candles.npz'):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def read_partition(self, market, unit, month):
+        """
+        한 파티션을 읽습니다. 없으면 None
+        """
+        path = self._partition_file(market, unit, month)
+        if path is None:
+            return None
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        with np.load(path) as data:
+            return pd.DataFrame({name: data[name] for name in CANDLE_DTYPES})
+
+    def write_partition(self, market, unit, month, frame):
+        """
+        한 파티션을 기존 데이터와 병합해 저장합니다. (같은 시각은 새 데이터 우선)
+        """
+        existing = self.read_partition(market, unit, month)
+        if existing is not None:
+            frame = pd.concat([existing, frame], ignore_index=True)
+        frame = (frame.drop_duplicates('timestamp', keep='last')
+                      .sort_values('timestamp')
+                      .reset_index(drop=True)
+                      .astype(CANDLE_DTYPES))
+
+        directory = self.partition_dir(market, unit, month)
+        os.makedirs(directory, exist_ok=True)
+        if PARQUET_AVAILABLE:
+            path = os.path.join(directory, 'candles.parquet')
+            tmp_path = path + '.tmp'
+            frame.to_parquet(tmp_path, engine='pyarrow', index=False)
+        else:
+            path = os.path.join(directory, 'candles.npz')
+            tmp_path = path + '.tmp.npz'
+            np.savez(tmp_path, **{name: frame[name].values for name in CANDLE_DTYPES})
+        # 쓰는 도중 중단되어도 기존 파티션이 깨지지 않도록 교체
+        os.replace(tmp_path, path)
+
+    def write(self, market, unit, frame):
+        """
+        캔들 데이터를 월별 파티션으로 나눠 저장합니다.
+        """
+        if frame.empty:
+            return
+        months = np.array([month_key(ts) for ts in frame['timestamp'].values])
+        for month in np.unique(months):
+            self.write_partition(market, unit, month, frame[months == month])
+
+    def read(self, market, unit, start=None, end=None):
+        """
+        기간에 해당하는 파티션만 읽어 캔들 데이터를 반환합니다.
+
+        Args:
+            market (str): 마켓 코드
+            unit (str|int): 캔들 단위
+            start (int): 시작 epoch 초 (포함, 기본값: 처음부터)
+            end (int): 끝 epoch 초 (포함, 기본값: 끝까지)
+
+        Returns:
+            pd.DataFrame: timestamp 오름차순 캔들 데이터
+        """
+        months = self.months(market, unit)
+        if start is not None or end is not None:
+            first = month_key(start) if start is not None else ''
+            last = month_key(end) if end is not None else '9999-99'
+            months = [month for month in months if first <= month <= last]
+
+        frames = [self.read_partition(market, unit, month) for month in months]
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in CANDLE_DTYPES.items()})
+
+        frame = pd.concat(frames, ignore_index=True)
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= frame['timestamp'].values >= start
+        if end is not None:
+            mask &= frame['timestamp'].values <= end
+        return frame[mask].reset_index(drop=True)
+
+    def months(self, market, unit):
+        """
+        저장된 월 파티션 목록을 반환합니다.
+        """
+        directory = os.path.join(self.root, f"market={market}", f"unit={unit}")
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(directory) if name.startswith('month='))
+
+
+class CandleBackfiller:
+    def __init__(self, store, unit=60, base_url="https://api.upbit.com/v1", rate=8,
+                 workers=4, flush_pages=50, max_retries=5, index=None):
+        """
+        /candles/* 를 과거 방향으로 페이지 조회해 저장소에 채우는 백필러
+
+        시장별 진행 상황(가장 오래된 캔들 시각)을 체크포인트 파일에 남기므로
+        중단 후 다시 실행하면 이어서 진행합니다.
+
+        Args:
+            store (CandleStore): 저장소
+            unit (str|int): 캔들 단위 (분 또는 'days')
+            base_url (str): 업비트 API 주소
+            rate (float): 모든 작업자가 공유하는 초당 요청 수
+            workers (int): 동시에 백필할 시장 수
+            flush_pages (int): 파티션에 기록하고 체크포인트를 남기는 페이지 간격
+            max_retries (int): 요청 실패 시 재시도 횟수
+            index (PrefixIndexStore): 시장별 백필이 끝나면 갱신할 누적합 인덱스 (None 이면 사용 안 함)
+        """
+        self.store = store
+        self.unit = str(unit)
+        self.endpoint = candle_endpoint(unit)
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate)
+        self.workers = workers
+        self.flush_pages = flush_pages
+        self.max_retries = max_retries
+        self.checkpoint_dir = os.path.join(store.root, '_checkpoints')
+        self.index = index
+
+    def _checkpoint_path(self, market):
+        return os.path.join(self.checkpoint_dir, f"{market}_{self.unit}.json")
+
+    def load_checkpoint(self, market):
+        path = self._checkpoint_path(market)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, market, cursor, done, top=None):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = self._checkpoint_path(market)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'market': market, 'unit': self.unit, 'cursor': cursor, 'top': top, 'done': done}, f)
+        os.replace(path + '.tmp', path)
+
+    def stored_top(self, market):
+        """
+        저장소에 있는 가장 최근 캔들 시각 (없으면 None). top 이 없는 이전 체크포인트용
+        """
+        months = self.store.months(market, self.unit)
+        frame = self.store.read_partition(market, self.unit, months[-1]) if months else None
+        if frame is None or frame.empty:
+            return None
+        return int(frame['timestamp'].max())
+
+    def fetch_page(self, market, to=None, count=200):
+        """
+        to 시각(UTC epoch 초, 미포함) 이전의 캔들을 최대 count 개 조회합니다.
+        """
+        params = {'market': market, 'count': count}
+        if to is not None:
+            params['to'] = format_to(to)
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = requests.get(f"{self.base_url}/{self.endpoint}", params=params, timeout=10)
+                if response.status_code == 429:
+                    raise requests.exceptions.HTTPError("요청 수 제한 초과 (429)", response=response)
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                backoff = min(2 ** attempt * 0.5, 10)
+                logger.warning(f"캔들 조회 재시도 ({market}, {attempt + 1}/{self.max_retries}): {e}")
+                time.sleep(backoff)
+
+    def fetch_range(self, market, cursor, stop, progress=None):
+        """
+        cursor 시각(미포함)부터 과거 방향으로 stop 시각까지 페이지 조회해 저장합니다.
+
+        Args:
+            market (str): 마켓 코드
+            cursor (int): 조회를 시작할 epoch 초 (None 이면 현재)
+            stop (int): 이 시각 이후의 캔들만 저장
+            progress (callable): flush 마다 (cursor, 완료 여부, 가장 최근 캔들 시각) 로 호출
+
+        Returns:
+            tuple: (받은 캔들 수, 가장 최근 캔들 시각, 가장 오래된 저장 캔들 시각, 마지막 cursor, 완료 여부)
+        """
+        buffered = []
+        received = 0
+        newest = None
+        written_start = None
+        done = False
+        while not done:
+            page = candles_to_frame(self.fetch_page(market, to=cursor))
+            if page.empty:
+                done = True
+            else:
+                buffered.append(page)
+                received += len(page)
+                if newest is None:
+                    newest = int(page['timestamp'].iloc[-1])
+                cursor = int(page['timestamp'].iloc[0])
+                done = cursor <= stop
+
+            if done or len(buffered) >= self.flush_pages:
+                # 데이터를 먼저 기록한 뒤 체크포인트 갱신 (중단되어도 중복만 발생)
+                if buffered:
+                    frame = pd.concat(buffered, ignore_index=True)
+                    frame = frame[frame['timestamp'] >= stop]
+                    self.store.write(market, self.unit, frame)
+                    if not frame.empty:
+                        written_start = int(frame['timestamp'].min())
+                    buffered = []
+                if progress is not None:
+                    progress(cursor, done, newest)
+        return received, newest, written_start, cursor, done
+
+    def backfill_market(self, market, since, until=None):
+        """
+        한 시장의 캔들을 since 시각까지 과거 방향으로 채웁니다.
+
+        체크포인트는 받은 구간 [cursor, top] 을 기록합니다. 이미 받은 구간보다 새로운
+        캔들을 요청하면(until 이 더 늦거나 현재까지 채우는 실행) top 이후를 먼저 받고,
+        since 가 cursor 보다 이르면 cursor 부터 이어서 과거 방향으로 받습니다.
+
+        Args:
+            market (str): 마켓 코드
+            since (int): 목표 시작 epoch 초
+            until (int): 조회를 시작할 epoch 초 (기본값: 현재)
+
+        Returns:
+            int: 새로 받은 캔들 수
+        """
+        checkpoint = self.load_checkpoint(market)
+        received = 0
+        written_start = None
+        cursor = until
+        top = None
+        if checkpoint is not None:
+            cursor = checkpoint['cursor']
+            top = checkpoint.get('top')
+            if top is None:
+                top = self.stored_top(market)
+
+            # 받은 구간 이후의 새 캔들 (top 캔들은 진행 중이었을 수 있으므로 다시 받음)
+            end = until if until is not None else time.time()
+            if top is not None and end > top + unit_seconds(self.unit):
+                count, newest, start, _, _ = self.fetch_range(market, until, max(top, since))
+                received += count
+                written_start = start
+                top = max(top, newest) if newest is not None else top
+                self.save_checkpoint(market, cursor, checkpoint['done'], top)
+                logger.info(f"새 캔들 추가 ({market}): {count}개")
+
+            if checkpoint['done'] and cursor is not None and cursor <= since:
+                logger.info(f"이미 완료된 구간입니다 ({market})")
+                if self.index is not None and written_start is not None:
+                    self.index.update(market, self.unit, written_start)
+                return received
+            logger.info(f"체크포인트에서 이어서 진행 ({market}): {cursor}")
+
+        def progress(cursor, done, newest):
+            nonlocal top
+            if top is None:
+                top = newest
+            self.save_checkpoint(market, cursor, done, top)
+
+        count, _, start, _, _ = self.fetch_range(market, cursor, since, progress)
+        received += count
+        if start is not None:
+            written_start = start if written_start is None else min(written_start, start)
+
+        logger.info(f"백필 완료 ({market}): {received}개 캔들")
+        if self.index is not None and written_start is not None:
+            self.index.update(market, self.unit, written_start)
+        return received
+
+    def run(self, markets, since, until=None):
+        """
+        여러 시장을 병렬로 백필합니다.
+
+        Returns:
+            dict: 시장별 새로 받은 캔들 수 (실패한 시장은 None)
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.backfill_market, market, since, until): market for market in markets}
+            for future in as_completed(futures):
+                market = futures[future]
+                try:
+                    results[market] = future.result()
+                except Exception as e:
+                    logger.error(f"백필 실패 ({market}): {e} - 다시 실행하면 체크포인트부터 이어집니다.")
+                    results[market] = None
+        return results
+
+
+def parse_time(value):
+    """
+    YYYY-MM-DD 또는 YYYY-MM-DDTHH:MM:SS (UTC) 문자열을 epoch 초로 변환합니다.
+    """
+    return int(pd.Timestamp(value, tz='UTC').timestamp())
+
+
+def main():
+    """
+    메인 함수 - 과거 캔들 백필 실행
+    """
+    # 로깅 설정
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="업비트 과거 캔들 백필")
+    parser.add_argument('--markets', required=True, help="쉼표로 구분한 마켓 코드 (예: KRW-BTC,KRW-ETH)")
+    parser.add_argument('--unit', default='60', help="캔들 단위: 1, 3, 5, 10, 15, 30, 60, 240 또는 days")
+    parser.add_argument('--since', required=True, help="시작 시각 (UTC, 예: 2024-01-01)")
+    parser.add_argument('--until', help="끝 시각 (UTC, 기본값: 현재)")
+    parser.add_argument('--out', default='data/candles', help="저장 디렉토리")
+    parser.add_argument('--rate', type=float, default=8, help="초당 요청 수")
+    parser.add_argument('--workers', type=int, default=4, help="동시에 백필할 시장 수")
+    parser.add_argument('--base-url', default=os.getenv('UPBIT_API_URL', "https://api.upbit.com/v1"))
+    parser.add_argument('--no-index', action='store_true', help="누적합 인덱스(prefix.bin)를 갱신하지 않음")
+    args = parser.parse_args()
+
+    markets = [market.strip() for market in args.markets.split(',') if market.strip()]
+    store = CandleStore(args.out)
+    backfiller = CandleBackfiller(store, unit=args.unit, base_url=args.base_url,
+                                  rate=args.rate, workers=args.workers,
+                                  index=None if args.no_index else PrefixIndexStore(store))
+    if not PARQUET_AVAILABLE:
+        logger.warning("pyarrow 가 설치되어 있지 않아 .npz 형식으로 저장합니다.")
+
+    until = parse_time(args.until) if args.until else None
+    results = backfiller.run(markets, parse_time(args.since), until)
+    failed = [market for market, count in results.items() if count is None]
+    if failed:
+        logger.error(f"실패한 시장: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
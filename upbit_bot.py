@@ -0,0 +1,305 @@
+import re
+import html
+import math
+import time
+import threading
+import logging
+from datetime import datetime
+
+import requests
+
+from upbit_screener import MarketScreener
+
+logger = logging.getLogger(__name__)
+
+HELP_TEXT = (
+    "🤖 <b>사용 가능한 명령</b>\n"
+    "/status - 감시 현황\n"
+    "/scan &lt;종목&gt; - 종목 지표 (예: /scan BTC)\n"
+    "/chart &lt;종목&gt; - 가격/밴드/RSI 미니 차트\n"
+    "/top - 알림 조건에 가까운 종목\n"
+    "/watch &lt;종목&gt; - 감시 종목 추가\n"
+    "/unwatch &lt;종목&gt; - 감시 종목 제외\n"
+    "/paper - 모의 매매 성과\n"
+    "/help - 도움말"
+)
+
+
+def normalize_symbol(text):
+    """
+    "btc", "KRW-BTC" 형태의 입력을 마켓 코드로 변환합니다. (형식이 맞지 않으면 None)
+    """
+    text = text.strip().upper()
+    if not text:
+        return None
+    if '-' not in text:
+        text = f"KRW-{text}"
+    return text if re.fullmatch(r'[A-Z]{3,4}-[A-Z0-9]{1,15}', text) else None
+
+
+class TelegramCommandBot:
+    def __init__(self, analyzer, stale_seconds=300, poll_timeout=30, top_k=5):
+        """
+        getUpdates 롱 폴링으로 텔레그램 명령에 답하는 봇
+
+        스케줄러와 별도 스레드에서 동작하며, 답은 분석기의 최신 분석 캐시에서
+        만듭니다. 캐시가 stale_seconds 보다 오래된 종목만 캔들을 새로 받습니다.
+        설정된 채팅(TELEGRAM_CHAT_ID)에서 온 명령에만 답합니다.
+
+        Args:
+            analyzer: 분석 캐시(last_results/result_times)와 lookup_symbol/is_listed 를 제공하는 분석기
+            stale_seconds (float): 캐시를 그대로 쓰는 최대 경과 시간(초)
+            poll_timeout (int): getUpdates 롱 폴링 대기 시간(초)
+            top_k (int): /top 에 보여줄 종목 수
+        """
+        self.analyzer = analyzer
+        self.stale_seconds = stale_seconds
+        self.poll_timeout = poll_timeout
+        self.screener = MarketScreener(analyzer, k=top_k)
+        self.offset = None
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+        self.commands = {
+            '/status': self.command_status,
+            '/scan': self.command_scan,
+            '/chart': self.command_chart,
+            '/top': self.command_top,
+            '/watch': self.command_watch,
+            '/unwatch': self.command_unwatch,
+            '/paper': self.command_paper,
+            '/help': self.command_help,
+            '/start': self.command_help,
+        }
+
+    @property
+    def api_url(self):
+        return f"{self.analyzer.telegram_api_url}/bot{self.analyzer.telegram_bot_token}"
+
+    def start(self):
+        """
+        폴링 스레드를 시작합니다.
+        """
+        self._thread = threading.Thread(target=self.run, name='telegram-commands', daemon=True)
+        self._thread.start()
+        logger.info("텔레그램 명령 수신 시작")
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """
+        중지될 때까지 명령을 받아 처리합니다.
+        """
+        while not self._stop.is_set():
+            # 대기 인스턴스는 명령을 가져가지 않음 (가져가면 리더가 받지 못함)
+            if hasattr(self.analyzer, 'is_active') and not self.analyzer.is_active():
+                self._stop.wait(5)
+                continue
+            try:
+                started = time.time()
+                handled = self.poll_once()
+                # 롱 폴링이 바로 빈 응답을 주는 경우(대역 서버 등) 과도한 요청 방지
+                if not handled and time.time() - started < 1:
+                    self._stop.wait(1)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"텔레그램 명령 수신 실패: {e}")
+                self._stop.wait(5)
+            except Exception as e:
+                logger.error(f"텔레그램 명령 처리 중 오류: {e}")
+                self._stop.wait(5)
+
+    def poll_once(self):
+        """
+        getUpdates 를 한 번 호출해 받은 명령을 처리합니다.
+
+        Returns:
+            int: 처리한 명령 수
+        """
+        params = {'timeout': self.poll_timeout, 'allowed_updates': '["message"]'}
+        if self.offset is not None:
+            params['offset'] = self.offset
+        response = requests.get(f"{self.api_url}/getUpdates", params=params, timeout=self.poll_timeout + 10)
+        response.raise_for_status()
+
+        handled = 0
+        for update in response.json().get('result', []):
+            self.offset = update['update_id'] + 1
+            message = update.get('message') or {}
+            text = message.get('text', '')
+            if not text.startswith('/'):
+                continue
+            if str(message.get('chat', {}).get('id')) != str(self.analyzer.telegram_chat_id):
+                logger.warning(f"허용되지 않은 채팅의 명령 무시: {message.get('chat', {}).get('id')}")
+                continue
+            # 시작 전에 쌓여 있던 명령에는 답하지 않음
+            if message.get('date', self.started_at) < self.started_at - 60:
+                continue
+
+            started = time.perf_counter()
+            reply = self.handle(text)
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.info(f"텔레그램 명령 처리: {text.split()[0]} ({elapsed:.1f}ms)")
+            # 이미지로 직접 답한 명령(/chart)은 답장 메시지 없음
+            if reply:
+                self.analyzer.send_telegram_message(reply)
+            handled += 1
+        return handled
+
+    def handle(self, text):
+        """
+        명령 한 줄을 처리해 답장 메시지를 반환합니다.
+        """
+        parts = text.split()
+        # 그룹 채팅의 /scan@봇이름 형식 처리
+        command = parts[0].split('@')[0].lower()
+        handler = self.commands.get(command)
+        if handler is None:
+            return f"알 수 없는 명령입니다: {html.escape(command)}\n\n{HELP_TEXT}"
+        return handler(parts[1:])
+
+    def cached_analysis(self, symbol):
+        """
+        종목의 최신 분석 결과를 반환합니다. 캐시가 오래됐거나 없으면 새로 분석합니다.
+
+        새로 분석할 때는 스캔 상태를 건드리지 않는 lookup_symbol 을 쓰고, 감시 종목의
+        결과만 캐시에 넣습니다.
+
+        Returns:
+            tuple: (분석 결과 또는 None, 분석 후 경과 시간(초))
+        """
+        with self.analyzer.cache_lock:
+            analysis = self.analyzer.last_results.get(symbol)
+            analyzed_at = self.analyzer.result_times.get(symbol, 0)
+        if analysis is not None and time.time() - analyzed_at <= self.stale_seconds:
+            return analysis, time.time() - analyzed_at
+
+        analysis = self.analyzer.lookup_symbol(symbol)
+        if analysis is not None and symbol in self.analyzer.symbols:
+            self.analyzer.store_results({symbol: analysis}, scan=False)
+        return analysis, 0.0
+
+    def unlisted_reply(self, symbol):
+        """
+        상장되지 않은 마켓이면 답장 메시지를 반환합니다. (상장된 마켓이면 None)
+        """
+        listed = self.analyzer.is_listed(symbol)
+        if listed is None:
+            return "마켓 목록을 확인할 수 없습니다. 잠시 후 다시 시도하세요."
+        if not listed:
+            return f"업비트에 없는 마켓입니다: {symbol}"
+        return None
+
+    def command_status(self, args):
+        with self.analyzer.cache_lock:
+            results = dict(self.analyzer.last_results)
+            last_scan_at = self.analyzer.last_scan_at
+        analyzed = [analysis for analysis in results.values() if analysis is not None]
+        alerts = [analysis['symbol'] for analysis in analyzed if self.analyzer.evaluate_conditions(analysis)['alert']]
+        message = "📡 <b>감시 현황</b>\n"
+        message += f"감시 종목: {len(self.analyzer.symbols)}개\n"
+        if last_scan_at:
+            message += f"마지막 스캔: {datetime.fromtimestamp(last_scan_at).strftime('%Y-%m-%d %H:%M:%S')}\n"
+        else:
+            message += "마지막 스캔: 없음\n"
+        message += f"분석된 종목: {len(analyzed)}개, 건너뛴 종목: {len(self.analyzer.skip_reasons)}개\n"
+        message += f"조건 만족: {', '.join(symbol.replace('KRW-', '') for symbol in alerts) if alerts else '없음'}"
+        return message
+
+    def command_scan(self, args):
+        if not args:
+            return "사용법: /scan &lt;종목&gt; (예: /scan BTC)"
+        symbol = normalize_symbol(args[0])
+        if symbol is None:
+            return f"종목 형식이 올바르지 않습니다: {html.escape(args[0])}"
+        unlisted = self.unlisted_reply(symbol)
+        if unlisted:
+            return unlisted
+        analysis, age = self.cached_analysis(symbol)
+        if analysis is None:
+            return f"{symbol} 을(를) 분석할 수 없습니다."
+
+        conditions = self.analyzer.evaluate_conditions(analysis)
+        source = f"{int(age)}초 전 분석" if age else "방금 조회"
+        message = f"🔎 <b>{symbol}</b> ({source})\n"
+        message += f"💰 현재가: {analysis['current_price']:,.0f}원\n"
+        message += f"{'✅' if conditions['rsi'] else '❌'} RSI: {analysis['rsi']:.2f}\n"
+        message += f"{'✅' if conditions['band_width'] else '❌'} 밴드폭: {analysis['band_width']:.3f}%\n"
+        breakout = conditions['upper_breakout'] or conditions['lower_breakout']
+        message += f"{'✅' if breakout else '❌'} "
+        message += f"밴드: {analysis['lower_band']:,.0f} ~ {analysis['upper_band']:,.0f}원\n"
+        if analysis.get('volume_ratio') is not None and not math.isnan(analysis['volume_ratio']):
+            message += f"🔊 거래량: 중앙값의 {analysis['volume_ratio']:.1f}배\n"
+        message += "🚨 알림 조건 만족" if conditions['alert'] else "알림 조건 미충족"
+        return message
+
+    def command_chart(self, args):
+        if getattr(self.analyzer, 'charts', None) is None:
+            return "차트 기능이 꺼져 있습니다. (ALERT_CHARTS=1 로 사용)"
+        if not args:
+            return "사용법: /chart &lt;종목&gt; (예: /chart BTC)"
+        symbol = normalize_symbol(args[0])
+        if symbol is None:
+            return f"종목 형식이 올바르지 않습니다: {html.escape(args[0])}"
+        unlisted = self.unlisted_reply(symbol)
+        if unlisted:
+            return unlisted
+        analysis, _ = self.cached_analysis(symbol)
+        if analysis is None or not self.analyzer.send_chart(analysis):
+            return f"{symbol} 차트를 만들 수 없습니다."
+        return None
+
+    def command_top(self, args):
+        with self.analyzer.cache_lock:
+            results = dict(self.analyzer.last_results)
+        ranked = self.screener.rank(results)
+        if not ranked:
+            return "아직 분석된 종목이 없습니다."
+        message = f"🏆 <b>알림 조건에 가까운 종목 {len(ranked)}개</b>\n"
+        for rank, (score, analysis, _) in enumerate(ranked, 1):
+            message += (f"{rank}. {analysis['symbol'].replace('KRW-', '')} 점수 {score:.2f} "
+                        f"(RSI {analysis['rsi']:.1f}, 밴드폭 {analysis['band_width']:.3f}%)\n")
+        return message
+
+    def command_watch(self, args):
+        if not args:
+            return "사용법: /watch &lt;종목&gt;"
+        symbol = normalize_symbol(args[0])
+        if symbol is None:
+            return f"종목 형식이 올바르지 않습니다: {html.escape(args[0])}"
+        if symbol in self.analyzer.symbols:
+            return f"{symbol} 은(는) 이미 감시 중입니다."
+        unlisted = self.unlisted_reply(symbol)
+        if unlisted:
+            return unlisted
+        if not self.analyzer.watch(symbol):
+            return f"{symbol} 은(는) 이미 감시 중입니다."
+        return f"👀 {symbol} 을(를) 감시 종목에 추가했습니다. (총 {len(self.analyzer.symbols)}개)"
+
+    def command_unwatch(self, args):
+        if not args:
+            return "사용법: /unwatch &lt;종목&gt;"
+        symbol = normalize_symbol(args[0])
+        if symbol is None or not self.analyzer.unwatch(symbol):
+            return f"{html.escape(args[0])} 은(는) 감시 중인 종목이 아닙니다."
+        return f"🙈 {symbol} 을(를) 감시 종목에서 제외했습니다. (총 {len(self.analyzer.symbols)}개)"
+
+    def command_paper(self, args):
+        paper = getattr(self.analyzer, 'paper', None)
+        if paper is None:
+            return "모의 매매를 사용하지 않습니다. (PAPER_TRADING=1)"
+        summary = paper.summary()
+        message = "📒 <b>모의 매매</b>\n"
+        message += f"거래: {summary['trades']}건, 승률 {summary['win_rate']:.1f}%\n"
+        message += f"실현 손익: {summary['pnl']:+,.0f}원 (평균 {summary['avg_return']:+.2f}%)\n"
+        message += f"최대 낙폭: {summary['max_drawdown']:,.0f}원\n"
+        if summary['open_positions']:
+            held = ', '.join(symbol.replace('KRW-', '') for symbol in summary['open_positions'])
+            message += f"보유: {held} (평가 손익 {summary['unrealized_pnl']:+,.0f}원)"
+        else:
+            message += "보유: 없음"
+        return message
+
+    def command_help(self, args):
+        return HELP_TEXT
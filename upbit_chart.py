@@ -0,0 +1,272 @@
+import zlib
+import struct
+import time
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+# 팔레트 색상 인덱스 (PNG 팔레트 이미지라 픽셀 하나가 1바이트)
+BACKGROUND, GRID, BAND_FILL, BAND, MIDDLE, PRICE, RSI, UP, DOWN = range(9)
+PALETTE = [
+    (255, 255, 255),  # 배경
+    (226, 226, 226),  # 기준선
+    (222, 234, 250),  # 밴드 영역
+    (120, 160, 220),  # 상단/하단 밴드
+    (170, 170, 170),  # 중간 밴드
+    (33, 33, 33),     # 가격
+    (142, 68, 173),   # RSI
+    (214, 48, 49),    # 상단 돌파
+    (41, 98, 255),    # 하단 이탈
+]
+
+# chart_series 의 행 순서
+SERIES_ROWS = ('close', 'upper', 'middle', 'lower', 'rsi')
+
+
+def encode_png(pixels, palette=PALETTE):
+    """
+    팔레트 인덱스 배열을 PNG(색상 타입 3)로 인코딩합니다.
+
+    Args:
+        pixels (np.ndarray): (높이, 너비) uint8 팔레트 인덱스
+        palette (list): (R, G, B) 색상 목록
+
+    Returns:
+        bytes: PNG 파일 내용
+    """
+    height, width = pixels.shape
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    # 행마다 필터 바이트(0, 필터 없음)를 앞에 붙임
+    raw = np.empty((height, width + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = pixels
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0))
+            + chunk(b'PLTE', bytes(np.asarray(palette, dtype=np.uint8).ravel()))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+
+def resample(values, width):
+    """
+    값 배열을 픽셀 열 수에 맞게 선형 보간합니다. (가장 가까운 원래 값이 NaN 인 열은 NaN)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    x = np.linspace(0, len(values) - 1, width)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.full(width, np.nan)
+    index = np.arange(len(values))
+    out = np.interp(x, index[valid], values[valid])
+    out[~valid[np.rint(x).astype(int)]] = np.nan
+    return out
+
+
+def to_rows(values, low, high, top, bottom):
+    """
+    값을 패널 안의 픽셀 행 위치로 바꿉니다. (위가 high)
+    """
+    span = high - low if high > low else 1.0
+    return bottom - (np.asarray(values) - low) / span * (bottom - top)
+
+
+class Canvas:
+    def __init__(self, width, height):
+        """
+        팔레트 인덱스 캔버스
+
+        선과 영역을 열마다 세로 구간으로 그리므로 반복문 없이 (행, 열) 마스크 한 번으로
+        칠합니다. 글자는 그리지 않고 수치는 캡션으로 보냅니다.
+
+        Args:
+            width (int): 너비(픽셀)
+            height (int): 높이(픽셀)
+        """
+        self.width = width
+        self.height = height
+        self.pixels = np.full((height, width), BACKGROUND, dtype=np.uint8)
+        self.rows = np.arange(height)[:, None]
+
+    def fill_between(self, y_top, y_bottom, color):
+        """
+        열마다 y_top ~ y_bottom 행을 칠합니다. (NaN 인 열은 건너뜀)
+        """
+        low = np.fmin(y_top, y_bottom)
+        high = np.fmax(y_top, y_bottom)
+        valid = ~(np.isnan(low) | np.isnan(high))
+        low = np.where(valid, np.floor(low), self.height)
+        high = np.where(valid, np.ceil(high), -1)
+        self.pixels[(self.rows >= low) & (self.rows <= high)] = color
+
+    def line(self, y, color, thickness=1):
+        """
+        열마다 이전 열 위치까지 세로로 이어 꺾은선을 그립니다.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        previous = np.concatenate(([y[0]], y[:-1]))
+        previous = np.where(np.isnan(previous), y, previous)
+        low = np.rint(np.fmin(y, previous)) - (thickness - 1) // 2
+        high = np.rint(np.fmax(y, previous)) + thickness // 2
+        self.fill_between(low, high, color)
+
+    def hline(self, y, color, left=0, right=None, dash=0):
+        """
+        가로선을 그립니다. (dash 가 있으면 dash 픽셀 간격 점선)
+        """
+        row = int(round(y))
+        if not 0 <= row < self.height:
+            return
+        columns = np.arange(left, self.width if right is None else right)
+        if dash:
+            columns = columns[(columns // dash) % 2 == 0]
+        self.pixels[row, columns] = color
+
+    def marker(self, x, y, color, size=2):
+        """
+        (x, y) 중심의 정사각형 점을 찍습니다.
+        """
+        if np.isnan(y):
+            return
+        x, y = int(round(x)), int(round(y))
+        self.pixels[max(y - size, 0):y + size + 1, max(x - size, 0):x + size + 1] = color
+
+
+def render_chart(series, width=320, height=180):
+    """
+    가격 + 볼린저 밴드 패널과 RSI 패널로 된 미니 차트를 그립니다.
+
+    마지막 종가가 상단/하단 밴드를 벗어났으면 끝에 빨간/파란 점을 찍습니다.
+
+    Args:
+        series (np.ndarray): (5, 캔들 수) 배열 (종가, 상단, 중간, 하단 밴드, RSI)
+        width (int): 너비(픽셀)
+        height (int): 높이(픽셀)
+
+    Returns:
+        bytes: PNG 이미지
+    """
+    close, upper, middle, lower, rsi = (resample(row, width - 8) for row in series)
+    canvas = Canvas(width, height)
+    margin = 4
+    split = int(height * 0.68)
+    price_top, price_bottom = margin, split - margin
+    rsi_top, rsi_bottom = split + margin, height - margin
+    x = np.arange(margin, width - margin)
+
+    # 가격 패널 (밴드와 가격을 함께 담도록 위아래 여유 5%)
+    stacked = np.concatenate([close, upper, lower])
+    low, high = np.nanmin(stacked), np.nanmax(stacked)
+    pad = (high - low) * 0.05 or abs(high) * 0.01 or 1.0
+    low, high = low - pad, high + pad
+
+    def plot(values, top, bottom, lo, hi):
+        y = np.full(width, np.nan)
+        y[x] = to_rows(values, lo, hi, top, bottom)
+        return y
+
+    y_upper = plot(upper, price_top, price_bottom, low, high)
+    y_lower = plot(lower, price_top, price_bottom, low, high)
+    y_close = plot(close, price_top, price_bottom, low, high)
+    canvas.fill_between(y_upper, y_lower, BAND_FILL)
+    canvas.line(plot(middle, price_top, price_bottom, low, high), MIDDLE)
+    canvas.line(y_upper, BAND)
+    canvas.line(y_lower, BAND)
+    canvas.line(y_close, PRICE, thickness=2)
+
+    last = x[-1]
+    if close[-1] > upper[-1]:
+        canvas.marker(last - 2, y_close[last], UP)
+    elif close[-1] < lower[-1]:
+        canvas.marker(last - 2, y_close[last], DOWN)
+
+    # RSI 패널 (0~100 고정, 30/70 점선)
+    canvas.hline(split, GRID)
+    canvas.hline(to_rows(50, 0, 100, rsi_top, rsi_bottom), GRID, margin, width - margin)
+    for level in (30, 70):
+        canvas.hline(to_rows(level, 0, 100, rsi_top, rsi_bottom), BAND, margin, width - margin, dash=3)
+    canvas.line(plot(rsi, rsi_top, rsi_bottom, 0, 100), RSI)
+
+    return encode_png(canvas.pixels)
+
+
+class ChartRenderer:
+    def __init__(self, width=320, height=180, points=96, cache_size=256, timings=1000):
+        """
+        알림용 미니 차트를 그리고 (종목, 타임프레임, 마지막 캔들 시각) 별로 캐시합니다.
+
+        같은 캔들의 차트는 여러 번 보내도 한 번만 그립니다. 렌더 시간은 최근
+        timings 건을 보관해 stats() 로 평균/p95/최대를 확인할 수 있습니다.
+
+        Args:
+            width (int): 이미지 너비(픽셀)
+            height (int): 이미지 높이(픽셀)
+            points (int): 차트에 담을 최근 캔들 수
+            cache_size (int): 캐시할 최대 이미지 수 (오래 안 쓴 것부터 제거)
+            timings (int): 보관할 렌더 시간 수
+        """
+        self.width = width
+        self.height = height
+        self.points = points
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.render_times = deque(maxlen=timings)
+        self.renders = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def series(self, close, upper, middle, lower, rsi):
+        """
+        지표 시계열에서 차트에 쓸 최근 points 개를 (5, points) float32 배열로 잘라냅니다.
+        """
+        return np.vstack([np.asarray(values, dtype=np.float32)[-self.points:]
+                          for values in (close, upper, middle, lower, rsi)])
+
+    def render(self, symbol, timeframe, candle_time, series):
+        """
+        차트 PNG 를 반환합니다. (캐시에 있으면 그대로 반환)
+
+        Args:
+            symbol (str): 종목 코드
+            timeframe (str): 타임프레임 이름
+            candle_time (str): 마지막 캔들 시각
+            series (np.ndarray): series() 결과
+
+        Returns:
+            bytes: PNG 이미지
+        """
+        key = (symbol, timeframe, candle_time)
+        with self.lock:
+            png = self.cache.get(key)
+            if png is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return png
+
+        started = time.perf_counter()
+        png = render_chart(series, self.width, self.height)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with self.lock:
+            self.render_times.append(elapsed)
+            self.renders += 1
+            self.cache[key] = png
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return png
+
+    def stats(self):
+        """
+        Returns:
+            dict: 렌더 수, 캐시 적중 수, 최근 렌더 시간(ms) 평균/p95/최대
+        """
+        with self.lock:
+            times = np.array(self.render_times)
+            stats = {'renders': self.renders, 'hits': self.hits, 'cached': len(self.cache)}
+        if len(times):
+            stats.update(mean_ms=float(times.mean()), p95_ms=float(np.percentile(times, 95)),
+                         max_ms=float(times.max()))
+        return stats
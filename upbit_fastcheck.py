@@ -0,0 +1,136 @@
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BandCache:
+    def __init__(self, symbols):
+        """
+        마감된 캔들로 계산한 종목별 밴드/지표 캐시
+
+        Args:
+            symbols (list): 종목 목록 (배열 순서 고정)
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.upper_band = np.full(n, np.nan)
+        self.lower_band = np.full(n, np.nan)
+        self.band_width = np.full(n, np.nan)
+        self.rsi = np.full(n, np.nan)
+        self.outside = np.zeros(n, dtype=bool)
+        self.candle_time = [None] * n
+
+    def store(self, symbol, analysis):
+        """
+        한 종목의 분석 결과를 캐시에 저장합니다.
+        """
+        i = self.index[symbol]
+        if analysis is None:
+            self.upper_band[i] = self.lower_band[i] = self.band_width[i] = self.rsi[i] = np.nan
+            self.candle_time[i] = None
+        else:
+            self.upper_band[i] = analysis['upper_band']
+            self.lower_band[i] = analysis['lower_band']
+            self.band_width[i] = analysis['band_width']
+            self.rsi[i] = analysis['rsi']
+            self.candle_time[i] = analysis.get('candle_time')
+        self.outside[i] = False
+
+    def newly_crossed(self, prices):
+        """
+        현재가 배열을 캐시된 밴드와 비교해 이번에 밴드를 벗어난 종목을 찾습니다.
+
+        Args:
+            prices (np.ndarray): self.symbols 순서의 현재가 (없으면 NaN)
+
+        Returns:
+            list: 직전 확인에서는 밴드 안에 있다가 이번에 벗어난 종목
+        """
+        # NaN 비교는 항상 False 이므로 캐시가 없거나 시세가 없는 종목은 자동 제외
+        outside = (prices > self.upper_band) | (prices < self.lower_band)
+        crossed = outside & ~self.outside
+        self.outside = outside
+        return [self.symbols[i] for i in np.flatnonzero(crossed)]
+
+
+class FastBreakoutChecker:
+    def __init__(self, analyzer, candle_minutes=60):
+        """
+        캔들 사이의 밴드 돌파를 한 번의 시세 조회로 확인하는 빠른 체크
+
+        마감된 캔들 기준 밴드는 캔들이 바뀔 때 한 번만 계산해 두고, 이후에는
+        /ticker 한 번으로 모든 종목의 현재가를 받아 캐시된 밴드와 비교합니다.
+        밴드를 새로 벗어난 종목만 analyzer.check_conditions 로 전체 분석합니다.
+
+        Args:
+            analyzer: get_candles/analyze_candles/check_conditions 를 제공하는 분석기
+            candle_minutes (int): 캔들 단위(분)
+        """
+        self.analyzer = analyzer
+        self.candle_seconds = candle_minutes * 60
+        self.cache = BandCache(analyzer.symbols)
+        self.cached_period = None
+
+    def refresh(self):
+        """
+        마감된 캔들로 모든 종목의 밴드/지표를 다시 계산합니다.
+        """
+        if self.cache.symbols != list(self.analyzer.symbols):
+            # 감시 종목이 바뀌었으면 새 종목 순서로 캐시를 다시 만듦
+            self.cache = BandCache(self.analyzer.symbols)
+        for symbol in self.cache.symbols:
+            df = self.analyzer.get_candles(symbol)
+            # 마지막 캔들은 진행 중이므로 제외
+            closed = df.iloc[:-1].reset_index(drop=True) if df is not None else None
+            self.cache.store(symbol, self.analyzer.analyze_candles(symbol, closed))
+            self.analyzer.pace()
+        logger.info(f"밴드 캐시 갱신 완료: {int(np.isfinite(self.cache.upper_band).sum())}/{len(self.cache.symbols)}개 종목")
+
+    def get_prices(self):
+        """
+        /ticker 한 번으로 모든 종목의 현재가를 조회합니다.
+
+        Returns:
+            np.ndarray: cache.symbols 순서의 현재가 (조회 실패 종목은 NaN)
+        """
+        prices = np.full(len(self.cache.symbols), np.nan)
+        data = self.analyzer.fetcher.get_json(
+            'ticker',
+            f"{self.analyzer.base_url}/ticker",
+            params={'markets': ','.join(self.cache.symbols)}
+        )
+        for ticker in data:
+            i = self.cache.index.get(ticker['market'])
+            if i is not None:
+                prices[i] = ticker['trade_price']
+        return prices
+
+    def check(self):
+        """
+        빠른 돌파 체크를 한 번 수행합니다.
+
+        Returns:
+            list: 전체 분석을 수행한 종목
+        """
+        # 리더 선출 대기 인스턴스는 시세도 조회하지 않음
+        if hasattr(self.analyzer, 'is_active') and not self.analyzer.is_active():
+            return []
+        try:
+            period = int(time.time() // self.candle_seconds)
+            if period != self.cached_period:
+                self.refresh()
+                self.cached_period = period
+
+            crossed = self.cache.newly_crossed(self.get_prices())
+            if crossed:
+                logger.info(f"밴드 돌파 감지: {', '.join(crossed)} - 전체 분석 수행")
+                self.analyzer.check_conditions(crossed, once_per_candle=True)
+            return crossed
+
+        except Exception as e:
+            logger.error(f"빠른 돌파 체크 중 오류: {e}")
+            return []
@@ -0,0 +1,254 @@
+import time
+import sqlite3
+import threading
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 조건 결과 비트 플래그
+RSI_OK = 1
+BAND_WIDTH_OK = 2
+UPPER_BREAKOUT = 4
+LOWER_BREAKOUT = 8
+ALERT = 16
+VOLUME_SPIKE = 32
+
+EVENT_FLAGS = {
+    'breakout': UPPER_BREAKOUT | LOWER_BREAKOUT,
+    'upper': UPPER_BREAKOUT,
+    'lower': LOWER_BREAKOUT,
+    'alert': ALERT,
+    'volume': VOLUME_SPIKE,
+}
+
+VALUE_COLUMNS = ('price', 'rsi', 'band_width', 'upper_band', 'middle_band', 'lower_band')
+
+# 기본 보존 정책: 7일 지난 기록은 1시간 평균, 90일 지난 기록은 1일 평균, 3년 지나면 삭제
+DEFAULT_RETENTION = ((7, 3600), (90, 86400))
+DEFAULT_MAX_AGE_DAYS = 365 * 3
+
+
+def encode_outcome(conditions):
+    """
+    evaluate_conditions 결과를 비트 플래그로 변환합니다.
+    """
+    outcome = 0
+    if conditions.get('rsi'):
+        outcome |= RSI_OK
+    if conditions.get('band_width'):
+        outcome |= BAND_WIDTH_OK
+    if conditions.get('upper_breakout'):
+        outcome |= UPPER_BREAKOUT
+    if conditions.get('lower_breakout'):
+        outcome |= LOWER_BREAKOUT
+    if conditions.get('alert'):
+        outcome |= ALERT
+    if conditions.get('volume_spike'):
+        outcome |= VOLUME_SPIKE
+    return outcome
+
+
+def days_ago(days, now=None):
+    """
+    지금부터 days 일 전의 epoch 초
+    """
+    return int((time.time() if now is None else now) - days * 86400)
+
+
+class SignalHistory:
+    def __init__(self, path, retention=DEFAULT_RETENTION, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        """
+        스캔마다 종목별 분석 결과를 쌓는 시계열 저장소 (SQLite)
+
+        (종목, 타임프레임, 시각) 을 기본 키로 하는 WITHOUT ROWID 테이블이라 종목별
+        기간 조회는 키 범위 탐색만 하고, 돌파 이벤트는 부분 인덱스로 찾습니다.
+
+        Args:
+            path (str): 데이터베이스 파일 경로
+            retention (tuple): (경과 일수, 다운샘플 간격(초)) 목록
+            max_age_days (int): 이보다 오래된 기록은 삭제 (None 이면 보존)
+        """
+        self.path = path
+        self.retention = retention
+        self.max_age_days = max_age_days
+        self.last_retention_at = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signals (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                resolution INTEGER NOT NULL DEFAULT 0,
+                price REAL,
+                rsi REAL,
+                band_width REAL,
+                upper_band REAL,
+                middle_band REAL,
+                lower_band REAL,
+                outcome INTEGER NOT NULL,
+                PRIMARY KEY (symbol, timeframe, timestamp)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS signals_events ON signals (timestamp) WHERE outcome >= 4;
+            CREATE INDEX IF NOT EXISTS signals_resolution ON signals (resolution, timestamp);
+        """)
+
+    def append(self, records, timestamp=None):
+        """
+        한 번의 스캔 결과를 한 트랜잭션으로 저장합니다.
+
+        Args:
+            records (list): (analysis, conditions) 목록. analysis 는 analyze_symbol 결과,
+                conditions 는 evaluate_conditions 결과
+            timestamp (int): 스캔 시각 epoch 초 (기본값: 현재)
+
+        Returns:
+            int: 저장한 행 수
+        """
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        rows = []
+        for analysis, conditions in records:
+            if analysis is None:
+                continue
+            rows.append((
+                analysis['symbol'],
+                analysis.get('timeframe') or '60m',
+                timestamp,
+                float(analysis['current_price']),
+                float(analysis['rsi']),
+                float(analysis['band_width']),
+                float(analysis['upper_band']),
+                float(analysis['middle_band']),
+                float(analysis['lower_band']),
+                encode_outcome(conditions),
+            ))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO signals "
+                "(symbol, timeframe, timestamp, price, rsi, band_width, upper_band, middle_band, lower_band, outcome) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def series(self, symbol, fields=('rsi', 'band_width'), start=None, end=None, timeframe='60m'):
+        """
+        한 종목의 지표 시계열을 조회합니다.
+
+        예) history.series('KRW-BTC', ('rsi', 'band_width'), start=days_ago(30))
+
+        Args:
+            symbol (str): 종목 코드
+            fields (tuple): 조회할 값 (price, rsi, band_width, upper_band, middle_band, lower_band, outcome)
+            start (int): 시작 epoch 초 (포함)
+            end (int): 끝 epoch 초 (포함)
+            timeframe (str): 타임프레임
+
+        Returns:
+            pd.DataFrame: timestamp, resolution 과 요청한 값
+        """
+        unknown = [field for field in fields if field not in VALUE_COLUMNS + ('outcome',)]
+        if unknown:
+            raise ValueError(f"조회할 수 없는 값입니다: {', '.join(unknown)}")
+        columns = ', '.join(('timestamp', 'resolution') + tuple(fields))
+        query = (f"SELECT {columns} FROM signals WHERE symbol = ? AND timeframe = ? "
+                 "AND timestamp BETWEEN ? AND ? ORDER BY timestamp")
+        with self._lock:
+            return pd.read_sql_query(query, self.conn, params=(
+                symbol, timeframe, start if start is not None else 0, end if end is not None else 2 ** 62))
+
+    def events(self, kind='breakout', start=None, end=None, symbol=None):
+        """
+        조건 이벤트(돌파/알림)를 조회합니다.
+
+        예) history.events('breakout', start=days_ago(7))
+
+        Args:
+            kind (str): breakout, upper, lower, alert, volume 중 하나
+            start (int): 시작 epoch 초
+            end (int): 끝 epoch 초
+            symbol (str): 특정 종목만 조회
+
+        Returns:
+            pd.DataFrame: 이벤트 목록 (시간순)
+        """
+        flags = EVENT_FLAGS[kind]
+        # outcome >= 4 는 부분 인덱스 조건과 같아야 인덱스를 사용
+        query = ("SELECT symbol, timeframe, timestamp, resolution, price, rsi, band_width, outcome "
+                 "FROM signals INDEXED BY signals_events "
+                 "WHERE outcome >= 4 AND (outcome & ?) != 0 AND timestamp BETWEEN ? AND ?")
+        params = [flags, start if start is not None else 0, end if end is not None else 2 ** 62]
+        if symbol is not None:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        query += " ORDER BY timestamp"
+        with self._lock:
+            return pd.read_sql_query(query, self.conn, params=params)
+
+    def downsample(self, older_than, bucket_seconds):
+        """
+        older_than 이전의 기록 중 bucket_seconds 보다 촘촘한 기록을 구간 평균으로 합칩니다.
+
+        값은 평균, 조건 결과는 구간 내 비트 OR 로 합칩니다.
+
+        Returns:
+            int: 합쳐진 원본 행 수
+        """
+        bucket_end = older_than - older_than % bucket_seconds
+        # SQLite 에는 비트 OR 집계가 없어 플래그별 MAX 를 OR 로 합침
+        outcome = ' | '.join(f'MAX(outcome & {flag})'
+                             for flag in (RSI_OK, BAND_WIDTH_OK, UPPER_BREAKOUT, LOWER_BREAKOUT, ALERT, VOLUME_SPIKE))
+        with self._lock, self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS temp.downsampled")
+            self.conn.execute(f"""
+                CREATE TEMP TABLE downsampled AS
+                SELECT symbol, timeframe, (timestamp / :bucket) * :bucket AS bucket,
+                       {', '.join(f'AVG({column}) AS {column}' for column in VALUE_COLUMNS)},
+                       {outcome} AS outcome
+                FROM signals
+                WHERE timestamp < :end AND resolution < :bucket
+                GROUP BY symbol, timeframe, bucket
+            """, {'bucket': bucket_seconds, 'end': bucket_end})
+            removed = self.conn.execute(
+                "DELETE FROM signals WHERE timestamp < ? AND resolution < ?", (bucket_end, bucket_seconds)
+            ).rowcount
+            self.conn.execute(f"""
+                INSERT OR REPLACE INTO signals
+                (symbol, timeframe, timestamp, resolution, {', '.join(VALUE_COLUMNS)}, outcome)
+                SELECT symbol, timeframe, bucket, :bucket, {', '.join(VALUE_COLUMNS)}, outcome
+                FROM temp.downsampled
+            """, {'bucket': bucket_seconds})
+            self.conn.execute("DROP TABLE temp.downsampled")
+        return removed
+
+    def apply_retention(self, now=None):
+        """
+        보존 정책에 따라 오래된 기록을 다운샘플하거나 삭제합니다.
+        """
+        now = time.time() if now is None else now
+        for age_days, bucket_seconds in self.retention:
+            removed = self.downsample(days_ago(age_days, now), bucket_seconds)
+            if removed:
+                logger.info(f"시그널 기록 다운샘플: {age_days}일 이전 {removed}행 → {bucket_seconds}초 간격")
+        if self.max_age_days is not None:
+            with self._lock, self.conn:
+                removed = self.conn.execute(
+                    "DELETE FROM signals WHERE timestamp < ?", (days_ago(self.max_age_days, now),)
+                ).rowcount
+            if removed:
+                logger.info(f"시그널 기록 삭제: {self.max_age_days}일 이전 {removed}행")
+        self.last_retention_at = now
+
+    def maybe_apply_retention(self, interval=86400):
+        """
+        마지막 보존 정책 적용 후 interval 초가 지났으면 다시 적용합니다.
+        """
+        if time.time() - self.last_retention_at >= interval:
+            self.apply_retention()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,260 @@
+import numpy as np
+
+# 블록 안에서 a^-k 배율이 이 값을 넘지 않게 블록 길이를 정함 (누적합 정밀도 유지)
+MAX_BLOCK_GROWTH = 1e3
+MAX_BLOCK = 256
+
+RSI_METHODS = ('sma', 'wilder')
+
+
+def block_length(a):
+    """
+    감쇠 계수 a 에 맞는 블록 길이 (a^-L ≤ MAX_BLOCK_GROWTH)
+    """
+    return int(np.clip(np.floor(np.log(MAX_BLOCK_GROWTH) / -np.log(a)), 1, MAX_BLOCK))
+
+
+def linear_recurrence(u, a, initial=None):
+    """
+    y[t] = a * y[t-1] + u[t] 를 마지막 축(시간)을 따라 계산합니다.
+
+    시간을 길이 L 블록으로 나누면 블록 안에서는
+    y[k] = a^(k+1) * y[-1] + a^k * cumsum(u[j] * a^-j) 이므로 원소마다 반복하지 않고
+    블록마다 누적합 한 번으로 (종목, 블록) 을 한꺼번에 계산합니다. 반복 횟수는
+    시간 길이 / L 이고, a^-L 을 작게 유지해 순차 계산과 1e-12 수준으로 같습니다.
+
+    Args:
+        u (np.ndarray): 입력, shape (시간,) 또는 (종목, 시간)
+        a (float): 감쇠 계수 (0 ≤ a < 1)
+        initial (np.ndarray): 종목별 y[-1] (기본값: 0)
+
+    Returns:
+        np.ndarray: u 와 같은 shape 의 y
+    """
+    u = np.asarray(u, dtype=np.float64)
+    squeeze = u.ndim == 1
+    u = np.atleast_2d(u)
+    prev = np.zeros(len(u)) if initial is None else np.asarray(initial, dtype=np.float64).reshape(len(u))
+    if a == 0:
+        return (u[0] if squeeze else u).copy()
+
+    length = block_length(a)
+    k = np.arange(length)
+    up = a ** k
+    down = a ** -k.astype(np.float64)
+    y = np.empty_like(u)
+    for start in range(0, u.shape[1], length):
+        n = min(length, u.shape[1] - start)
+        block = np.cumsum(u[:, start:start + n] * down[:n], axis=1) * up[:n]
+        block += np.outer(prev, up[:n] * a)
+        y[:, start:start + n] = block
+        prev = block[:, -1]
+    return y[0] if squeeze else y
+
+
+def smooth(x, period, alpha, seed='sma'):
+    """
+    종목마다 시작 위치가 다른 (종목, 시간) 배열을 지수 평활합니다.
+
+    y[t] = (1 - alpha) * y[t-1] + alpha * x[t] 이며 첫 값은 seed 에 따라 첫 period 개
+    평균(sma) 또는 첫 값(first) 입니다. 앞쪽 NaN(상장 전)은 건너뛰고, 첫 값 이전은
+    NaN 입니다. 중간에 NaN 이 있으면 그 뒤는 모두 NaN 이므로 빈 캔들은 미리 채웁니다.
+
+    Args:
+        x (np.ndarray): 입력, shape (시간,) 또는 (종목, 시간)
+        period (int): 기간 (sma 시드 길이)
+        alpha (float): 평활 계수 (0 < alpha ≤ 1)
+        seed (str): sma 또는 first
+
+    Returns:
+        np.ndarray: x 와 같은 shape 의 평활 값
+    """
+    x = np.asarray(x, dtype=np.float64)
+    squeeze = x.ndim == 1
+    x = np.atleast_2d(x)
+    symbols, length = x.shape
+
+    valid = ~np.isnan(x)
+    start = np.where(valid.any(axis=1), valid.argmax(axis=1), length)
+    seed_index = start + (period - 1 if seed == 'sma' else 0)
+    steps = np.arange(length)
+
+    with np.errstate(invalid='ignore'):
+        u = np.where(steps > seed_index[:, None], alpha * x, 0.0)
+    rows = np.flatnonzero(seed_index < length)
+    if seed == 'sma':
+        window = start[rows, None] + np.arange(period)
+        u[rows, seed_index[rows]] = x[rows[:, None], window].mean(axis=1)
+    else:
+        u[rows, seed_index[rows]] = x[rows, seed_index[rows]]
+
+    y = linear_recurrence(u, 1.0 - alpha)
+    y[steps < seed_index[:, None]] = np.nan
+    return y[0] if squeeze else y
+
+
+def ema(x, period, seed='sma'):
+    """
+    지수 이동평균 (alpha = 2 / (period + 1))
+    """
+    return smooth(x, period, 2.0 / (period + 1), seed)
+
+
+def wilder(x, period):
+    """
+    Wilder 평활 (alpha = 1 / period, 첫 period 개 평균으로 시작)
+    """
+    return smooth(x, period, 1.0 / period, 'sma')
+
+
+def gains_losses(close):
+    """
+    종가 변화량을 상승분/하락분으로 나눕니다. (첫 시점과 상장 전은 NaN)
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    with np.errstate(invalid='ignore'):
+        gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+        loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+    return gain, loss
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+
+def wilder_rsi(close, period=14):
+    """
+    Wilder 평활 RSI (업비트 차트 등에서 쓰는 방식)
+
+    Args:
+        close (np.ndarray): 종가, shape (시간,) 또는 (종목, 시간)
+        period (int): RSI 기간
+
+    Returns:
+        np.ndarray: close 와 같은 shape 의 RSI (처음 period 개와 변화가 전혀 없는 구간은 NaN)
+    """
+    squeeze = np.ndim(close) == 1
+    gain, loss = gains_losses(close)
+    rsi = rsi_from_averages(wilder(gain, period), wilder(loss, period))
+    return rsi[0] if squeeze else rsi
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    MACD (빠른 EMA - 느린 EMA), 시그널선(MACD 의 EMA), 히스토그램
+
+    Returns:
+        tuple: (MACD, 시그널, 히스토그램), 각각 close 와 같은 shape
+    """
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+class EmaStream:
+    def __init__(self, alpha, value):
+        """
+        종목별 지수 평활 값을 새 값마다 O(1) 로 갱신합니다.
+
+        Args:
+            alpha (float): 평활 계수
+            value (np.ndarray): 종목별 마지막 평활 값
+        """
+        self.alpha = alpha
+        self.value = np.array(value, dtype=np.float64)
+
+    @classmethod
+    def from_history(cls, x, period, alpha=None, seed='sma'):
+        alpha = 2.0 / (period + 1) if alpha is None else alpha
+        history = np.atleast_2d(smooth(x, period, alpha, seed))
+        return cls(alpha, history[:, -1])
+
+    def update(self, x, commit=True):
+        """
+        새 값을 반영한 평활 값을 반환합니다.
+
+        Args:
+            x (np.ndarray): 종목별 새 값
+            commit (bool): False 면 상태를 바꾸지 않음 (진행 중인 캔들 미리 보기)
+        """
+        value = (1.0 - self.alpha) * self.value + self.alpha * np.asarray(x, dtype=np.float64)
+        if commit:
+            self.value = value
+        return value
+
+
+class RsiStream:
+    def __init__(self, period, avg_gain, avg_loss, last_close):
+        """
+        종목별 Wilder RSI 를 새 종가마다 O(1) 로 갱신합니다.
+
+        Args:
+            period (int): RSI 기간
+            avg_gain, avg_loss (np.ndarray): 종목별 평균 상승분/하락분
+            last_close (np.ndarray): 종목별 마지막 종가
+        """
+        self.period = period
+        self.avg_gain = np.array(avg_gain, dtype=np.float64)
+        self.avg_loss = np.array(avg_loss, dtype=np.float64)
+        self.last_close = np.array(last_close, dtype=np.float64)
+
+    @classmethod
+    def from_history(cls, close, period=14):
+        """
+        과거 종가 (종목, 시간) 로 상태를 만듭니다. (기간보다 짧은 종목은 NaN 으로 남음)
+        """
+        close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+        gain, loss = gains_losses(close)
+        return cls(period, wilder(gain, period)[:, -1], wilder(loss, period)[:, -1], close[:, -1])
+
+    @property
+    def value(self):
+        return rsi_from_averages(self.avg_gain, self.avg_loss)
+
+    def update(self, close, commit=True):
+        """
+        새 종가를 반영한 RSI 를 반환합니다.
+
+        Args:
+            close (np.ndarray): 종목별 새 종가
+            commit (bool): False 면 상태를 바꾸지 않음 (진행 중인 캔들 미리 보기)
+        """
+        close = np.asarray(close, dtype=np.float64)
+        delta = close - self.last_close
+        alpha = 1.0 / self.period
+        avg_gain = (1.0 - alpha) * self.avg_gain + alpha * np.maximum(delta, 0.0)
+        avg_loss = (1.0 - alpha) * self.avg_loss + alpha * np.maximum(-delta, 0.0)
+        if commit:
+            self.avg_gain, self.avg_loss, self.last_close = avg_gain, avg_loss, close
+        return rsi_from_averages(avg_gain, avg_loss)
+
+
+class MacdStream:
+    def __init__(self, fast, slow, signal):
+        """
+        종목별 MACD 를 새 종가마다 O(1) 로 갱신합니다.
+
+        Args:
+            fast, slow, signal (EmaStream): 빠른/느린 EMA 와 시그널선 상태
+        """
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+
+    @classmethod
+    def from_history(cls, close, fast=12, slow=26, signal=9):
+        line = np.atleast_2d(ema(close, fast) - ema(close, slow))
+        return cls(EmaStream.from_history(close, fast), EmaStream.from_history(close, slow),
+                   EmaStream.from_history(line, signal))
+
+    def update(self, close, commit=True):
+        """
+        Returns:
+            tuple: 종목별 (MACD, 시그널, 히스토그램)
+        """
+        line = self.fast.update(close, commit) - self.slow.update(close, commit)
+        signal_line = self.signal.update(line, commit)
+        return line, signal_line, line - signal_line
@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import redis
+except ImportError:  # 선택 의존성
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class FileLeaseBackend:
+    def __init__(self, path):
+        """
+        한 서버 안의 프로세스끼리 쓰는 파일 임대(lease) 저장소
+
+        임대 목록을 JSON 파일 하나에 두고, 읽기-수정-쓰기 동안 옆 잠금 파일에
+        배타적 잠금을 겁니다. 임대는 만료 시각이 있어 보유 프로세스가 죽어도
+        만료 후 다른 프로세스가 가져갈 수 있습니다.
+
+        Args:
+            path (str): 임대 파일 경로
+        """
+        if fcntl is None:
+            raise RuntimeError("파일 임대는 fcntl 을 지원하는 OS 에서만 사용할 수 있습니다.")
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = f"{path}.lock"
+
+    def _update(self, change):
+        with open(self._lock_path, 'a+') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                leases = {}
+                if os.path.exists(self.path):
+                    with open(self.path) as f:
+                        try:
+                            leases = json.load(f)
+                        except ValueError:
+                            leases = {}
+                now = time.time()
+                leases = {name: lease for name, lease in leases.items() if lease['expires'] > now}
+                result = change(leases, now)
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(leases, f)
+                os.replace(temp_path, self.path)
+                return result
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def acquire(self, name, owner, ttl):
+        def change(leases, now):
+            lease = leases.get(name)
+            if lease is not None and lease['owner'] != owner:
+                return False
+            leases[name] = {'owner': owner, 'expires': now + ttl}
+            return True
+        return self._update(change)
+
+    def release(self, name, owner):
+        def change(leases, now):
+            if leases.get(name, {}).get('owner') == owner:
+                del leases[name]
+        self._update(change)
+
+    def holder(self, name):
+        return self._update(lambda leases, now: (leases.get(name) or {}).get('owner'))
+
+
+class SQLiteLeaseBackend:
+    def __init__(self, path):
+        """
+        SQLite 임대 저장소 (같은 파일을 보는 여러 프로세스/공유 디스크)
+
+        Args:
+            path (str): 데이터베이스 파일 경로
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def acquire(self, name, owner, ttl):
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM leases WHERE expires <= ?", (now,))
+                # 비어 있거나 내가 가진 임대만 갱신
+                cursor = self.conn.execute(
+                    "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET expires = excluded.expires "
+                    "WHERE leases.owner = excluded.owner",
+                    (name, owner, now + ttl)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def release(self, name, owner):
+        with self._lock:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def holder(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT owner FROM leases WHERE name = ? AND expires > ?", (name, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+
+class RedisLeaseBackend:
+    # 내가 가진 키만 만료 연장/삭제 (비교와 변경을 원자적으로)
+    RENEW_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, url, prefix='upbit:lease:'):
+        """
+        Redis 호환 서버 임대 저장소 (여러 서버/GitHub Actions 간 공유)
+
+        Args:
+            url (str): redis://host:port/db
+            prefix (str): 키 접두사
+        """
+        if redis is None:
+            raise RuntimeError("Redis 임대를 사용하려면 redis 패키지를 설치하세요: pip install redis")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def acquire(self, name, owner, ttl):
+        key = self.prefix + name
+        milliseconds = int(ttl * 1000)
+        if self.client.set(key, owner, nx=True, px=milliseconds):
+            return True
+        return bool(self.client.eval(self.RENEW_SCRIPT, 1, key, owner, milliseconds))
+
+    def release(self, name, owner):
+        self.client.eval(self.RELEASE_SCRIPT, 1, self.prefix + name, owner)
+
+    def holder(self, name):
+        return self.client.get(self.prefix + name)
+
+
+def make_lease_backend(url):
+    """
+    LEADER_BACKEND 값으로 임대 저장소를 만듭니다.
+
+    Args:
+        url (str): file:///경로, sqlite:///경로 또는 redis://호스트:포트/DB
+
+    Returns:
+        임대 저장소 (url 이 비어 있으면 None)
+    """
+    if not url:
+        return None
+    if url.startswith('file://'):
+        return FileLeaseBackend(url[len('file://'):])
+    if url.startswith('sqlite://'):
+        return SQLiteLeaseBackend(url[len('sqlite://'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisLeaseBackend(url)
+    raise ValueError(f"지원하지 않는 리더 선출 저장소입니다: {url}")
+
+
+class LeaderElector:
+    def __init__(self, backend, name='upbit-scan', ttl=300, owner=None):
+        """
+        임대 기반 리더 선출과 (종목, 캔들) 단위 스캔 점유
+
+        리더 임대는 ttl 초 동안 유효하며 리더가 ttl/3 마다 갱신합니다. 리더가
+        죽으면 늦어도 ttl 초 뒤 대기 중인 인스턴스가 리더가 됩니다. ttl 을 캔들
+        주기보다 짧게 두면 한 캔들 안에 장애 조치가 끝납니다.
+
+        리더가 바뀌거나 한 번만 실행하는 인스턴스(GitHub Actions)가 끼어도 같은
+        캔들을 두 번 스캔하지 않도록, 종목별로 캔들이 끝날 때까지 유효한 점유
+        임대를 따로 잡습니다.
+
+        Args:
+            backend: acquire/release/holder 를 제공하는 임대 저장소
+            name (str): 리더 임대 이름 (같은 종목을 감시하는 배포끼리 같아야 함)
+            ttl (float): 리더 임대 유효 시간(초)
+            owner (str): 인스턴스 식별자 (기본값: 호스트:PID:난수)
+        """
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = False
+        self._stop = threading.Event()
+
+    def is_leader(self):
+        """
+        리더 임대를 획득하거나 갱신하고, 리더인지 반환합니다.
+        """
+        try:
+            leader = self.backend.acquire(self.name, self.owner, self.ttl)
+        except Exception as e:
+            # 저장소에 접근할 수 없으면 이중 스캔보다 대기를 택함
+            logger.error(f"리더 임대 갱신 실패: {e}")
+            leader = False
+        if leader != self.leader:
+            if leader:
+                logger.info(f"리더가 되었습니다 ({self.owner})")
+            else:
+                logger.warning(f"리더가 아닙니다 - 대기합니다 (현재 리더: {self.current_leader()})")
+        self.leader = leader
+        return leader
+
+    def current_leader(self):
+        try:
+            return self.backend.holder(self.name)
+        except Exception:
+            return None
+
+    def claim(self, market, candle_start, candle_seconds=3600):
+        """
+        (종목, 캔들) 스캔을 점유합니다. 이미 다른 인스턴스가 점유했으면 False.
+
+        같은 인스턴스는 같은 캔들을 다시 스캔할 수 있습니다. (예: 정시와 30분 스캔)
+        """
+        remaining = candle_start + candle_seconds - time.time()
+        try:
+            return self.backend.acquire(f"candle:{market}:{int(candle_start)}", self.owner, max(remaining, 1) + 60)
+        except Exception as e:
+            logger.error(f"캔들 점유 실패 ({market}): {e}")
+            return False
+
+    def unclaim(self, market, candle_start):
+        """
+        점유한 (종목, 캔들) 을 반납합니다.
+
+        분석에 실패한 종목을 캔들이 끝날 때까지 붙잡고 있지 않도록 해서 다른
+        인스턴스(장애 조치 후 새 리더 등)가 다시 시도할 수 있게 합니다.
+        """
+        try:
+            self.backend.release(f"candle:{market}:{int(candle_start)}", self.owner)
+        except Exception as e:
+            logger.error(f"캔들 점유 반납 실패 ({market}): {e}")
+
+    def start_heartbeat(self):
+        """
+        ttl/3 마다 리더 임대를 갱신(대기 중이면 획득 시도)하는 스레드를 시작합니다.
+        """
+        def beat():
+            while not self._stop.wait(self.ttl / 3):
+                self.is_leader()
+
+        thread = threading.Thread(target=beat, name='leader-heartbeat', daemon=True)
+        thread.start()
+        return thread
+
+    def release(self):
+        """
+        리더 임대를 반납합니다. (정상 종료 시 장애 조치 대기 없이 넘겨줌)
+        """
+        self._stop.set()
+        if self.leader:
+            try:
+                self.backend.release(self.name, self.owner)
+            except Exception as e:
+                logger.error(f"리더 임대 반납 실패: {e}")
+            self.leader = False
+
+
+def leader_from_env():
+    """
+    LEADER_BACKEND / LEADER_NAME / LEADER_TTL_SECONDS 환경변수로 리더 선출기를 만듭니다.
+
+    Returns:
+        LeaderElector: 설정되지 않았으면 None
+    """
+    backend = make_lease_backend(os.getenv('LEADER_BACKEND', ''))
+    if backend is None:
+        return None
+    return LeaderElector(
+        backend,
+        name=os.getenv('LEADER_NAME', 'upbit-scan'),
+        ttl=float(os.getenv('LEADER_TTL_SECONDS', '300'))
+    )
@@ -0,0 +1,137 @@
+import os
+import time
+import argparse
+import resource
+import multiprocessing
+import logging
+
+import requests
+
+from fake_upbit_server import FakeUpbitExchange, make_markets, start_server
+
+logger = logging.getLogger(__name__)
+
+
+def serve_exchange(market_count, options, urls):
+    """
+    별도 프로세스에서 대역 서버를 실행합니다. (분석기 측정에 섞이지 않도록)
+    """
+    exchange = FakeUpbitExchange(make_markets(market_count), now=1700000000, **options)
+    server, upbit_url, telegram_url = start_server(exchange)
+    urls.put((upbit_url, telegram_url))
+    while True:
+        time.sleep(3600)
+
+
+def scan_worker(markets, upbit_url, telegram_url, delay, rate_budget):
+    """
+    새 프로세스에서 check_conditions 를 한 번 실행하고 측정값을 반환합니다.
+    """
+    os.environ.update({
+        'UPBIT_API_URL': upbit_url,
+        'TELEGRAM_API_URL': telegram_url,
+        'TELEGRAM_BOT_TOKEN': os.getenv('TELEGRAM_BOT_TOKEN', 'loadtest'),
+        'TELEGRAM_CHAT_ID': os.getenv('TELEGRAM_CHAT_ID', '0'),
+        'REQUEST_DELAY_SECONDS': str(delay),
+        'RATE_BUDGET': str(rate_budget),
+        'SCAN_DEADLINE_SECONDS': '0',
+        'LOG_LEVEL': 'WARNING',
+    })
+    # 환경변수를 설정한 뒤 분석기를 불러옵니다.
+    from upbit_alert_cloud import UpbitTechnicalAnalyzer
+
+    analyzer = UpbitTechnicalAnalyzer()
+    analyzer.symbols = list(markets)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    results = analyzer.check_conditions()
+    duration = time.perf_counter() - started
+
+    return {
+        'duration': duration,
+        'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'scan_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024,
+        'analyzed': sum(1 for analysis in results.values() if analysis is not None),
+        'skipped': len(analyzer.skip_reasons),
+    }
+
+
+def run_scan(market_count, options, delay, rate_budget=0.0):
+    """
+    대역 서버를 상대로 check_conditions 를 한 번 실행하고 성능을 측정합니다.
+
+    Args:
+        market_count (int): 스캔할 마켓 수
+        options (dict): FakeUpbitExchange 지연/오류 주입 설정
+        delay (float): 종목 사이 대기(초, rate_budget 이 0 일 때)
+        rate_budget (float): 분석기의 초당 요청 예산 (0 이면 delay 사용)
+
+    Returns:
+        dict: 스캔 시간, 초당 요청 수, 최대 메모리, 분석 성공 수 등
+    """
+    context = multiprocessing.get_context('spawn')
+    urls = context.Queue()
+    server = context.Process(target=serve_exchange, args=(market_count, options, urls), daemon=True)
+    server.start()
+    try:
+        upbit_url, telegram_url = urls.get(timeout=30)
+        with context.Pool(1) as pool:
+            result = pool.apply(scan_worker, (make_markets(market_count), upbit_url, telegram_url,
+                                                   delay, rate_budget))
+
+        stats = requests.get(f"{telegram_url}/_fake/stats", timeout=10).json()
+        total_requests = sum(stats['requests'].values())
+        result.update({
+            'markets': market_count,
+            'requests': total_requests,
+            'rps': total_requests / result['duration'] if result['duration'] > 0 else 0,
+            'messages': stats['messages'],
+        })
+        return result
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    """
+    메인 함수 - 마켓 수별 종단 간 부하 테스트 실행
+    """
+    # 로깅 설정
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="업비트 분석기 종단 간 부하 테스트 (로컬 대역 서버 사용)")
+    parser.add_argument('--markets', default='10,100,500,2000', help="쉼표로 구분한 마켓 수")
+    parser.add_argument('--latency', type=float, default=0.0, help="대역 서버 응답 지연(초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="대역 서버 무작위 추가 지연(초)")
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help="429 응답 비율")
+    parser.add_argument('--error-ratio', type=float, default=0.0, help="500 응답 비율")
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help="종목 사이 대기(초). 분석기 자체 처리량을 재려면 0 (운영 기본값은 0.1)")
+    parser.add_argument('--rate-budget', type=float, default=0.0,
+                        help="분석기의 초당 요청 예산 (0 이면 --delay 사용, 운영 기본값은 8)")
+    args = parser.parse_args()
+
+    options = {
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'rate_limit_ratio': args.rate_limit_ratio,
+        'error_ratio': args.error_ratio,
+    }
+
+    pacing = f"요청 예산 초당 {args.rate_budget:g}회" if args.rate_budget > 0 else f"종목 사이 대기 {args.delay:g}초"
+    print(f"요청 속도: {pacing}")
+    print(f"{'마켓':>6} {'스캔(초)':>9} {'요청':>6} {'요청/초':>8} {'최대RSS(MB)':>12} {'스캔증가(MB)':>12} {'분석':>6} {'건너뜀':>6} {'알림':>4}")
+    for market_count in [int(value) for value in args.markets.split(',')]:
+        result = run_scan(market_count, options, args.delay, args.rate_budget)
+        print(f"{result['markets']:>6} {result['duration']:>9.2f} {result['requests']:>6} "
+              f"{result['rps']:>8.1f} {result['peak_mb']:>12.1f} {result['scan_mb']:>12.1f} "
+              f"{result['analyzed']:>6} {result['skipped']:>6} {result['messages']:>4}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except requests.exceptions.ConnectionError as e:
+        logger.error(f"대역 서버 연결 실패: {e}")
@@ -0,0 +1,286 @@
+import os
+import sys
+import json
+import gzip
+import time
+import uuid
+import queue
+import atexit
+import shutil
+import logging
+import functools
+import contextvars
+import logging.handlers
+from datetime import datetime
+
+# 현재 스캔의 상관관계 ID (스레드/코루틴별로 따로 유지)
+SCAN_ID = contextvars.ContextVar('scan_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord 기본 속성 (이 외의 속성은 extra 로 넘긴 값이므로 JSON 에 포함)
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'scan_id'}
+
+
+def new_scan_id():
+    return uuid.uuid4().hex[:12]
+
+
+def with_scan_id(func):
+    """
+    함수 실행 동안의 로그에 새 스캔 ID 를 붙이는 데코레이터입니다.
+
+    이미 스캔 ID 가 있는 호출 안에서 다시 불리면 바깥 ID 를 그대로 씁니다.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if SCAN_ID.get() is not None:
+            return func(*args, **kwargs)
+        token = SCAN_ID.set(new_scan_id())
+        try:
+            return func(*args, **kwargs)
+        finally:
+            SCAN_ID.reset(token)
+    return wrapper
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    로그 레코드를 한 줄짜리 JSON 으로 만듭니다.
+
+    time, level, logger, message, scan_id 와 extra 로 넘긴 값을 담고,
+    예외가 있으면 exc 에 트레이스백을 넣습니다.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        scan_id = getattr(record, 'scan_id', None)
+        if scan_id is not None:
+            entry['scan_id'] = scan_id
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler:
+    def __init__(self, per_second=50.0, burst=None):
+        """
+        DEBUG 로그를 초당 per_second 건으로 제한하는 토큰 버킷
+
+        Args:
+            per_second (float): 초당 허용 건수 (0 이면 제한 없음)
+            burst (float): 한 번에 허용하는 최대 건수 (기본값: per_second)
+        """
+        self.per_second = per_second
+        self.burst = burst if burst is not None else max(per_second, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def allow(self):
+        if self.per_second <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue, sampler=None):
+        """
+        레코드를 큐에 넣기만 하는 논블로킹 핸들러
+
+        메시지 포맷은 리스너 스레드에서 하므로 logger.debug("... %s", value) 처럼
+        인자를 넘기면 호출한 스레드는 문자열을 만들지 않습니다. 큐가 가득 차면
+        기다리지 않고 버린 건수만 셉니다. 큐가 절반 이상 차 있거나 초당 허용량을
+        넘긴 DEBUG 로그는 샘플링에서 제외합니다.
+
+        Args:
+            log_queue (queue.Queue): 크기 제한이 있는 큐
+            sampler (DebugSampler): DEBUG 로그 샘플러
+        """
+        super().__init__(log_queue)
+        self.sampler = sampler or DebugSampler()
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def handle(self, record):
+        if record.levelno < logging.INFO:
+            maxsize = self.queue.maxsize
+            if (maxsize > 0 and self.queue.qsize() * 2 >= maxsize) or not self.sampler.allow():
+                self.sampled_out += 1
+                return False
+        return super().handle(record)
+
+    def prepare(self, record):
+        # 같은 프로세스의 스레드 큐라 레코드를 그대로 넘기고, 스캔 ID 만 호출 시점에 붙임
+        if not hasattr(record, 'scan_id'):
+            record.scan_id = SCAN_ID.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogListener(logging.handlers.QueueListener):
+    def __init__(self, log_queue, handlers, source=None, report_interval=60.0):
+        """
+        큐의 레코드를 파일/콘솔 핸들러로 내보내는 리스너 스레드
+
+        버리거나 샘플링에서 제외한 로그가 생기면 report_interval 초마다 한 번
+        경고로 남깁니다.
+
+        Args:
+            log_queue (queue.Queue): AsyncQueueHandler 와 공유하는 큐
+            handlers (list): 실제 출력 핸들러
+            source (AsyncQueueHandler): 버림/샘플링 건수를 읽을 핸들러
+            report_interval (float): 유실 보고 최소 간격(초)
+        """
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.source = source
+        self.report_interval = report_interval
+        self.reported = (0, 0)
+        self.reported_at = time.monotonic()
+
+    def enqueue_sentinel(self):
+        # 큐가 가득 차 있어도 리스너가 비우는 중이므로 기다렸다가 넣음
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+    def handle(self, record):
+        super().handle(record)
+        if self.source is None or time.monotonic() - self.reported_at < self.report_interval:
+            return
+        counts = (self.source.dropped, self.source.sampled_out)
+        if counts != self.reported:
+            dropped, sampled = counts[0] - self.reported[0], counts[1] - self.reported[1]
+            self.reported = counts
+            super().handle(logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "로그 큐 포화로 %d건 버림, DEBUG 로그 %d건 샘플링 제외", (dropped, sampled), None
+            ))
+        self.reported_at = time.monotonic()
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, interval=86400, backup_count=7, encoding='utf-8'):
+        """
+        크기 또는 시간 기준으로 교체하고 지난 파일은 gzip 으로 압축하는 파일 핸들러
+
+        파일이 max_bytes 를 넘거나 interval 초가 지나면 교체합니다. 보관 파일은
+        upbit_alert.log.1.gz ~ .{backup_count}.gz 이며 그보다 오래된 파일은 지우므로
+        디스크 사용량은 대략 max_bytes × (backup_count + 1) 이하입니다.
+
+        Args:
+            filename (str): 로그 파일 경로
+            max_bytes (int): 교체 기준 크기 (0 이면 크기 기준 사용 안 함)
+            interval (float): 교체 기준 시간(초, 0 이면 시간 기준 사용 안 함)
+            backup_count (int): 보관할 압축 파일 수
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.interval = interval
+        # 기존 파일은 마지막 수정 시각부터 계산 (오래 쓰지 않은 파일은 첫 기록 때 교체)
+        started = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = started + interval if interval > 0 else None
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self.compress
+
+    @staticmethod
+    def compress(source, dest):
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() > 0:
+                return 1
+            # 빈 파일은 교체하지 않고 다음 주기로 넘김
+            self.rollover_at = time.time() + self.interval
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval > 0:
+            self.rollover_at = time.time() + self.interval
+
+
+def setup_logging(level=None, log_path=None, log_format=None, max_bytes=None, rotate_hours=None,
+                  backup_count=None, queue_size=None, debug_per_second=None):
+    """
+    루트 로거를 큐 기반 비동기 파이프라인으로 설정합니다.
+
+    호출한 스레드는 레코드를 큐에 넣기만 하고 파일 쓰기/압축/콘솔 출력은 리스너
+    스레드가 합니다. 인자를 주지 않으면 환경변수(LOG_LEVEL, LOG_PATH, LOG_FORMAT,
+    LOG_MAX_MB, LOG_ROTATE_HOURS, LOG_BACKUP_COUNT, LOG_QUEUE_SIZE,
+    LOG_DEBUG_PER_SECOND)를 사용합니다. 종료 시 남은 로그를 모두 기록합니다.
+
+    Args:
+        level (str): 로그 레벨 (기본값: INFO)
+        log_path (str): 로그 파일 경로 (빈 문자열이면 파일 기록 안 함)
+        log_format (str): 파일 형식 json(JSON lines) 또는 text
+        max_bytes (int): 파일 교체 크기
+        rotate_hours (float): 파일 교체 주기(시간)
+        backup_count (int): 보관할 압축 파일 수
+        queue_size (int): 큐 최대 크기
+        debug_per_second (float): 초당 허용 DEBUG 로그 수 (0 이면 제한 없음)
+
+    Returns:
+        LogListener: 실행 중인 리스너 (stop() 으로 남은 로그 기록 후 종료)
+    """
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    log_path = log_path if log_path is not None else os.getenv('LOG_PATH', 'upbit_alert.log')
+    log_format = log_format or os.getenv('LOG_FORMAT', 'json')
+    if log_format not in ('json', 'text'):
+        raise ValueError(f"LOG_FORMAT 은 json 또는 text 여야 합니다: {log_format}")
+    max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv('LOG_MAX_MB', '10')) * 1024 * 1024)
+    rotate_hours = rotate_hours if rotate_hours is not None else float(os.getenv('LOG_ROTATE_HOURS', '24'))
+    backup_count = backup_count if backup_count is not None else int(os.getenv('LOG_BACKUP_COUNT', '7'))
+    queue_size = queue_size if queue_size is not None else int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    debug_per_second = (debug_per_second if debug_per_second is not None
+                        else float(os.getenv('LOG_DEBUG_PER_SECOND', '50')))
+
+    handlers = []
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers.append(console)
+    if log_path:
+        file_handler = CompressingRotatingFileHandler(log_path, max_bytes=max_bytes,
+                                                      interval=rotate_hours * 3600, backup_count=backup_count)
+        file_handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = AsyncQueueHandler(log_queue, DebugSampler(debug_per_second))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level))
+
+    listener = LogListener(log_queue, handlers, source=queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,143 @@
+import warnings
+
+import numpy as np
+
+
+class MarketStats:
+    def __init__(self, symbols, correlation, market_return, beta, r_squared, residual_z,
+                 idiosyncratic, market_driven, breadth):
+        """
+        시장 전체 상관관계/시장 폭 계산 결과
+
+        Args:
+            symbols (list): 종목 목록 (행 순서)
+            correlation (np.ndarray): (종목, 종목) 수익률 상관계수 행렬
+            market_return (float): 마지막 캔들의 시장 수익률 (종목 평균 로그 수익률)
+            beta (np.ndarray): 종목별 시장 베타
+            r_squared (np.ndarray): 종목별 시장 설명력 (0~1)
+            residual_z (np.ndarray): 마지막 캔들 잔차 수익률의 z-score
+            idiosyncratic (np.ndarray): 시장과 무관한 개별 움직임이면 True
+            market_driven (np.ndarray): 시장 설명력이 높고 개별 움직임이 아니면 True
+            breadth (dict): 시장 폭 지표 (비율은 0~100)
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.correlation = correlation
+        self.market_return = market_return
+        self.beta = beta
+        self.r_squared = r_squared
+        self.residual_z = residual_z
+        self.idiosyncratic = idiosyncratic
+        self.market_driven = market_driven
+        self.breadth = breadth
+
+    def symbol(self, symbol):
+        """
+        한 종목의 시장 관련 지표를 반환합니다. (계산되지 않은 종목은 None)
+        """
+        i = self.index.get(symbol)
+        if i is None or np.isnan(self.r_squared[i]):
+            return None
+        return {
+            'beta': float(self.beta[i]),
+            'r_squared': float(self.r_squared[i]),
+            'residual_z': float(self.residual_z[i]),
+            'idiosyncratic': bool(self.idiosyncratic[i]),
+            'market_driven': bool(self.market_driven[i]),
+        }
+
+    def most_correlated(self, symbol, k=5):
+        """
+        한 종목과 상관계수가 가장 높은 종목 k 개를 반환합니다.
+        """
+        i = self.index[symbol]
+        row = np.where(np.isnan(self.correlation[i]), -np.inf, self.correlation[i])
+        row[i] = -np.inf
+        k = min(k, len(row) - 1)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(row, len(row) - k)[-k:]
+        candidates = candidates[np.argsort(row[candidates])[::-1]]
+        return [(self.symbols[j], float(row[j])) for j in candidates if np.isfinite(row[j])]
+
+
+def compute_market_stats(symbols, close, window=48, band_period=20, std_dev=2,
+                         band_width_threshold=0.3, residual_threshold=2.0, r_squared_threshold=0.5):
+    """
+    정렬된 종가 행렬 하나로 상관관계, 시장 폭, 종목별 시장 동조 여부를 계산합니다.
+
+    최근 window 개 로그 수익률을 종목별로 표준화한 Z 로 상관계수 행렬을 Z·Zᵀ/W
+    한 번의 행렬곱으로 구합니다. 시장 수익률은 종목 평균 수익률이며, 종목별
+    수익률을 시장 수익률에 회귀한 잔차가 평소보다 크면(|z| ≥ residual_threshold)
+    시장과 무관한 개별 움직임으로, 아니면서 시장 설명력(R²)이 r_squared_threshold
+    이상이면 시장 동조로 봅니다. 구간에 빈 값이 있는 종목은 제외(NaN)합니다.
+
+    Args:
+        symbols (list): 종목 목록
+        close (np.ndarray): (종목, 시간) 종가 행렬 (마지막 열이 현재 캔들)
+        window (int): 상관관계 계산 수익률 개수
+        band_period (int): 볼린저 밴드 기간
+        std_dev (float): 볼린저 밴드 표준편차 배수
+        band_width_threshold (float): 수축으로 볼 밴드폭(%)
+        residual_threshold (float): 개별 움직임으로 볼 잔차 z-score
+        r_squared_threshold (float): 시장 동조로 볼 최소 설명력
+
+    Returns:
+        MarketStats: 계산 결과
+    """
+    close = np.asarray(close, dtype=np.float64)
+    count = close.shape[0]
+    window = min(window, close.shape[1] - 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        # 수익률 표준화 (구간에 빈 값이 있는 종목은 NaN 행)
+        returns = np.diff(np.log(close[:, -window - 1:]), axis=1)
+        valid = ~np.isnan(returns).any(axis=1)
+        returns[~valid] = np.nan
+        demeaned = returns - returns.mean(axis=1, keepdims=True)
+        std = demeaned.std(axis=1, keepdims=True)
+        z = np.where(std > 0, demeaned / std, np.nan)
+        correlation = z @ z.T / window
+
+        # 시장 수익률과 종목별 베타/설명력
+        market = np.nanmean(returns, axis=0)
+        market_demeaned = market - market.mean()
+        market_var = market_demeaned @ market_demeaned
+        covariance = demeaned @ market_demeaned
+        beta = covariance / market_var
+        r_squared = covariance ** 2 / (market_var * (demeaned ** 2).sum(axis=1))
+
+        # 마지막 캔들 잔차 z-score
+        residual = demeaned - beta[:, None] * market_demeaned
+        residual_std = residual.std(axis=1, ddof=1)
+        residual_z = np.where(residual_std > 0, residual[:, -1] / residual_std, np.nan)
+        idiosyncratic = (np.abs(residual_z) >= residual_threshold) & valid
+        market_driven = ~idiosyncratic & (r_squared >= r_squared_threshold)
+
+        # 시장 폭: 종목별 볼린저 밴드 (마지막 캔들 기준)
+        recent = close[:, -band_period:]
+        middle = recent.mean(axis=1)
+        band_std = recent.std(axis=1, ddof=1)
+        upper = middle + std_dev * band_std
+        lower = middle - std_dev * band_std
+        band_width = (upper - lower) / middle * 100
+        last = close[:, -1]
+        banded = ~np.isnan(band_width)
+        total = max(int(banded.sum()), 1)
+        off_diagonal = correlation[np.triu_indices(count, k=1)]
+
+        breadth = {
+            'markets': int(banded.sum()),
+            'above_upper': float((last[banded] > upper[banded]).sum() / total * 100),
+            'below_lower': float((last[banded] < lower[banded]).sum() / total * 100),
+            'squeeze': float((band_width[banded] <= band_width_threshold).sum() / total * 100),
+            'advancing': float((returns[valid, -1] > 0).sum() / max(int(valid.sum()), 1) * 100),
+            'mean_correlation': float(np.nanmean(off_diagonal)) if len(off_diagonal) else float('nan'),
+        }
+
+    return MarketStats(
+        symbols, correlation, float(market[-1]) if len(market) else float('nan'),
+        beta, r_squared, residual_z, idiosyncratic, market_driven, breadth
+    )
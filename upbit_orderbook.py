@@ -0,0 +1,155 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# /orderbook 은 markets 에 여러 마켓을 쉼표로 이어 받습니다.
+# 마켓 코드가 10자 안팎이라 150개여도 URL 이 2KB 를 넘지 않습니다.
+DEFAULT_BATCH_SIZE = 150
+
+# 업비트 호가는 매수/매도 각각 최대 15단계
+MAX_DEPTH = 15
+
+
+class OrderbookSnapshot:
+    def __init__(self, symbols, timestamp, bid_price, bid_size, ask_price, ask_size, levels=5):
+        """
+        여러 마켓의 호가를 (마켓, 호가 단계) 배열로 모아 불균형/스프레드를 계산합니다.
+
+        호가가 15단계보다 적은 마켓은 남는 칸이 NaN 이며 계산에서 빠집니다.
+
+        Args:
+            symbols (list): 마켓 목록 (행 순서)
+            timestamp (np.ndarray): 마켓별 호가 시각 (ms)
+            bid_price (np.ndarray): (마켓, 단계) 매수 호가
+            bid_size (np.ndarray): (마켓, 단계) 매수 잔량
+            ask_price (np.ndarray): (마켓, 단계) 매도 호가
+            ask_size (np.ndarray): (마켓, 단계) 매도 잔량
+            levels (int): 불균형 계산에 쓰는 최우선 호가부터의 단계 수
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.timestamp = timestamp
+        self.bid_price = bid_price
+        self.bid_size = bid_size
+        self.ask_price = ask_price
+        self.ask_size = ask_size
+        self.levels = levels
+        (self.mid, self.spread, self.bid_depth, self.ask_depth,
+         self.imbalance) = orderbook_stats(bid_price, bid_size, ask_price, ask_size, levels)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def symbol(self, symbol):
+        """
+        한 마켓의 호가 지표를 반환합니다. (호가가 없거나 비어 있으면 None)
+        """
+        i = self.index.get(symbol)
+        if i is None or np.isnan(self.imbalance[i]):
+            return None
+        return {
+            'mid': float(self.mid[i]),
+            'spread': float(self.spread[i]),
+            'bid_depth': float(self.bid_depth[i]),
+            'ask_depth': float(self.ask_depth[i]),
+            'imbalance': float(self.imbalance[i]),
+            'levels': self.levels,
+        }
+
+
+def orderbook_stats(bid_price, bid_size, ask_price, ask_size, levels=5):
+    """
+    (마켓, 단계) 호가 배열에서 마켓별 지표를 한 번에 계산합니다.
+
+    잔량은 마켓마다 단위가 달라 호가를 곱한 원화 금액으로 비교합니다.
+
+    Args:
+        bid_price, bid_size, ask_price, ask_size (np.ndarray): (마켓, 단계) 배열
+        levels (int): 최우선 호가부터 합산할 단계 수
+
+    Returns:
+        tuple: (중간가, 스프레드 %, 매수 잔량 금액, 매도 잔량 금액, 불균형).
+            불균형은 (매수 - 매도) / (매수 + 매도) 로 -1(매도 우위) ~ 1(매수 우위)
+    """
+    bid_price = np.asarray(bid_price, dtype=np.float64)
+    ask_price = np.asarray(ask_price, dtype=np.float64)
+    bid_value = bid_price[:, :levels] * np.asarray(bid_size, dtype=np.float64)[:, :levels]
+    ask_value = ask_price[:, :levels] * np.asarray(ask_size, dtype=np.float64)[:, :levels]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mid = (bid_price[:, 0] + ask_price[:, 0]) / 2
+        spread = np.where(mid > 0, (ask_price[:, 0] - bid_price[:, 0]) / mid * 100, np.nan)
+
+        # 한쪽 호가가 통째로 비어 있으면 (NaN 만) 불균형을 계산하지 않음
+        bid_empty = np.all(np.isnan(bid_value), axis=1)
+        ask_empty = np.all(np.isnan(ask_value), axis=1)
+        bid_depth = np.where(bid_empty, np.nan, np.nansum(bid_value, axis=1))
+        ask_depth = np.where(ask_empty, np.nan, np.nansum(ask_value, axis=1))
+        total = bid_depth + ask_depth
+        imbalance = np.where(total > 0, (bid_depth - ask_depth) / total, np.nan)
+    return mid, spread, bid_depth, ask_depth, imbalance
+
+
+def parse_orderbooks(books, levels=5, depth=MAX_DEPTH):
+    """
+    /orderbook 응답 목록을 OrderbookSnapshot 으로 만듭니다.
+
+    Args:
+        books (list): /orderbook 응답 (마켓별 orderbook_units 포함)
+        levels (int): 불균형 계산 단계 수
+        depth (int): 배열에 담을 최대 단계 수
+
+    Returns:
+        OrderbookSnapshot: 마켓별 호가 배열과 지표
+    """
+    shape = (len(books), depth)
+    bid_price, bid_size = np.full(shape, np.nan), np.full(shape, np.nan)
+    ask_price, ask_size = np.full(shape, np.nan), np.full(shape, np.nan)
+    timestamp = np.zeros(len(books), dtype=np.int64)
+
+    for i, book in enumerate(books):
+        units = book.get('orderbook_units') or []
+        units = units[:depth]
+        if units:
+            n = len(units)
+            values = np.array([(unit['bid_price'], unit['bid_size'], unit['ask_price'], unit['ask_size'])
+                               for unit in units], dtype=np.float64)
+            bid_price[i, :n], bid_size[i, :n], ask_price[i, :n], ask_size[i, :n] = values.T
+        timestamp[i] = book.get('timestamp') or 0
+
+    return OrderbookSnapshot([book['market'] for book in books], timestamp,
+                             bid_price, bid_size, ask_price, ask_size, levels=levels)
+
+
+def fetch_orderbooks(fetcher, base_url, markets, batch_size=DEFAULT_BATCH_SIZE, levels=5, deadline=None):
+    """
+    /orderbook 을 batch_size 개 마켓씩 묶어 요청해 전체 마켓 호가를 한 번에 받습니다.
+
+    실패한 묶음은 로그만 남기고 건너뛰므로 그 마켓들은 결과에 없습니다.
+
+    Args:
+        fetcher (ResilientFetcher): 재시도/서킷 브레이커가 적용된 요청기
+        base_url (str): 업비트 API 주소
+        markets (list): 조회할 마켓 목록
+        batch_size (int): 요청 하나에 담을 마켓 수
+        levels (int): 불균형 계산 단계 수
+        deadline (ScanDeadline): 스캔 마감 시간
+
+    Returns:
+        OrderbookSnapshot: 받은 마켓들의 호가 지표
+    """
+    books = []
+    for start in range(0, len(markets), batch_size):
+        batch = markets[start:start + batch_size]
+        try:
+            books.extend(fetcher.get_json(
+                'orderbook',
+                f"{base_url}/orderbook",
+                params={'markets': ','.join(batch)},
+                deadline=deadline
+            ))
+        except Exception as e:
+            logger.error(f"호가 조회 실패 ({len(batch)}개 마켓, {batch[0]} 등): {e}")
+    return parse_orderbooks(books, levels=levels)
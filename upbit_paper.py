@@ -0,0 +1,523 @@
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from upbit_volume import rolling_volume_ratio
+from upbit_kernels import wilder_rsi, RSI_METHODS
+
+logger = logging.getLogger(__name__)
+
+# 청산 사유
+EXIT_TAKE_PROFIT = 1
+EXIT_STOP_LOSS = 2
+EXIT_TIMEOUT = 3
+EXIT_END = 4  # 기간 끝까지 보유 (마지막 종가로 평가)
+
+EXIT_REASONS = {
+    EXIT_TAKE_PROFIT: '익절',
+    EXIT_STOP_LOSS: '손절',
+    EXIT_TIMEOUT: '보유 기간 만료',
+    EXIT_END: '기간 종료',
+}
+
+SIDES = ('any', 'upper', 'lower')
+
+TRADE_DTYPE = np.dtype([
+    ('entry_index', np.int64),
+    ('exit_index', np.int64),
+    ('entry_time', np.int64),
+    ('exit_time', np.int64),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('return', np.float64),
+    ('reason', np.int8),
+])
+
+
+class TradeRules:
+    def __init__(self, fee=0.0005, slippage=0.0005, take_profit=0.02, stop_loss=0.01, max_hold_bars=0):
+        """
+        모의 매매 체결/청산 규칙 (실시간과 과거 재생이 같은 규칙을 사용)
+
+        Args:
+            fee (float): 매수/매도 각각의 수수료율 (업비트 KRW 마켓 0.05%)
+            slippage (float): 체결 가격 불리 비율 (매수는 높게, 매도는 낮게 체결)
+            take_profit (float): 익절 수익률 (진입 체결가 기준, 0 이면 사용 안 함)
+            stop_loss (float): 손절 손실률 (진입 체결가 기준, 0 이면 사용 안 함)
+            max_hold_bars (int): 최대 보유 캔들 수 (0 이면 제한 없음)
+        """
+        self.fee = fee
+        self.slippage = slippage
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.max_hold_bars = max_hold_bars
+
+    def buy_price(self, price):
+        return price * (1 + self.slippage)
+
+    def sell_price(self, price):
+        return price * (1 - self.slippage)
+
+    def levels(self, entry_price):
+        """
+        진입 체결가의 (익절가, 손절가). 사용하지 않는 쪽은 inf / -inf
+        """
+        take_profit = entry_price * (1 + self.take_profit) if self.take_profit > 0 else np.inf
+        stop_loss = entry_price * (1 - self.stop_loss) if self.stop_loss > 0 else -np.inf
+        return take_profit, stop_loss
+
+    def net_return(self, entry_price, exit_price):
+        """
+        수수료를 뺀 거래 수익률
+        """
+        return exit_price * (1 - self.fee) / (entry_price * (1 + self.fee)) - 1
+
+
+def rolling_mean_std(values, window):
+    """
+    구간 평균과 표본 표준편차 (처음 window-1 개는 NaN, pandas rolling 과 같은 값)
+    """
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        mean[window - 1:] = windows.mean(axis=1)
+        std[window - 1:] = windows.std(axis=1, ddof=1)
+    return mean, std
+
+
+def alert_signals(close, volume=None, rsi_period=14, band_period=20, std_dev=2,
+                  rsi_threshold=50, band_width_threshold=0.3,
+                  volume_window=20, volume_spike_ratio=0, volume_spike_mode='and', side='any',
+                  rsi_method='sma'):
+    """
+    evaluate_conditions 와 같은 알림 규칙을 전체 캔들에 한 번에 적용합니다.
+
+    RSI(단순 이동평균 또는 Wilder 평활)와 볼린저 밴드를 calculate_rsi/
+    calculate_bollinger_bands 와 같은 방식으로 계산합니다. 실시간 스캔은 진행 중인 캔들의 현재가로 판단하지만
+    과거 재생은 완성된 캔들의 종가로 판단합니다.
+
+    Args:
+        close (np.ndarray): 종가
+        volume (np.ndarray): 거래량 (거래량 급증 조건을 쓸 때만 필요)
+        rsi_period (int): RSI 기간
+        band_period (int): 볼린저 밴드 기간
+        std_dev (float): 볼린저 밴드 표준편차 배수
+        rsi_threshold (float): RSI 상한
+        band_width_threshold (float): 밴드폭 상한(%)
+        volume_window (int): 거래량 비교 캔들 수
+        volume_spike_ratio (float): 거래량 급증 배수 (0 이면 사용 안 함)
+        volume_spike_mode (str): and (돌파와 함께) 또는 alone (급증만으로도)
+        side (str): any (모든 알림), upper (상단 돌파만), lower (하단 돌파만)
+        rsi_method (str): sma 또는 wilder (RSI_METHOD 와 같음)
+
+    Returns:
+        np.ndarray: 캔들별 진입 신호 (bool)
+    """
+    if side not in SIDES:
+        raise ValueError(f"side 는 {', '.join(SIDES)} 중 하나여야 합니다: {side}")
+    if rsi_method not in RSI_METHODS:
+        raise ValueError(f"rsi_method 는 {' 또는 '.join(RSI_METHODS)} 이어야 합니다: {rsi_method}")
+    close = np.asarray(close, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if rsi_method == 'wilder':
+            rsi = wilder_rsi(close, rsi_period)
+        else:
+            delta = np.diff(close, prepend=np.nan)
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+            avg_gain, _ = rolling_mean_std(gain, rsi_period)
+            avg_loss, _ = rolling_mean_std(loss, rsi_period)
+            rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+        middle, std = rolling_mean_std(close, band_period)
+        upper = middle + std * std_dev
+        lower = middle - std * std_dev
+        band_width = (upper - lower) / middle * 100
+
+        upper_breakout = close > upper
+        lower_breakout = close < lower
+        alert = (rsi <= rsi_threshold) & (band_width <= band_width_threshold) & (upper_breakout | lower_breakout)
+
+        if volume_spike_ratio > 0:
+            if volume is None:
+                raise ValueError("거래량 급증 조건에는 거래량이 필요합니다.")
+            spike = rolling_volume_ratio(volume, volume_window) >= volume_spike_ratio
+            alert = (alert & spike) if volume_spike_mode == 'and' else (alert | spike)
+
+    if side == 'upper':
+        return alert & upper_breakout
+    if side == 'lower':
+        return alert & lower_breakout
+    return alert
+
+
+def find_exit(high, low, start, last, take_profit, stop_loss, chunk=64):
+    """
+    start~last 캔들 중 익절가/손절가에 처음 닿는 캔들을 찾습니다.
+
+    캔들마다 반복하지 않고 점점 커지는 구간 단위로 배열 비교를 합니다.
+
+    Returns:
+        int: 캔들 인덱스 (없으면 -1)
+    """
+    while start <= last:
+        end = min(start + chunk, last + 1)
+        hit = (high[start:end] >= take_profit) | (low[start:end] <= stop_loss)
+        k = int(hit.argmax())
+        if hit[k]:
+            return start + k
+        start = end
+        chunk *= 4
+    return -1
+
+
+def simulate(timestamp, open_, high, low, close, signals, rules):
+    """
+    진입 신호 배열로 한 종목의 모의 매매를 재생합니다.
+
+    신호가 난 캔들의 다음 캔들 시가에 진입하고, 보유 중에는 새 신호를 무시합니다.
+    캔들 단위가 아니라 진입/청산 이벤트 단위로 진행하므로 신호가 드문 만큼 빠릅니다.
+    한 캔들에서 익절가와 손절가에 모두 닿으면 손절로 봅니다. (보수적)
+    시가가 이미 손절가/익절가를 넘어 시작하면 시가에 체결합니다.
+
+    Args:
+        timestamp, open_, high, low, close (np.ndarray): 오래된 것부터 정렬된 캔들
+        signals (np.ndarray): 캔들별 진입 신호 (alert_signals 결과)
+        rules (TradeRules): 체결/청산 규칙
+
+    Returns:
+        np.ndarray: TRADE_DTYPE 거래 목록
+    """
+    count = len(close)
+    signal_index = np.flatnonzero(np.asarray(signals[:-1], dtype=bool))
+    trades = np.empty(len(signal_index), dtype=TRADE_DTYPE)
+    n_trades = 0
+
+    position = 0
+    while position < len(signal_index):
+        entry = int(signal_index[position]) + 1
+        entry_price = rules.buy_price(float(open_[entry]))
+        take_profit, stop_loss = rules.levels(entry_price)
+        last = count - 1
+        if rules.max_hold_bars:
+            last = min(last, entry + rules.max_hold_bars - 1)
+
+        exit_index = find_exit(high, low, entry, last, take_profit, stop_loss)
+        if exit_index < 0:
+            exit_index = last
+            raw_exit = float(close[last])
+            reason = EXIT_END if last == count - 1 else EXIT_TIMEOUT
+        elif low[exit_index] <= stop_loss:
+            raw_exit = min(float(open_[exit_index]), stop_loss)
+            reason = EXIT_STOP_LOSS
+        else:
+            raw_exit = max(float(open_[exit_index]), take_profit)
+            reason = EXIT_TAKE_PROFIT
+        exit_price = rules.sell_price(raw_exit)
+
+        trades[n_trades] = (entry, exit_index, timestamp[entry], timestamp[exit_index],
+                            entry_price, exit_price, rules.net_return(entry_price, exit_price), reason)
+        n_trades += 1
+        # 청산 캔들 종가의 신호부터 다시 진입 가능
+        position = int(np.searchsorted(signal_index, exit_index, side='left'))
+
+    return trades[:n_trades]
+
+
+def summarize(trades, order_amount=1_000_000):
+    """
+    거래 목록의 성과를 요약합니다. (거래마다 같은 금액을 주문한다고 가정)
+
+    Args:
+        trades (np.ndarray): TRADE_DTYPE 거래 목록 (여러 종목이면 이어 붙인 것)
+        order_amount (float): 거래당 주문 금액(원)
+
+    Returns:
+        dict: 거래 수, 승률(%), 평균 수익률(%), 손익(원), 최대 낙폭(원), 손익비, 청산 사유별 거래 수
+    """
+    if len(trades) == 0:
+        return {'trades': 0, 'win_rate': 0.0, 'avg_return': 0.0, 'pnl': 0.0,
+                'max_drawdown': 0.0, 'profit_factor': float('nan'), 'reasons': {}}
+    returns = trades['return']
+    pnl = returns * order_amount
+    # 청산 시각 순 누적 손익으로 최대 낙폭 계산
+    equity = np.cumsum(pnl[np.argsort(trades['exit_time'], kind='stable')])
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    losses = -pnl[pnl < 0].sum()
+    reasons, counts = np.unique(trades['reason'], return_counts=True)
+    return {
+        'trades': len(trades),
+        'win_rate': float((returns > 0).mean() * 100),
+        'avg_return': float(returns.mean() * 100),
+        'pnl': float(pnl.sum()),
+        'max_drawdown': float(drawdown.max()),
+        'profit_factor': float(pnl[pnl > 0].sum() / losses) if losses > 0 else float('inf'),
+        'reasons': {EXIT_REASONS[int(reason)]: int(n) for reason, n in zip(reasons, counts)},
+    }
+
+
+class PaperTrader:
+    def __init__(self, rules, order_amount=1_000_000, side='any', bar_seconds=3600, state_path=None):
+        """
+        실시간 스캔 결과(check_conditions 의 (분석, 조건) 목록)로 모의 매매를 진행합니다.
+
+        스캔마다 보유 종목은 현재가로 익절/손절/보유 기간을 확인하고, 알림 조건을
+        만족한 미보유 종목은 현재가에 진입합니다. 포지션과 누적 손익은 state_path 에
+        저장해 재시작해도 이어집니다.
+
+        Args:
+            rules (TradeRules): 체결/청산 규칙
+            order_amount (float): 거래당 주문 금액(원)
+            side (str): any, upper, lower (진입할 알림 종류)
+            bar_seconds (int): 캔들 길이(초). 최대 보유 캔들 수를 시간으로 환산
+            state_path (str): 상태 저장 파일 (None 이면 저장 안 함)
+        """
+        if side not in SIDES:
+            raise ValueError(f"side 는 {', '.join(SIDES)} 중 하나여야 합니다: {side}")
+        self.rules = rules
+        self.order_amount = order_amount
+        self.side = side
+        self.bar_seconds = bar_seconds
+        self.state_path = state_path
+        self.positions = {}
+        self.trades = []
+        self.last_prices = {}
+        # 스캔(on_scan)과 봇의 /paper 명령(summary)이 다른 스레드에서 상태를 읽고 쓰므로 잠금으로 보호
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.positions = state.get('positions', {})
+            self.trades = state.get('trades', [])
+            logger.info(f"모의 매매 상태 불러옴: 보유 {len(self.positions)}개, 거래 {len(self.trades)}건")
+        except (OSError, ValueError) as e:
+            logger.error(f"모의 매매 상태를 읽을 수 없습니다: {e}")
+
+    def save(self):
+        if not self.state_path:
+            return
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'positions': self.positions, 'trades': self.trades}, f)
+        os.replace(temp_path, self.state_path)
+
+    def wants_entry(self, conditions):
+        if not conditions.get('alert'):
+            return False
+        if self.side == 'upper':
+            return bool(conditions.get('upper_breakout'))
+        if self.side == 'lower':
+            return bool(conditions.get('lower_breakout'))
+        return True
+
+    def on_scan(self, records, timestamp=None):
+        """
+        한 번의 스캔 결과로 청산과 진입을 처리합니다.
+
+        Args:
+            records (list): (analysis, conditions) 목록
+            timestamp (float): 스캔 시각 epoch 초 (기본값: 현재)
+
+        Returns:
+            list: 이번 스캔의 체결 (dict: action, symbol, price, return)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            fills = []
+            for analysis, conditions in records:
+                if analysis is None:
+                    continue
+                symbol = analysis['symbol']
+                price = float(analysis['current_price'])
+                self.last_prices[symbol] = price
+
+                position = self.positions.get(symbol)
+                if position is not None:
+                    reason = None
+                    if price <= position['stop_loss']:
+                        reason = EXIT_STOP_LOSS
+                    elif price >= position['take_profit']:
+                        reason = EXIT_TAKE_PROFIT
+                    elif (self.rules.max_hold_bars
+                          and timestamp - position['entry_time'] >= self.rules.max_hold_bars * self.bar_seconds):
+                        reason = EXIT_TIMEOUT
+                    if reason is not None:
+                        exit_price = self.rules.sell_price(price)
+                        trade_return = self.rules.net_return(position['entry_price'], exit_price)
+                        self.trades.append({
+                            'symbol': symbol,
+                            'entry_time': position['entry_time'],
+                            'exit_time': timestamp,
+                            'entry_price': position['entry_price'],
+                            'exit_price': exit_price,
+                            'return': trade_return,
+                            'reason': reason,
+                        })
+                        del self.positions[symbol]
+                        fills.append({'action': 'sell', 'symbol': symbol, 'price': exit_price,
+                                      'return': trade_return, 'reason': EXIT_REASONS[reason]})
+
+                if symbol not in self.positions and self.wants_entry(conditions):
+                    entry_price = self.rules.buy_price(price)
+                    take_profit, stop_loss = self.rules.levels(entry_price)
+                    self.positions[symbol] = {
+                        'entry_time': timestamp,
+                        'entry_price': entry_price,
+                        'quantity': self.order_amount / entry_price,
+                        'take_profit': take_profit,
+                        'stop_loss': stop_loss,
+                    }
+                    fills.append({'action': 'buy', 'symbol': symbol, 'price': entry_price, 'return': None})
+
+            for fill in fills:
+                if fill['action'] == 'buy':
+                    logger.info(f"모의 매수: {fill['symbol']} {fill['price']:,.2f}원")
+                else:
+                    logger.info(f"모의 매도: {fill['symbol']} {fill['price']:,.2f}원 "
+                                f"({fill['reason']}, {fill['return'] * 100:+.2f}%)")
+            if fills:
+                self.save()
+            return fills
+
+    def summary(self):
+        """
+        실현 손익과 보유 종목의 평가 손익을 요약합니다.
+
+        Returns:
+            dict: summarize 결과에 open_positions, unrealized_pnl(원) 추가
+        """
+        with self.lock:
+            trades = np.array(
+                [(0, 0, int(t['entry_time']), int(t['exit_time']), t['entry_price'], t['exit_price'],
+                  t['return'], t['reason']) for t in self.trades],
+                dtype=TRADE_DTYPE
+            )
+            unrealized = 0.0
+            for symbol, position in self.positions.items():
+                price = self.last_prices.get(symbol)
+                if price is not None:
+                    unrealized += self.order_amount * self.rules.net_return(
+                        position['entry_price'], self.rules.sell_price(price))
+            open_positions = sorted(self.positions)
+        result = summarize(trades, self.order_amount)
+        result['open_positions'] = open_positions
+        result['unrealized_pnl'] = unrealized
+        return result
+
+
+def rules_from_env():
+    """
+    PAPER_* 환경변수로 체결/청산 규칙을 만듭니다.
+    """
+    return TradeRules(
+        fee=float(os.getenv('PAPER_FEE', '0.0005')),
+        slippage=float(os.getenv('PAPER_SLIPPAGE', '0.0005')),
+        take_profit=float(os.getenv('PAPER_TAKE_PROFIT', '0.02')),
+        stop_loss=float(os.getenv('PAPER_STOP_LOSS', '0.01')),
+        max_hold_bars=int(os.getenv('PAPER_MAX_HOLD_BARS', '0'))
+    )
+
+
+def paper_trader_from_env(bar_seconds=3600):
+    """
+    PAPER_TRADING=1 이면 환경변수 설정으로 모의 매매기를 만듭니다.
+
+    Returns:
+        PaperTrader: 사용하지 않으면 None
+    """
+    if os.getenv('PAPER_TRADING', '0') != '1':
+        return None
+    return PaperTrader(
+        rules_from_env(),
+        order_amount=float(os.getenv('PAPER_ORDER_KRW', '1000000')),
+        side=os.getenv('PAPER_SIDE', 'any'),
+        bar_seconds=bar_seconds,
+        state_path=os.getenv('PAPER_STATE_PATH', 'paper_state.json')
+    )
+
+
+def format_summary(summary):
+    """
+    요약을 사람이 읽을 수 있는 문자열로 변환합니다.
+    """
+    text = (f"거래 {summary['trades']}건, 승률 {summary['win_rate']:.1f}%, "
+            f"평균 {summary['avg_return']:+.2f}%, 손익 {summary['pnl']:+,.0f}원, "
+            f"최대 낙폭 {summary['max_drawdown']:,.0f}원, 손익비 {summary['profit_factor']:.2f}")
+    if summary['reasons']:
+        text += " (" + ", ".join(f"{reason} {n}" for reason, n in summary['reasons'].items()) + ")"
+    return text
+
+
+def main():
+    """
+    메인 함수 - 백필한 과거 캔들로 알림 규칙 모의 매매 재생
+    """
+    from upbit_backfill import CandleStore, parse_time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="알림 규칙 모의 매매 (과거 캔들 재생)")
+    parser.add_argument('--markets', required=True, help="쉼표로 구분한 마켓 코드")
+    parser.add_argument('--unit', default='60', help="캔들 단위")
+    parser.add_argument('--store', default='data/candles', help="백필 저장소 디렉토리")
+    parser.add_argument('--since', help="시작 시각 (UTC)")
+    parser.add_argument('--until', help="끝 시각 (UTC)")
+    parser.add_argument('--fee', type=float, default=0.0005, help="수수료율")
+    parser.add_argument('--slippage', type=float, default=0.0005, help="슬리피지 비율")
+    parser.add_argument('--take-profit', type=float, default=0.02, help="익절 수익률 (0 이면 사용 안 함)")
+    parser.add_argument('--stop-loss', type=float, default=0.01, help="손절 손실률 (0 이면 사용 안 함)")
+    parser.add_argument('--max-hold-bars', type=int, default=0, help="최대 보유 캔들 수")
+    parser.add_argument('--side', default='any', choices=SIDES, help="진입할 알림 종류")
+    parser.add_argument('--order-krw', type=float, default=1_000_000, help="거래당 주문 금액(원)")
+    parser.add_argument('--volume-spike-ratio', type=float, default=0, help="거래량 급증 배수 (0 이면 사용 안 함)")
+    parser.add_argument('--volume-spike-mode', default='and', choices=('and', 'alone'))
+    parser.add_argument('--rsi-method', default=os.getenv('RSI_METHOD', 'sma'), choices=RSI_METHODS,
+                        help="RSI 평활 방식")
+    args = parser.parse_args()
+
+    store = CandleStore(args.store)
+    rules = TradeRules(args.fee, args.slippage, args.take_profit, args.stop_loss, args.max_hold_bars)
+    since = parse_time(args.since) if args.since else None
+    until = parse_time(args.until) if args.until else None
+
+    all_trades = []
+    bars = 0
+    started = time.perf_counter()
+    for market in [market.strip() for market in args.markets.split(',') if market.strip()]:
+        frame = store.read(market, args.unit, since, until)
+        if len(frame) < 2:
+            logger.warning(f"캔들이 없습니다: {market}")
+            continue
+        columns = {name: frame[name].to_numpy(dtype=np.float64) for name in ('open', 'high', 'low', 'close', 'volume')}
+        signals = alert_signals(columns['close'], columns['volume'], volume_spike_ratio=args.volume_spike_ratio,
+                                volume_spike_mode=args.volume_spike_mode, side=args.side,
+                                rsi_method=args.rsi_method)
+        trades = simulate(frame['timestamp'].to_numpy(), columns['open'], columns['high'],
+                          columns['low'], columns['close'], signals, rules)
+        bars += len(frame)
+        all_trades.append(trades)
+        print(f"{market}: 캔들 {len(frame):,}개, 신호 {int(signals.sum())}개 - "
+              f"{format_summary(summarize(trades, args.order_krw))}")
+
+    elapsed = time.perf_counter() - started
+    if all_trades:
+        print(f"전체: {format_summary(summarize(np.concatenate(all_trades), args.order_krw))}")
+    print(f"처리: 캔들 {bars:,}개, {elapsed:.2f}초 (분당 {bars / max(elapsed, 1e-9) * 60:,.0f}개)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+import os
+import json
+import argparse
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 캔들 k 까지의 누적합 (k 포함). 값은 shift(첫 종가)를 뺀 뒤 누적해 제곱합의 정밀도 손실을 줄임
+PREFIX_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('close', '<f8'),
+    ('sum', '<f8'),
+    ('sum_sq', '<f8'),
+    ('gain', '<f8'),
+    ('loss', '<f8'),
+])
+
+
+class PrefixSumIndex:
+    def __init__(self, records=None, shift=None):
+        """
+        종가의 누적합/누적 제곱합과 상승폭/하락폭 누적합 인덱스
+
+        임의 구간의 평균, 분산, 볼린저 밴드, (단순 이동평균) RSI 를 구간 길이와
+        상관없이 누적합 두 개의 차이로 바로 계산합니다. 새 캔들은 마지막 누적값에
+        이어서 더하기만 하면 되므로 갱신 비용은 새 캔들 수에 비례합니다.
+
+        Args:
+            records (np.ndarray): PREFIX_DTYPE 누적합 레코드 (시간순)
+            shift (float): 누적 전에 빼는 기준값 (기본값: 첫 종가)
+        """
+        self.shift = shift
+        self._records = np.empty(0, dtype=PREFIX_DTYPE) if records is None else records
+        self.size = len(self._records)
+
+    @classmethod
+    def from_candles(cls, timestamp, close):
+        """
+        전체 캔들로 인덱스를 만듭니다.
+        """
+        index = cls()
+        index.extend(timestamp, close)
+        return index
+
+    @property
+    def records(self):
+        return self._records[:self.size]
+
+    @property
+    def timestamp(self):
+        return self.records['timestamp']
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_timestamp(self):
+        return int(self._records['timestamp'][self.size - 1]) if self.size else None
+
+    def extend(self, timestamp, close):
+        """
+        마지막 캔들 이후의 캔들을 이어서 누적합니다. (이미 있는 시각은 무시)
+
+        Args:
+            timestamp (np.ndarray): 캔들 시각 epoch 초 (오름차순)
+            close (np.ndarray): 종가
+
+        Returns:
+            np.ndarray: 새로 추가된 레코드 (파일에 덧붙일 부분)
+        """
+        timestamp = np.asarray(timestamp, dtype=np.int64)
+        close = np.asarray(close, dtype=np.float64)
+        if self.size:
+            newer = timestamp > self.last_timestamp
+            timestamp, close = timestamp[newer], close[newer]
+        if len(close) == 0:
+            return np.empty(0, dtype=PREFIX_DTYPE)
+        if self.shift is None:
+            self.shift = float(close[0])
+
+        if self.size:
+            last = self._records[self.size - 1]
+            previous_close, base = float(last['close']), last
+        else:
+            previous_close, base = float(close[0]), None
+
+        # 첫 캔들의 변화량은 0 (calculate_rsi 의 diff 후 where 와 같음)
+        delta = np.diff(close, prepend=previous_close)
+        shifted = close - self.shift
+        new = np.empty(len(close), dtype=PREFIX_DTYPE)
+        new['timestamp'] = timestamp
+        new['close'] = close
+        for field, values in (('sum', shifted), ('sum_sq', shifted * shifted),
+                              ('gain', np.maximum(delta, 0)), ('loss', np.maximum(-delta, 0))):
+            new[field] = np.cumsum(values) + (base[field] if base is not None else 0.0)
+
+        # 배열을 두 배씩 늘려 추가 비용을 분할 상환
+        if self.size + len(new) > len(self._records):
+            grown = np.empty(max(2 * len(self._records), self.size + len(new)), dtype=PREFIX_DTYPE)
+            grown[:self.size] = self._records[:self.size]
+            self._records = grown
+        self._records[self.size:self.size + len(new)] = new
+        self.size += len(new)
+        return new
+
+    def locate(self, start=None, end=None):
+        """
+        epoch 시각 [start, end] 에 해당하는 캔들 인덱스 구간 [i, j) 를 반환합니다.
+        """
+        timestamp = self.timestamp
+        i = 0 if start is None else int(np.searchsorted(timestamp, start, side='left'))
+        j = self.size if end is None else int(np.searchsorted(timestamp, end, side='right'))
+        return i, j
+
+    def _window(self, field, i, j):
+        # 캔들 [i, j) 의 합 (i, j 는 배열 가능)
+        values = self.records[field]
+        i = np.asarray(i)
+        upper = values[np.asarray(j) - 1]
+        lower = np.where(i > 0, values[np.maximum(i - 1, 0)], 0.0)
+        return upper - lower
+
+    def mean_var(self, i, j, ddof=1):
+        """
+        캔들 [i, j) 종가의 평균과 분산
+
+        Returns:
+            tuple: (평균, 분산). 캔들 수가 ddof 이하이면 분산은 NaN
+        """
+        count = np.asarray(j) - np.asarray(i)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total = self._window('sum', i, j)
+            mean = total / count
+            variance = (self._window('sum_sq', i, j) - total * mean) / (count - ddof)
+            variance = np.where(count > ddof, np.maximum(variance, 0.0), np.nan)
+        return mean + self.shift, variance
+
+    def bands(self, end, period=20, std_dev=2):
+        """
+        캔들 end 에서 끝나는 period 개 캔들의 볼린저 밴드 (end 는 배열 가능)
+
+        calculate_bollinger_bands 의 end 번째 값과 같습니다.
+
+        Returns:
+            tuple: (상단, 중간, 하단, 밴드폭%). 캔들이 부족한 위치는 NaN
+        """
+        end = np.asarray(end)
+        start = end - period + 1
+        valid = start >= 0
+        middle, variance = self.mean_var(np.where(valid, start, 0), np.where(valid, end + 1, 1))
+        std = np.sqrt(variance)
+        middle = np.where(valid, middle, np.nan)
+        upper = middle + std * std_dev
+        lower = middle - std * std_dev
+        with np.errstate(divide='ignore', invalid='ignore'):
+            band_width = (upper - lower) / middle * 100
+        return upper, middle, lower, band_width
+
+    def rsi(self, end, period=14):
+        """
+        캔들 end 의 RSI (calculate_rsi 와 같은 단순 이동평균 방식, end 는 배열 가능)
+        """
+        end = np.asarray(end)
+        start = end - period + 1
+        valid = start >= 0
+        start = np.where(valid, start, 0)
+        stop = np.where(valid, end + 1, 1)
+        gain = self._window('gain', start, stop)
+        loss = self._window('loss', start, stop)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100 / (1 + gain / loss)
+        return np.where(valid, rsi, np.nan)
+
+    def range_stats(self, start=None, end=None):
+        """
+        epoch 시각 [start, end] 구간 종가의 캔들 수, 평균, 표준편차
+
+        Returns:
+            dict: count, mean, std (캔들이 없으면 None)
+        """
+        i, j = self.locate(start, end)
+        if j <= i:
+            return None
+        mean, variance = self.mean_var(i, j)
+        return {'count': j - i, 'mean': float(mean), 'std': float(np.sqrt(variance))}
+
+    def indicators(self, start=None, end=None, period=20, std_dev=2, rsi_period=14):
+        """
+        epoch 시각 [start, end] 의 모든 캔들에 대한 밴드와 RSI (대시보드 확대/축소용)
+
+        Returns:
+            dict: timestamp, close, upper_band, middle_band, lower_band, band_width, rsi 배열
+        """
+        i, j = self.locate(start, end)
+        positions = np.arange(i, j)
+        upper, middle, lower, band_width = self.bands(positions, period, std_dev)
+        records = self.records[i:j]
+        return {
+            'timestamp': records['timestamp'],
+            'close': records['close'],
+            'upper_band': upper,
+            'middle_band': middle,
+            'lower_band': lower,
+            'band_width': band_width,
+            'rsi': self.rsi(positions, rsi_period),
+        }
+
+
+class PrefixIndexStore:
+    def __init__(self, store):
+        """
+        CandleStore 옆에 시장/단위별 누적합 인덱스를 유지합니다.
+
+        경로: {root}/market={market}/unit={unit}/prefix.bin (+ prefix.json)
+        prefix.bin 은 고정 길이 레코드 파일이라 새 캔들은 파일 끝에 덧붙이기만 합니다.
+
+        Args:
+            store (CandleStore): 캔들 저장소
+        """
+        self.store = store
+
+    def _paths(self, market, unit):
+        directory = os.path.join(self.store.root, f"market={market}", f"unit={unit}")
+        return os.path.join(directory, 'prefix.bin'), os.path.join(directory, 'prefix.json')
+
+    def load(self, market, unit):
+        """
+        저장된 인덱스를 읽습니다. 없으면 None
+        """
+        data_path, meta_path = self._paths(market, unit)
+        if not os.path.exists(data_path) or not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        records = np.fromfile(data_path, dtype=PREFIX_DTYPE)
+        # 덧붙이던 중 중단되어 잘린 레코드는 fromfile 이 버림 (파일에서는 update 가 잘라냄)
+        return PrefixSumIndex(records, shift=meta['shift'])
+
+    def rebuild(self, market, unit):
+        """
+        저장된 캔들 전체로 인덱스를 다시 만듭니다.
+        """
+        frame = self.store.read(market, unit)
+        index = PrefixSumIndex.from_candles(frame['timestamp'].values, frame['close'].values)
+        if index.shift is None:
+            return index
+        data_path, meta_path = self._paths(market, unit)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        index.records.tofile(data_path + '.tmp')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'shift': index.shift}, f)
+        os.replace(data_path + '.tmp', data_path)
+        os.replace(meta_path + '.tmp', meta_path)
+        logger.info(f"누적합 인덱스 생성 ({market}, {unit}): {len(index)}개 캔들")
+        return index
+
+    def update(self, market, unit, written_start=None):
+        """
+        저장소에 새로 기록된 캔들을 인덱스에 반영합니다.
+
+        마지막 인덱스 이후의 캔들만 파일 끝에 덧붙입니다. 인덱스보다 과거 시각의
+        캔들이 기록됐으면(과거 방향 백필) 누적합이 바뀌므로 다시 만듭니다.
+
+        Args:
+            market (str): 마켓 코드
+            unit (str|int): 캔들 단위
+            written_start (int): 이번에 기록한 가장 이른 캔들 시각 (모르면 None)
+
+        Returns:
+            PrefixSumIndex: 갱신된 인덱스
+        """
+        index = self.load(market, unit)
+        if index is None or len(index) == 0 or (written_start is not None and written_start <= index.last_timestamp):
+            return self.rebuild(market, unit)
+
+        stored = len(index)
+        frame = self.store.read(market, unit, start=index.last_timestamp + 1)
+        new = index.extend(frame['timestamp'].values, frame['close'].values)
+        if len(new):
+            data_path, _ = self._paths(market, unit)
+            with open(data_path, 'r+b') as f:
+                # 잘린 레코드가 남아 있으면 그 뒤에 덧붙인 레코드가 모두 어긋나므로 먼저 잘라냄
+                f.truncate(stored * PREFIX_DTYPE.itemsize)
+                f.seek(0, os.SEEK_END)
+                new.tofile(f)
+        return index
+
+
+def main():
+    """
+    메인 함수 - 저장된 캔들의 임의 구간 통계 조회
+    """
+    from upbit_backfill import CandleStore, parse_time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="누적합 인덱스로 임의 구간 지표 조회")
+    parser.add_argument('--market', required=True, help="마켓 코드 (예: KRW-BTC)")
+    parser.add_argument('--unit', default='60', help="캔들 단위")
+    parser.add_argument('--store', default='data/candles', help="백필 저장소 디렉토리")
+    parser.add_argument('--start', help="구간 시작 (UTC)")
+    parser.add_argument('--end', help="구간 끝 (UTC)")
+    parser.add_argument('--period', type=int, default=20, help="볼린저 밴드 기간")
+    parser.add_argument('--rebuild', action='store_true', help="인덱스를 처음부터 다시 생성")
+    args = parser.parse_args()
+
+    indexes = PrefixIndexStore(CandleStore(args.store))
+    index = indexes.rebuild(args.market, args.unit) if args.rebuild else indexes.update(args.market, args.unit)
+    start = parse_time(args.start) if args.start else None
+    end = parse_time(args.end) if args.end else None
+
+    stats = index.range_stats(start, end)
+    if stats is None:
+        print("구간에 캔들이 없습니다.")
+        return
+    print(f"{args.market} 캔들 {stats['count']:,}개: 평균 {stats['mean']:,.2f}, 표준편차 {stats['std']:,.2f}")
+    _, last = index.locate(start, end)
+    upper, middle, lower, band_width = index.bands(last - 1, args.period)
+    print(f"구간 끝 볼린저 밴드({args.period}): {lower:,.2f} ~ {upper:,.2f} (중간 {middle:,.2f}, 밴드폭 {band_width:.3f}%), "
+          f"RSI {index.rsi(last - 1):.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+import math
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from upbit_timeframes import TIMEFRAMES, parse_timeframes
+
+# 업비트 시세 조회 API 는 IP 당 초당 10회. 여유를 두고 8회를 기본 예산으로 사용
+DEFAULT_RATE = 8.0
+
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+
+# 계획된 요청 하나: 주기 시작 기준 오프셋(초), 작업 이름, 종목, 우선순위, 캔들 마감 후 지연(초)
+PlannedFetch = namedtuple('PlannedFetch', ['offset', 'task', 'market', 'priority', 'latency'])
+
+# 주기적으로 반복되는 요청 묶음: 이름, 주기(초), 종목 목록(종목별 1회), 우선순위
+FetchTask = namedtuple('FetchTask', ['name', 'period', 'markets', 'priority'])
+
+
+def build_tasks(markets, timeframes, critical_timeframes=None, metadata_period=3600):
+    """
+    감시 종목과 타임프레임으로 반복 요청 작업 목록을 만듭니다.
+
+    캔들 마감 직후 바로 알아야 하는 타임프레임(기본값: 가장 짧은 타임프레임)은
+    긴급 작업, 나머지 타임프레임과 마켓 목록 조회는 일반 작업입니다.
+
+    Args:
+        markets (list): 종목 목록
+        timeframes (list): 타임프레임 이름 목록 (예: ['5m', '60m', '1d'])
+        critical_timeframes (list): 긴급 타임프레임 (기본값: 가장 짧은 타임프레임)
+        metadata_period (int): /market/all 조회 주기(초, 0 이면 제외)
+
+    Returns:
+        list: FetchTask 목록
+    """
+    timeframes = sorted(timeframes, key=TIMEFRAMES.get)
+    critical = set(critical_timeframes or timeframes[:1])
+    tasks = [
+        FetchTask(f"candles {name}", TIMEFRAMES[name] * 60, list(markets),
+                  PRIORITY_CRITICAL if name in critical else PRIORITY_NORMAL)
+        for name in timeframes
+    ]
+    if metadata_period:
+        tasks.append(FetchTask('market/all', metadata_period, [None], PRIORITY_NORMAL))
+    return tasks
+
+
+class FetchPlan:
+    def __init__(self, horizon, rate, entries, unplaced, critical_window, tasks):
+        """
+        계획 결과
+
+        Args:
+            horizon (int): 계획 반복 주기(초). UTC epoch 기준으로 반복
+            rate (float): 초당 요청 예산
+            entries (list): 오프셋 순 PlannedFetch 목록
+            unplaced (list): 다음 캔들 전에 배치하지 못한 (작업, 종목, 주기 시작)
+            critical_window (float): 긴급 작업 허용 지연(초)
+            tasks (list): 계획한 FetchTask 목록
+        """
+        self.horizon = horizon
+        self.rate = rate
+        self.entries = entries
+        self.unplaced = unplaced
+        self.critical_window = critical_window
+        self.tasks = tasks
+
+    @property
+    def critical_latency(self):
+        """
+        긴급 요청의 캔들 마감 후 최대 지연(초)
+        """
+        latencies = [entry.latency for entry in self.entries if entry.priority == PRIORITY_CRITICAL]
+        return max(latencies) if latencies else 0.0
+
+    @property
+    def utilization(self):
+        """
+        요청 예산 사용률 (1 이상이면 예산 초과)
+        """
+        demand = sum(len(task.markets) / task.period for task in self.tasks)
+        return demand / self.rate
+
+    @property
+    def feasible(self):
+        return not self.unplaced and self.critical_latency <= self.critical_window
+
+    def peak_rate(self, window=1.0):
+        """
+        window 초 구간별 요청 수의 최대값을 초당 요청 수로 반환합니다.
+        """
+        if not self.entries:
+            return 0.0
+        offsets = np.array([entry.offset for entry in self.entries])
+        counts = np.bincount((offsets // window).astype(np.int64))
+        return counts.max() / window
+
+    def problems(self):
+        """
+        예산에 맞지 않는 이유 목록
+        """
+        problems = []
+        if self.utilization > 1:
+            problems.append(f"평균 요청량이 예산의 {self.utilization * 100:.0f}% 입니다 (초당 {self.rate:g}회 예산).")
+        if self.critical_latency > self.critical_window:
+            problems.append(f"긴급 요청이 캔들 마감 후 {self.critical_latency:.1f}초에 끝나 허용 지연 {self.critical_window:g}초를 넘습니다.")
+        if self.unplaced:
+            problems.append(f"{len(self.unplaced)}건의 요청을 다음 캔들 전에 배치하지 못했습니다.")
+        return problems
+
+    def summary(self):
+        """
+        계획 요약 문자열
+        """
+        lines = [f"요청 계획: {self.horizon}초 주기, 예산 초당 {self.rate:g}회, 사용률 {self.utilization * 100:.1f}%"]
+        for task in self.tasks:
+            kind = '긴급' if task.priority == PRIORITY_CRITICAL else '일반'
+            lines.append(f"  - {task.name} ({kind}): {len(task.markets)}회 / {task.period}초")
+        lines.append(f"  긴급 요청 최대 지연: {self.critical_latency:.1f}초 (허용 {self.critical_window:g}초)")
+        lines.append(f"  최대 순간 요청: 초당 {self.peak_rate():.0f}회")
+        problems = self.problems()
+        lines.append("  결과: 예산 안에서 실행 가능" if not problems else "  결과: 예산 초과 - " + " ".join(problems))
+        return "\n".join(lines)
+
+
+class RateBudgetPlanner:
+    def __init__(self, rate=DEFAULT_RATE, critical_window=60.0, max_horizon=86400):
+        """
+        요청 예산 안에서 캔들 주기 전체에 요청을 나눠 배치하는 계획기
+
+        시간을 1/rate 초 간격의 슬롯으로 나누고 슬롯마다 요청 하나를 배치합니다.
+        긴급 작업은 캔들 마감 직후 가장 이른 빈 슬롯부터 채우고, 일반 작업은
+        긴급 구간 이후 분산 구간(가장 짧은 작업 주기와 1시간 중 긴 값) 안에 고르게
+        나눈 목표 시각 이후의 가장 이른 빈 슬롯에 배치합니다. 빈 슬롯은
+        유니온-파인드(다음 빈 슬롯 포인터)로 찾습니다.
+
+        Args:
+            rate (float): 초당 요청 예산
+            critical_window (float): 긴급 요청이 캔들 마감 후 끝나야 하는 시간(초)
+            max_horizon (int): 계획 반복 주기 상한(초)
+        """
+        self.rate = rate
+        self.critical_window = critical_window
+        self.max_horizon = max_horizon
+
+    def plan(self, tasks):
+        """
+        작업 목록의 요청 계획을 만듭니다.
+
+        Args:
+            tasks (list): FetchTask 목록 (주기는 86400 의 약수여야 UTC 기준으로 반복됨)
+
+        Returns:
+            FetchPlan: 계획 결과
+        """
+        horizon = min(max(task.period for task in tasks), self.max_horizon)
+        spread_period = max(min(task.period for task in tasks), 3600)
+        slots = int(horizon * self.rate)
+        # parent[k]: k 이후 가장 이른 빈 슬롯 (slots 는 "없음")
+        parent = list(range(slots + 1))
+
+        def find(k):
+            root = k
+            while parent[root] != root:
+                root = parent[root]
+            while parent[k] != root:
+                parent[k], k = root, parent[k]
+            return root
+
+        entries = []
+        unplaced = []
+
+        def place(task, market, start, target, deadline):
+            slot = find(min(max(int(math.ceil(target * self.rate)), 0), slots))
+            if slot >= slots or slot / self.rate >= deadline:
+                unplaced.append((task.name, market, start))
+                return
+            parent[slot] = slot + 1
+            offset = slot / self.rate
+            entries.append(PlannedFetch(offset, task.name, market, task.priority, offset - start))
+
+        # 긴급 작업 먼저: 마감 시각 순으로 가장 이른 슬롯에
+        critical = [task for task in tasks if task.priority == PRIORITY_CRITICAL]
+        for start in sorted({start for task in critical for start in range(0, horizon, task.period)}):
+            for task in critical:
+                if start % task.period:
+                    continue
+                for market in task.markets:
+                    place(task, market, start, start, start + task.period)
+
+        # 일반 작업: 긴급 구간 이후 고르게 나눈 목표 시각에
+        for task in tasks:
+            if task.priority == PRIORITY_CRITICAL:
+                continue
+            window = min(task.period, spread_period)
+            # 긴급 구간보다 짧은 주기(예: 빠른 체크)는 주기 전체에 나눔
+            lead = self.critical_window if window > self.critical_window else 0
+            count = len(task.markets)
+            for start in range(0, horizon, task.period):
+                for i, market in enumerate(task.markets):
+                    target = start + lead + (window - lead) * i / count
+                    place(task, market, start, target, start + task.period)
+
+        entries.sort(key=lambda entry: entry.offset)
+        return FetchPlan(horizon, self.rate, entries, unplaced, self.critical_window, tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업비트 요청 예산 계획")
+    parser.add_argument('--markets', type=int, default=100, help="종목 수")
+    parser.add_argument('--timeframes', default='60m', help="타임프레임 (예: 5m,60m,1d)")
+    parser.add_argument('--critical', default='', help="긴급 타임프레임 (기본값: 가장 짧은 타임프레임)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="초당 요청 예산")
+    parser.add_argument('--critical-window', type=float, default=60.0, help="긴급 요청 허용 지연(초)")
+    parser.add_argument('--metadata-period', type=int, default=3600, help="마켓 목록 조회 주기(초, 0 이면 제외)")
+    parser.add_argument('--show', type=int, default=0, help="앞에서부터 출력할 계획 요청 수")
+    args = parser.parse_args()
+
+    markets = [f"KRW-M{i:04d}" for i in range(args.markets)]
+    tasks = build_tasks(
+        markets,
+        parse_timeframes(args.timeframes),
+        critical_timeframes=parse_timeframes(args.critical) if args.critical else None,
+        metadata_period=args.metadata_period
+    )
+    plan = RateBudgetPlanner(rate=args.rate, critical_window=args.critical_window).plan(tasks)
+    print(plan.summary())
+    for entry in plan.entries[:args.show]:
+        print(f"{entry.offset:9.3f}s  {entry.task:<14} {entry.market or '-':<12} 지연 {entry.latency:7.1f}s")
+    raise SystemExit(0 if plan.feasible else 1)
+
+
+if __name__ == '__main__':
+    main()
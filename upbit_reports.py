@@ -0,0 +1,412 @@
+import time
+import sqlite3
+import argparse
+import threading
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# 신호 종류 (evaluate_conditions 결과 키 → 리포트 표시 이름)
+RULES = {
+    'alert': '알림 조건',
+    'upper_breakout': '상단 돌파',
+    'lower_breakout': '하단 이탈',
+    'volume_spike': '거래량 급증',
+}
+
+# 신호 후 성과를 확인하는 시간(시간 단위)
+DEFAULT_HORIZONS = (1, 4, 24)
+
+# report_daily 의 horizon 0 행은 그날 발생한 신호 수, -1 행은 성과 확인 전에 만료된 신호 수
+FIRED = 0
+EXPIRED = -1
+
+# 전체 누적 요약이 반영된 마지막 날짜
+MERGED_THROUGH = 'merged_through'
+
+
+def day_key(timestamp):
+    """
+    epoch 초의 (서버 지역 시간) 날짜 문자열
+    """
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+
+def format_rate(hits, count):
+    return f"{hits / count * 100:.0f}%" if count else "-"
+
+
+class SignalReports:
+    def __init__(self, path, horizons=DEFAULT_HORIZONS, max_pending_hours=48):
+        """
+        신호별 성과를 스캔마다 누적 집계해 일간/주간 리포트를 만드는 저장소 (SQLite)
+
+        원본 기록을 다시 읽지 않도록 세 단계로 나눠 저장합니다.
+
+        - report_pending: 성과 확인을 기다리는 신호 (최근 max_pending_hours 시간 분량만 유지).
+          next_due 는 아직 확인하지 않은 가장 이른 확인 시각으로, 이 시각 전에는 가격이 필요 없습니다.
+        - report_daily: (날짜, 종목, 타임프레임, 신호, 확인 시간) 별 건수/적중/수익률 합계.
+          스캔마다 새 신호와 이번에 확인된 성과만 더합니다.
+        - report_totals: 전체 누적 요약. 리포트를 만들 때 아직 반영하지 않은 날짜만 합칩니다.
+
+        성과는 확인된 날짜에 집계하므로 결과 하나는 정확히 하루에만 들어가고,
+        max_pending_hours 안에 가격을 받지 못한 신호는 만료된 날짜에 만료 건수로 집계합니다.
+        리포트 비용은 쌓인 기간과 관계없이 해당 기간의 집계 행 수에만 비례합니다.
+        업비트 현물은 매수만 가능하므로 모든 신호를 매수로 보고 수익률 > 0 을 적중으로 봅니다.
+
+        Args:
+            path (str): 데이터베이스 파일 경로
+            horizons (tuple): 성과 확인 시간(시간)
+            max_pending_hours (float): 이 시간이 지나도록 가격을 받지 못한 신호는 버림
+        """
+        self.path = path
+        self.horizons = tuple(sorted(horizons))
+        self.max_pending_hours = max(max_pending_hours, self.horizons[-1])
+        self.complete = (1 << len(self.horizons)) - 1
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS report_pending (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                price REAL NOT NULL,
+                resolved INTEGER NOT NULL DEFAULT 0,
+                next_due INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (symbol, timeframe, rule, timestamp)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS report_seen (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                candle_time TEXT NOT NULL,
+                PRIMARY KEY (symbol, timeframe, rule)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS report_daily (
+                day TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                horizon INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                hits INTEGER NOT NULL,
+                return_sum REAL NOT NULL,
+                PRIMARY KEY (day, symbol, timeframe, rule, horizon)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS report_totals (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                horizon INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                hits INTEGER NOT NULL,
+                return_sum REAL NOT NULL,
+                PRIMARY KEY (symbol, timeframe, rule, horizon)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS report_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        # next_due 가 없던 데이터베이스는 열을 추가 (0 이면 다음 update 에서 한 번 확인 후 채워짐)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(report_pending)")]
+        if 'next_due' not in columns:
+            self.conn.execute("ALTER TABLE report_pending ADD COLUMN next_due INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+
+    def next_due(self, signaled_at, mask):
+        """
+        아직 확인하지 않은 가장 이른 확인 시각 (모두 확인했으면 None)
+        """
+        for bit, horizon in enumerate(self.horizons):
+            if not mask & (1 << bit):
+                return signaled_at + horizon * 3600
+        return None
+
+    def add(self, day, symbol, timeframe, rule, horizon, count=1, hits=0, return_sum=0.0):
+        self.conn.execute(
+            "INSERT INTO report_daily (day, symbol, timeframe, rule, horizon, count, hits, return_sum) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (day, symbol, timeframe, rule, horizon) DO UPDATE SET "
+            "count = count + excluded.count, hits = hits + excluded.hits, "
+            "return_sum = return_sum + excluded.return_sum",
+            (day, symbol, timeframe, rule, horizon, count, hits, return_sum)
+        )
+
+    def due_symbols(self, timestamp=None):
+        """
+        확인 시간이 지나 가격이 필요한 대기 신호의 종목 목록을 반환합니다.
+
+        스캔에 포함되지 않은 종목은 update 전에 현재가를 따로 받아 넘기면
+        다음에 스캔될 때까지 성과 확인이 늦어지지 않습니다.
+        """
+        now = int(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT symbol FROM report_pending WHERE next_due <= ?", (now,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def update(self, records, timestamp=None, prices=None):
+        """
+        한 번의 스캔 결과를 누적 집계에 반영합니다.
+
+        같은 (종목, 타임프레임, 신호) 는 캔들마다 한 번만 신호로 셉니다. 확인 시간이
+        지난 대기 신호는 이번 스캔의 현재가(없으면 prices 의 현재가)로 수익률을 계산해
+        오늘 집계에 더합니다.
+
+        Args:
+            records (list): (analysis, conditions) 목록
+            timestamp (int): 스캔 시각 epoch 초 (기본값: 현재)
+            prices (dict): 스캔에 없는 종목의 현재가 {종목: 가격} (due_symbols 참고)
+
+        Returns:
+            tuple: (새 신호 수, 확인한 성과 수)
+        """
+        now = int(time.time() if timestamp is None else timestamp)
+        today = day_key(now)
+        prices = dict(prices or {})
+        fired = 0
+        resolved = 0
+
+        with self._lock, self.conn:
+            for analysis, conditions in records:
+                if analysis is None:
+                    continue
+                symbol = analysis['symbol']
+                timeframe = analysis.get('timeframe') or '60m'
+                price = float(analysis['current_price'])
+                prices[symbol] = price
+                candle_time = str(analysis.get('candle_time', now))
+                for rule in RULES:
+                    if not conditions.get(rule):
+                        continue
+                    row = self.conn.execute(
+                        "SELECT candle_time FROM report_seen WHERE symbol = ? AND timeframe = ? AND rule = ?",
+                        (symbol, timeframe, rule)
+                    ).fetchone()
+                    if row is not None and row[0] == candle_time:
+                        continue
+                    self.conn.execute("INSERT OR REPLACE INTO report_seen VALUES (?, ?, ?, ?)",
+                                      (symbol, timeframe, rule, candle_time))
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO report_pending (symbol, timeframe, rule, timestamp, price, next_due) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (symbol, timeframe, rule, now, price, self.next_due(now, 0))
+                    )
+                    self.add(today, symbol, timeframe, rule, FIRED)
+                    fired += 1
+
+            # 확인 시간이 지난 대기 신호에 이번 현재가로 성과 반영
+            due = self.conn.execute(
+                "SELECT symbol, timeframe, rule, timestamp, price, resolved, next_due FROM report_pending "
+                "WHERE next_due <= ?",
+                (now,)
+            ).fetchall()
+            for symbol, timeframe, rule, signaled_at, entry, mask, due_at in due:
+                if symbol not in prices:
+                    continue
+                change = prices[symbol] / entry - 1
+                before = mask
+                for bit, horizon in enumerate(self.horizons):
+                    if mask & (1 << bit) or now < signaled_at + horizon * 3600:
+                        continue
+                    mask |= 1 << bit
+                    self.add(today, symbol, timeframe, rule, horizon, 1, int(change > 0), change)
+                    resolved += 1
+                next_due = self.next_due(signaled_at, mask) or 0
+                if mask == before and next_due == due_at:
+                    continue
+                self.conn.execute(
+                    "UPDATE report_pending SET resolved = ?, next_due = ? "
+                    "WHERE symbol = ? AND timeframe = ? AND rule = ? AND timestamp = ?",
+                    (mask, next_due, symbol, timeframe, rule, signaled_at)
+                )
+
+            self.conn.execute("DELETE FROM report_pending WHERE resolved = ?", (self.complete,))
+            # 가격을 끝내 받지 못한 신호는 버리고 리포트에 만료 건수로 남김
+            cutoff = now - self.max_pending_hours * 3600
+            expired = self.conn.execute(
+                "SELECT symbol, timeframe, rule FROM report_pending WHERE timestamp < ?", (cutoff,)
+            ).fetchall()
+            for symbol, timeframe, rule in expired:
+                self.add(today, symbol, timeframe, rule, EXPIRED)
+            self.conn.execute("DELETE FROM report_pending WHERE timestamp < ?", (cutoff,))
+
+        if expired:
+            logger.info(f"성과 확인 전 만료된 신호 {len(expired)}건 (현재가 없음)")
+        return fired, resolved
+
+    def period(self, start_day, end_day):
+        """
+        [start_day, end_day] 기간의 일별 집계를 합칩니다. (날짜 범위 키 탐색)
+
+        Returns:
+            list: (종목, 타임프레임, 신호, 확인 시간, 건수, 적중, 수익률 합계) 목록
+        """
+        with self._lock:
+            return self.conn.execute(
+                "SELECT symbol, timeframe, rule, horizon, SUM(count), SUM(hits), SUM(return_sum) "
+                "FROM report_daily WHERE day BETWEEN ? AND ? GROUP BY symbol, timeframe, rule, horizon",
+                (start_day, end_day)
+            ).fetchall()
+
+    def merge_totals(self, through_day):
+        """
+        아직 반영하지 않은 날짜부터 through_day 까지의 일별 집계를 전체 누적 요약에 합칩니다.
+
+        Returns:
+            str: 반영된 마지막 날짜
+        """
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT value FROM report_meta WHERE key = ?", (MERGED_THROUGH,)).fetchone()
+            merged = row[0] if row else ''
+            if through_day <= merged:
+                return merged
+            self.conn.execute(
+                "INSERT INTO report_totals (symbol, timeframe, rule, horizon, count, hits, return_sum) "
+                "SELECT symbol, timeframe, rule, horizon, SUM(count), SUM(hits), SUM(return_sum) "
+                "FROM report_daily WHERE day > ? AND day <= ? GROUP BY symbol, timeframe, rule, horizon "
+                "ON CONFLICT (symbol, timeframe, rule, horizon) DO UPDATE SET "
+                "count = count + excluded.count, hits = hits + excluded.hits, "
+                "return_sum = return_sum + excluded.return_sum",
+                (merged, through_day)
+            )
+            self.conn.execute("INSERT OR REPLACE INTO report_meta VALUES (?, ?)", (MERGED_THROUGH, through_day))
+        return through_day
+
+    def totals(self):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT symbol, timeframe, rule, horizon, count, hits, return_sum FROM report_totals"
+            ).fetchall()
+
+    def format_report(self, title, rows, totals=None, top=10):
+        """
+        집계 행으로 텔레그램 리포트 메시지를 만듭니다.
+
+        Args:
+            title (str): 제목
+            rows (list): period() 결과
+            totals (list): totals() 결과 (누적 적중률 표시)
+            top (int): 종목별 신호 수를 보여줄 종목 수
+
+        Returns:
+            str: HTML 메시지
+        """
+        timeframes = {row[1] for row in rows} | {row[1] for row in totals or []}
+        show_timeframe = len(timeframes) > 1
+
+        def label(rule, timeframe):
+            return f"{RULES.get(rule, rule)} [{timeframe}]" if show_timeframe else RULES.get(rule, rule)
+
+        def by_rule(source):
+            grouped = {}
+            for symbol, timeframe, rule, horizon, count, hits, return_sum in source:
+                entry = grouped.setdefault((rule, timeframe), {}).setdefault(horizon, [0, 0, 0.0])
+                entry[0] += count
+                entry[1] += hits
+                entry[2] += return_sum
+            order = list(RULES)
+            return sorted(grouped.items(), key=lambda item: (order.index(item[0][0]) if item[0][0] in order
+                                                             else len(order), item[0][1]))
+
+        message = f"📊 <b>{title}</b>\n\n"
+
+        grouped = by_rule(rows)
+        fired = [(key, horizons[FIRED][0]) for key, horizons in grouped if FIRED in horizons]
+        if fired:
+            message += "🔔 <b>신호 발생</b>: " + ", ".join(f"{label(*key)} {count}건" for key, count in fired) + "\n"
+            per_symbol = {}
+            for symbol, timeframe, rule, horizon, count, _, _ in rows:
+                if horizon == FIRED:
+                    per_symbol[symbol] = per_symbol.get(symbol, 0) + count
+            ranked = sorted(per_symbol.items(), key=lambda item: (-item[1], item[0]))
+            message += "종목별: " + ", ".join(f"{symbol.replace('KRW-', '')} {count}" for symbol, count in ranked[:top])
+            if len(ranked) > top:
+                message += f" 외 {len(ranked) - top}개"
+            message += "\n"
+        else:
+            message += "🔔 신호 발생 없음\n"
+
+        performance = [(key, horizons) for key, horizons in grouped if set(horizons) - {FIRED, EXPIRED}]
+        if performance:
+            message += "\n📈 <b>성과</b> (이 기간에 확인된 신호, 매수 가정)\n"
+            for key, horizons in performance:
+                parts = []
+                for horizon in self.horizons:
+                    if horizon in horizons:
+                        count, hits, return_sum = horizons[horizon]
+                        parts.append(f"{horizon}시간 {hits}/{count} ({format_rate(hits, count)}, "
+                                     f"평균 {return_sum / count * 100:+.2f}%)")
+                message += f"• {label(*key)}: " + " · ".join(parts) + "\n"
+
+        expired = [(key, horizons[EXPIRED][0]) for key, horizons in grouped if EXPIRED in horizons]
+        if expired:
+            message += ("\n⌛ <b>성과 확인 전 만료</b> (가격 없음): "
+                        + ", ".join(f"{label(*key)} {count}건" for key, count in expired) + "\n")
+
+        if totals:
+            horizon = self.horizons[-1]
+            parts = []
+            for key, horizons in by_rule(totals):
+                if horizon in horizons:
+                    count, hits, _ = horizons[horizon]
+                    parts.append(f"{label(*key)} {format_rate(hits, count)} ({count}건)")
+            if parts:
+                message += f"\n🎯 <b>누적 적중률</b> ({horizon}시간): " + ", ".join(parts) + "\n"
+
+        return message.rstrip("\n")
+
+    def daily_report(self, day=None, merge=True):
+        """
+        하루치 리포트를 만듭니다.
+
+        Args:
+            day (str): YYYY-MM-DD (기본값: 어제)
+            merge (bool): 그날까지의 집계를 전체 누적 요약에 반영
+
+        Returns:
+            str: HTML 메시지
+        """
+        day = day or day_key(time.time() - 86400)
+        if merge:
+            self.merge_totals(day)
+        return self.format_report(f"일간 신호 리포트 ({day})", self.period(day, day), self.totals())
+
+    def weekly_report(self, end_day=None, merge=True):
+        """
+        end_day 까지 7일치 리포트를 만듭니다. (기본값: 어제까지)
+        """
+        end_day = end_day or day_key(time.time() - 86400)
+        start_day = (datetime.strptime(end_day, '%Y-%m-%d') - timedelta(days=6)).strftime('%Y-%m-%d')
+        if merge:
+            self.merge_totals(end_day)
+        return self.format_report(f"주간 신호 리포트 ({start_day} ~ {end_day})",
+                                  self.period(start_day, end_day), self.totals())
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="누적 집계로 일간/주간 신호 리포트를 출력합니다. (누적 요약은 바꾸지 않음)")
+    parser.add_argument('--db', required=True, help="리포트 데이터베이스 (REPORT_DB_PATH)")
+    parser.add_argument('--period', choices=('daily', 'weekly'), default='daily')
+    parser.add_argument('--day', help="YYYY-MM-DD (기본값: 어제, 주간은 마지막 날)")
+    args = parser.parse_args()
+
+    reports = SignalReports(args.db)
+    if args.period == 'daily':
+        print(reports.daily_report(args.day, merge=False))
+    else:
+        print(reports.weekly_report(args.day, merge=False))
+    reports.close()
+
+
+if __name__ == '__main__':
+    main()
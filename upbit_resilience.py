@@ -0,0 +1,344 @@
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않은 경우"""
+
+
+class ScanDeadlineExceeded(Exception):
+    """스캔 마감 시간이 지나 요청을 보내지 않은 경우"""
+
+
+class ScanDeadline:
+    def __init__(self, seconds):
+        """
+        스캔 단위 마감 시간
+
+        Args:
+            seconds (float): 스캔 시작부터 허용되는 최대 시간(초). None 이면 무제한
+        """
+        self.seconds = seconds
+        self.started_at = time.monotonic()
+
+    def remaining(self):
+        """
+        남은 시간(초)을 반환합니다. 무제한이면 None
+        """
+        if self.seconds is None:
+            return None
+        return self.seconds - (time.monotonic() - self.started_at)
+
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+class LatencyTracker:
+    def __init__(self, window=200, percentile=90, min_samples=20, default=2.0):
+        """
+        최근 응답 시간 분포를 추적해 헤지 요청 기준 시간을 계산합니다.
+
+        Args:
+            window (int): 보관할 최근 샘플 수
+            percentile (float): 헤지 기준 백분위수
+            min_samples (int): 백분위수를 신뢰하기 위한 최소 샘플 수
+            default (float): 샘플이 부족할 때 사용할 기준 시간(초)
+        """
+        self.samples = deque(maxlen=window)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default = default
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def threshold(self):
+        """
+        헤지 요청을 보낼 기준 시간(초)을 반환합니다.
+        """
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return self.default
+            return float(np.percentile(np.fromiter(self.samples, dtype=float), self.percentile))
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=60):
+        """
+        엔드포인트별 서킷 브레이커
+
+        연속 실패가 failure_threshold 회에 도달하면 열리고, recovery_timeout 초가
+        지나면 한 번의 시험 요청(half-open)을 허용합니다. 시험 요청이 성공하면
+        다시 닫히고, 실패하면 다시 열립니다.
+
+        Args:
+            name (str): 엔드포인트 이름
+            failure_threshold (int): 차단까지 허용하는 연속 실패 횟수
+            recovery_timeout (float): 차단 후 시험 요청까지 대기 시간(초)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # half-open: 시험 요청은 한 번에 하나만 허용
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"서킷 브레이커 복구 ({self.name})")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_ignored(self):
+        """
+        실패로 세지 않는 응답 (잘못된 종목 등 클라이언트 오류)
+
+        서버는 응답했으므로 연속 실패 수는 그대로 두고 시험 요청 자리만 비웁니다.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"서킷 브레이커 차단 ({self.name}): 연속 실패 {self.failures}회")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def status_code(error):
+    """
+    요청 예외의 HTTP 상태 코드 (응답이 없으면 None)
+    """
+    response = getattr(error, 'response', None)
+    return response.status_code if response is not None else None
+
+
+def is_client_error(error):
+    """
+    요청 쪽 문제인 4xx 응답인지 (서버 장애가 아니므로 서킷 브레이커에 세지 않음)
+    """
+    code = status_code(error)
+    return code is not None and 400 <= code < 500
+
+
+class ResilientFetcher:
+    def __init__(self, timeout=10, hedge_percentile=90, failure_threshold=5,
+                 recovery_timeout=60, max_workers=8, max_backoff=30):
+        """
+        마감 시간, 헤지 요청, 서킷 브레이커를 적용한 GET 요청 도우미
+
+        Args:
+            timeout (float): 요청당 최대 대기 시간(초)
+            hedge_percentile (float): 헤지 요청을 보낼 응답 시간 백분위수
+            failure_threshold (int): 서킷 브레이커 차단까지 연속 실패 횟수
+            recovery_timeout (float): 서킷 브레이커 복구 시험까지 대기 시간(초)
+            max_workers (int): 동시에 진행할 수 있는 요청 수
+            max_backoff (float): 429 응답 후 모든 요청을 멈추는 최대 시간(초)
+        """
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upbit-fetch')
+        self.breakers = {}
+        self.latencies = {}
+        self.max_backoff = max_backoff
+        self.backoff_seconds = 0.0
+        self.backoff_until = 0.0
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(endpoint, self.failure_threshold, self.recovery_timeout)
+                self.latencies[endpoint] = LatencyTracker(percentile=self.hedge_percentile)
+            return self.breakers[endpoint]
+
+    def throttle(self, error):
+        """
+        429 응답을 받으면 Retry-After (없으면 1초부터 두 배씩) 동안 모든 요청을 멈춥니다.
+
+        업비트 요청 제한은 IP 단위라 엔드포인트를 가리지 않고 함께 기다립니다.
+        """
+        try:
+            retry_after = float(error.response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            retry_after = None
+        with self._lock:
+            self.backoff_seconds = min(max(self.backoff_seconds * 2, 1.0), self.max_backoff)
+            wait_for = min(retry_after, self.max_backoff) if retry_after is not None else self.backoff_seconds
+            self.backoff_until = max(self.backoff_until, time.monotonic() + wait_for)
+        logger.warning(f"요청 제한(429) 응답 - {wait_for:.1f}초 동안 요청을 멈춥니다.")
+
+    def _wait_backoff(self, endpoint, deadline):
+        """
+        429 이후 대기 시간이 남아 있으면 기다립니다. (마감 시간을 넘기면 대기하지 않음)
+        """
+        wait_for = self.backoff_until - time.monotonic()
+        if wait_for <= 0:
+            return
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None and wait_for >= remaining:
+            raise ScanDeadlineExceeded(f"요청 제한 대기 중 스캔 마감 시간 초과 ({endpoint})")
+        time.sleep(wait_for)
+
+    def _request(self, endpoint, url, params, timeout):
+        started = time.monotonic()
+        response = requests.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        self.latencies[endpoint].record(time.monotonic() - started)
+        return response.json()
+
+    def get_json(self, endpoint, url, params=None, deadline=None):
+        """
+        GET 요청을 보내고 JSON 응답을 반환합니다.
+
+        첫 요청이 최근 응답 시간의 백분위수 기준을 넘기면 같은 요청을 한 번 더
+        보내고 먼저 성공한 응답을 사용합니다. 실패한 요청은 다시 보내지 않고,
+        429 응답이면 잠시 모든 요청을 멈춥니다. 4xx 응답과 스캔 마감 시간 때문에
+        줄어든 제한 시간 초과는 서킷 브레이커에 세지 않습니다.
+
+        Args:
+            endpoint (str): 서킷 브레이커/지연 통계를 구분할 엔드포인트 이름
+            url (str): 요청 URL
+            params (dict): 쿼리 파라미터
+            deadline (ScanDeadline): 스캔 마감 시간
+
+        Returns:
+            응답 JSON
+
+        Raises:
+            CircuitOpenError: 서킷 브레이커가 열려 있는 경우
+            ScanDeadlineExceeded: 마감 시간이 이미 지난 경우
+            requests.exceptions.RequestException: 요청이 모두 실패한 경우
+        """
+        breaker = self.breaker(endpoint)
+        self._wait_backoff(endpoint, deadline)
+        timeout = self.timeout
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise ScanDeadlineExceeded(f"스캔 마감 시간 초과 ({endpoint})")
+                timeout = min(timeout, remaining)
+        # 마감 시간 때문에 줄어든 제한 시간 초과는 엔드포인트 장애가 아니므로 브레이커에 세지 않음
+        deadline_limited = timeout < self.timeout
+
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"서킷 브레이커 차단 중 ({endpoint})")
+
+        started = time.monotonic()
+        hedge_after = self.latencies[endpoint].threshold()
+        pending = {self.executor.submit(self._request, endpoint, url, params, timeout)}
+        hedged = False
+        last_error = None
+
+        while pending:
+            elapsed = time.monotonic() - started
+            if elapsed >= timeout:
+                break
+            wait_for = timeout - elapsed
+            if not hedged:
+                wait_for = min(wait_for, max(hedge_after - elapsed, 0))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    data = future.result()
+                except Exception as e:
+                    last_error = e
+                    if status_code(e) == 429:
+                        self.throttle(e)
+                    continue
+                breaker.record_success()
+                with self._lock:
+                    self.backoff_seconds = 0.0
+                return data
+
+            # 헤지는 느린 요청에만 (실패한 요청을 바로 다시 보내면 429 등을 악화시킴)
+            if not done and not hedged and time.monotonic() - started < timeout:
+                hedged = True
+                remaining = timeout - (time.monotonic() - started)
+                logger.debug(f"헤지 요청 전송 ({endpoint}, 기준 {hedge_after:.2f}초)")
+                pending.add(self.executor.submit(self._request, endpoint, url, params, remaining))
+
+        if last_error is not None and not pending:
+            timed_out = isinstance(last_error, requests.exceptions.Timeout) and deadline_limited
+            if is_client_error(last_error) or timed_out:
+                breaker.record_ignored()
+            else:
+                breaker.record_failure()
+            raise last_error
+        if deadline_limited:
+            breaker.record_ignored()
+        else:
+            breaker.record_failure()
+        raise requests.exceptions.Timeout(f"응답 시간 초과 ({endpoint}, {timeout:.1f}초)")
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        여러 스레드가 공유하는 요청 속도 제한기
+
+        Args:
+            rate (float): 초당 허용 요청 수
+            capacity (float): 한 번에 몰아서 보낼 수 있는 최대 요청 수 (기본값: rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        토큰을 얻을 때까지 대기합니다.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait_for = (tokens - self.tokens) / self.rate
+            time.sleep(wait_for)
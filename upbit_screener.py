@@ -0,0 +1,200 @@
+import time
+import logging
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 점수 구성 요소 (가중치 순서)
+COMPONENTS = ('squeeze', 'proximity', 'rsi')
+DEFAULT_WEIGHTS = (0.4, 0.4, 0.2)
+
+
+def parse_weights(text):
+    """
+    "0.4,0.4,0.2" 형식의 가중치 문자열을 합이 1 인 배열로 변환합니다.
+    """
+    weights = np.array([float(value) for value in text.split(',')], dtype=np.float64)
+    if len(weights) != len(COMPONENTS) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"스크리너 가중치는 {len(COMPONENTS)}개의 0 이상 값이어야 합니다: {text}")
+    return weights / weights.sum()
+
+
+def score_markets(price, rsi, band_width, upper, lower, weights=DEFAULT_WEIGHTS,
+                  band_width_threshold=0.3, rsi_low=30.0, rsi_high=70.0):
+    """
+    모든 종목의 알림 근접도 점수를 한 번에 계산합니다. (0 ~ 1, 클수록 알림 조건에 가까움)
+
+    - squeeze: 밴드폭이 좁을수록 1 에 가까움 (밴드폭 = 기준값이면 0.5)
+    - proximity: 가까운 밴드까지의 거리. 밴드 위/아래면 1, 중심선이면 0
+    - rsi: rsi_low 이하면 1, rsi_high 이상이면 0
+
+    Args:
+        price, rsi, band_width, upper, lower (np.ndarray): 종목별 지표 (같은 길이)
+        weights (tuple): 구성 요소 가중치
+        band_width_threshold (float): 밴드폭 기준값(%)
+        rsi_low, rsi_high (float): RSI 점수 구간
+
+    Returns:
+        tuple: (점수 (종목,), 구성 요소 (구성 요소, 종목))
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    components = np.empty((len(COMPONENTS), len(price)))
+    components[0] = 1.0 / (1.0 + band_width / band_width_threshold)
+
+    span = upper - lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distance = np.minimum(np.abs(upper - price), np.abs(price - lower)) / span
+    outside = (price >= upper) | (price <= lower)
+    components[1] = np.where(outside, 1.0, np.clip(1.0 - 2.0 * distance, 0.0, 1.0))
+
+    components[2] = np.clip((rsi_high - rsi) / (rsi_high - rsi_low), 0.0, 1.0)
+
+    components = np.nan_to_num(components, nan=0.0)
+    return weights @ components, components
+
+
+def top_k(scores, k):
+    """
+    점수 상위 k 개의 인덱스를 높은 순서로 반환합니다.
+
+    전체 정렬 대신 argpartition 으로 상위 k 개만 고른 뒤 그 k 개만 정렬합니다.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, len(scores) - k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def fetch_krw_markets(analyzer):
+    """
+    /market/all 에서 원화 마켓 목록을 조회합니다.
+    """
+    data = analyzer.fetcher.get_json(
+        'market/all',
+        f"{analyzer.base_url}/market/all",
+        params={'isDetails': 'false'}
+    )
+    return [item['market'] for item in data if item['market'].startswith('KRW-')]
+
+
+class MarketScreener:
+    def __init__(self, analyzer, k=10, weights=DEFAULT_WEIGHTS, all_markets=False, max_age=None):
+        """
+        분석 결과로 모든 종목의 점수를 매겨 상위 종목 요약을 보내는 스크리너
+
+        Args:
+            analyzer: analyze_symbol/evaluate_conditions/send_telegram_message 를 제공하는 분석기
+            k (int): 요약에 포함할 종목 수
+            weights (tuple): squeeze, proximity, rsi 가중치
+            all_markets (bool): 감시 종목 대신 모든 원화 마켓을 순위에 포함
+            max_age (float): 이 시간(초)보다 오래된 분석 결과는 다시 분석 (None 이면 항상 재사용)
+        """
+        self.analyzer = analyzer
+        self.k = k
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.all_markets = all_markets
+        self.max_age = max_age
+        self.last_ranked = []
+
+    def rank(self, results):
+        """
+        분석 결과를 점수 순으로 정렬해 상위 k 개를 반환합니다.
+
+        Args:
+            results (dict): {종목: analyze_symbol 결과 또는 None}
+
+        Returns:
+            list: (점수, 분석 결과, 구성 요소 dict) 목록 (점수 내림차순)
+        """
+        analyses = [analysis for analysis in results.values() if analysis is not None]
+        if not analyses:
+            return []
+        values = np.array([
+            (a['current_price'], a['rsi'], a['band_width'], a['upper_band'], a['lower_band'])
+            for a in analyses
+        ], dtype=np.float64).T
+        scores, components = score_markets(
+            *values,
+            weights=self.weights,
+            band_width_threshold=self.analyzer.band_width_threshold,
+            rsi_high=self.analyzer.rsi_threshold
+        )
+        return [
+            (float(scores[i]), analyses[i], dict(zip(COMPONENTS, components[:, i].tolist())))
+            for i in top_k(scores, self.k)
+        ]
+
+    def collect(self):
+        """
+        순위를 매길 분석 결과를 모읍니다.
+
+        최근 스캔 결과가 충분히 새롭고 대상 종목을 모두 포함하면 그대로 쓰고,
+        아니면 빠진 종목만 분석합니다.
+        """
+        results = dict(getattr(self.analyzer, 'last_results', {}) or {})
+        scanned_at = getattr(self.analyzer, 'last_scan_at', 0)
+        if self.max_age is not None and time.time() - scanned_at > self.max_age:
+            results = {}
+
+        symbols = self.analyzer.symbols
+        if self.all_markets:
+            try:
+                symbols = fetch_krw_markets(self.analyzer)
+            except Exception as e:
+                logger.warning(f"원화 마켓 목록 조회 실패, 감시 종목만 순위에 포함합니다: {e}")
+
+        for symbol in symbols:
+            if symbol in results:
+                continue
+            try:
+                results[symbol] = self.analyzer.analyze_symbol(symbol)
+            except Exception as e:
+                logger.error(f"스크리너 분석 오류 ({symbol}): {e}")
+                continue
+            self.analyzer.pace()
+        return {symbol: results.get(symbol) for symbol in symbols}
+
+    def format_digest(self, ranked, total):
+        """
+        순위 요약 메시지를 만듭니다.
+        """
+        message = f"📋 <b>종목 스크리너 상위 {len(ranked)}/{total}</b>\n"
+        message += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        for rank, (score, analysis, components) in enumerate(ranked, 1):
+            marker = "🚨" if self.analyzer.evaluate_conditions(analysis)['alert'] else f"{rank}."
+            timeframe = f" [{analysis['timeframe']}]" if analysis.get('timeframe') else ""
+            message += f"{marker} <b>{analysis['symbol']}</b>{timeframe} 점수 {score:.2f}\n"
+            message += (f"   RSI {analysis['rsi']:.1f} · 밴드폭 {analysis['band_width']:.3f}% · "
+                        f"현재가 {analysis['current_price']:,.0f}\n")
+            message += (f"   (수축 {components['squeeze']:.2f} / 밴드 근접 {components['proximity']:.2f} / "
+                        f"RSI {components['rsi']:.2f})\n")
+        return message
+
+    def run(self):
+        """
+        순위를 매기고 요약을 텔레그램으로 보냅니다.
+
+        Returns:
+            list: rank() 결과
+        """
+        logger.info("종목 스크리너 실행")
+        try:
+            results = self.collect()
+            started = time.perf_counter()
+            ranked = self.rank(results)
+            elapsed = (time.perf_counter() - started) * 1000
+            total = sum(1 for analysis in results.values() if analysis is not None)
+            logger.info(f"스크리너 순위 계산: {total}개 종목, {elapsed:.3f}ms")
+            self.last_ranked = ranked
+            if ranked:
+                self.analyzer.send_telegram_message(self.format_digest(ranked, total))
+            return ranked
+        except Exception as e:
+            logger.error(f"스크리너 실행 중 오류: {e}")
+            return []
@@ -0,0 +1,629 @@
+import os
+import time
+import queue
+import atexit
+import bisect
+import socket
+import hashlib
+import argparse
+import logging
+import threading
+import logging.handlers
+import multiprocessing
+from multiprocessing.managers import BaseManager
+
+from upbit_resilience import ScanDeadline, TokenBucket
+from upbit_logging import SCAN_ID, new_scan_id
+
+logger = logging.getLogger(__name__)
+
+# 워커가 분석만 하도록 끄는 설정 (기록/캐시/리더 선출/모의 매매/샤딩은 코디네이터가 담당)
+WORKER_DISABLED_ENV = ('CANDLE_CACHE_PATH', 'HISTORY_DB_PATH', 'LEADER_BACKEND', 'PAPER_TRADING',
+                       'SHARD_WORKERS', 'SHARD_LISTEN')
+
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class ConsistentHashRing:
+    def __init__(self, workers=(), virtual_nodes=128):
+        """
+        종목을 워커에 나누는 일관된 해시 링
+
+        워커마다 virtual_nodes 개의 점을 링에 찍고, 종목은 자기 해시 다음에 오는
+        점의 워커가 맡습니다. 워커가 들어오거나 빠질 때 그 워커 몫의 종목만
+        옮겨 가므로 나머지 워커는 같은 종목을 계속 맡습니다.
+
+        Args:
+            workers (iterable): 처음 워커 목록
+            virtual_nodes (int): 워커당 링 위의 점 수 (클수록 고르게 나뉨)
+        """
+        self.virtual_nodes = virtual_nodes
+        self.workers = set()
+        self._points = []
+        self._owners = []
+        for worker in workers:
+            self.add(worker)
+
+    def __len__(self):
+        return len(self.workers)
+
+    def __contains__(self, worker):
+        return worker in self.workers
+
+    def _rebuild(self):
+        points = sorted((ring_hash(f"{worker}#{i}"), worker)
+                        for worker in self.workers for i in range(self.virtual_nodes))
+        self._points = [point for point, _ in points]
+        self._owners = [worker for _, worker in points]
+
+    def add(self, worker):
+        if worker in self.workers:
+            return False
+        self.workers.add(worker)
+        self._rebuild()
+        return True
+
+    def remove(self, worker):
+        if worker not in self.workers:
+            return False
+        self.workers.discard(worker)
+        self._rebuild()
+        return True
+
+    def owner(self, key):
+        """
+        종목을 맡는 워커를 반환합니다. (워커가 없으면 None)
+        """
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, ring_hash(key)) % len(self._points)
+        return self._owners[i]
+
+    def assign(self, keys):
+        """
+        종목들을 워커별 샤드로 나눕니다.
+
+        Returns:
+            dict: 워커 → 종목 목록 (입력 순서 유지)
+        """
+        shards = {}
+        for key in keys:
+            shards.setdefault(self.owner(key), []).append(key)
+        shards.pop(None, None)
+        return shards
+
+
+class LocalTransport:
+    def __init__(self, context=None):
+        """
+        같은 서버의 워커 프로세스와 multiprocessing.Queue 로 주고받는 전송 계층
+
+        워커마다 작업 큐가 하나씩 있고, 결과/하트비트/로그는 결과 큐 하나로 모입니다.
+        """
+        self.context = context or multiprocessing.get_context()
+        self.results = self.context.Queue()
+        self._tasks = {}
+
+    def tasks(self, worker_id):
+        if worker_id not in self._tasks:
+            self._tasks[worker_id] = self.context.Queue()
+        return self._tasks[worker_id]
+
+    def client(self, worker_id):
+        return LocalClient(self.tasks(worker_id), self.results)
+
+    def close(self):
+        pass
+
+
+class LocalClient:
+    def __init__(self, tasks, results):
+        self._tasks = tasks
+        self._results = results
+
+    def connect(self, worker_id):
+        return self._tasks, self._results
+
+
+class _ShardServerManager(BaseManager):
+    pass
+
+
+class _ShardClientManager(BaseManager):
+    pass
+
+
+_ShardClientManager.register('tasks')
+_ShardClientManager.register('results')
+
+
+class ManagerTransport:
+    def __init__(self, address, authkey):
+        """
+        다른 서버의 워커가 TCP 로 접속하는 전송 계층 (multiprocessing.managers)
+
+        코디네이터 프로세스 안의 스레드가 큐를 제공하므로 코디네이터는 큐를 직접
+        읽고, 워커는 프록시로 접속합니다. 같은 서버의 워커도 이 주소로 접속합니다.
+
+        Args:
+            address (tuple): (호스트, 포트). 포트 0 이면 빈 포트 사용
+            authkey (bytes): 접속 인증 키
+        """
+        self.results = queue.Queue()
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.authkey = authkey
+        _ShardServerManager.register('tasks', callable=self.tasks)
+        _ShardServerManager.register('results', callable=lambda: self.results)
+        self.server = _ShardServerManager(address=address, authkey=authkey).get_server()
+        self.address = self.server.address
+        threading.Thread(target=self.server.serve_forever, name='shard-transport', daemon=True).start()
+        logger.info(f"샤드 워커 접속 대기: {self.address[0]}:{self.address[1]}")
+
+    def tasks(self, worker_id):
+        with self._lock:
+            if worker_id not in self._tasks:
+                self._tasks[worker_id] = queue.Queue()
+            return self._tasks[worker_id]
+
+    def client(self, worker_id):
+        host, port = self.address
+        return ManagerClient(('127.0.0.1' if host in ('', '0.0.0.0') else host, port), self.authkey)
+
+    def close(self):
+        stop_event = getattr(self.server, 'stop_event', None)
+        if stop_event is not None:
+            stop_event.set()
+
+
+class ManagerClient:
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+
+    def connect(self, worker_id):
+        manager = _ShardClientManager(address=self.address, authkey=self.authkey)
+        manager.connect()
+        return manager.tasks(worker_id), manager.results()
+
+
+class ShardLogHandler(logging.handlers.QueueHandler):
+    """
+    워커의 로그를 결과 큐로 코디네이터에 보내는 핸들러 (스캔 ID 유지)
+    """
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.scan_id = SCAN_ID.get()
+        return record
+
+
+def cloud_analyzer():
+    """
+    워커용 클라우드 분석기를 만듭니다.
+
+    워커는 캔들을 받아 지표만 계산하므로 텔레그램/기록/캐시/리더 선출/샤딩은 끕니다.
+    """
+    for name in WORKER_DISABLED_ENV:
+        os.environ.pop(name, None)
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'shard-worker')
+    os.environ.setdefault('TELEGRAM_CHAT_ID', 'shard-worker')
+    from upbit_alert_cloud import UpbitTechnicalAnalyzer
+    return UpbitTechnicalAnalyzer()
+
+
+def scan_shard(analyzer, worker_id, scan_id, markets, deadline_seconds, results, rate=None):
+    """
+    맡은 종목을 분석하고 종목마다 결과를 바로 보냅니다.
+
+    rate 가 있으면 코디네이터가 나눠 준 초당 요청 수로 조회 간격을 맞춥니다. (워커들의
+    합이 요청 예산을 넘지 않음) 없으면 분석기의 request_delay 만큼 쉽니다.
+    """
+    analyzer.skip_reasons = {}
+    analyzer.scan_deadline = ScanDeadline(deadline_seconds)
+    bucket = TokenBucket(rate, capacity=1) if rate else None
+    for symbol in markets:
+        analysis = None
+        if analyzer.scan_deadline.expired():
+            analyzer.skip_reasons[symbol] = "스캔 마감 시간 초과"
+        else:
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                analysis = analyzer.analyze_symbol(symbol)
+            except Exception as e:
+                logger.error("종목 분석 중 오류 (%s): %s", symbol, e)
+                analyzer.skip_reasons[symbol] = f"체크 오류: {e}"
+        # 종목 간 계산(시장 지표)용 캔들은 코디네이터가 보관
+        frame = analyzer.candle_frames.pop(symbol, None)
+        results.put(('result', worker_id, scan_id, symbol, analysis, analyzer.skip_reasons.get(symbol),
+                     frame if analysis is not None else None))
+        if bucket is None and analysis is not None:
+            time.sleep(analyzer.request_delay)
+    analyzer.scan_deadline = None
+
+
+def run_worker(worker_id, client, heartbeat_interval=2.0, analyzer_factory=None):
+    """
+    샤드 워커를 실행합니다. (stop 작업을 받을 때까지)
+
+    Args:
+        worker_id (str): 워커 이름 (코디네이터 안에서 고유해야 함)
+        client (LocalClient|ManagerClient): 작업/결과 큐 접속 정보
+        heartbeat_interval (float): 하트비트 주기(초)
+        analyzer_factory (callable): 분석기 생성 함수 (기본값: cloud_analyzer)
+    """
+    tasks, results = client.connect(worker_id)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(ShardLogHandler(results))
+
+    analyzer = (analyzer_factory or cloud_analyzer)()
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(heartbeat_interval):
+            results.put(('heartbeat', worker_id))
+
+    results.put(('hello', worker_id, socket.gethostname(), os.getpid()))
+    threading.Thread(target=heartbeat, name='shard-heartbeat', daemon=True).start()
+    try:
+        while True:
+            task = tasks.get()
+            if task[0] == 'stop':
+                break
+            _, scan_id, markets, deadline_seconds, rate = task
+            token = SCAN_ID.set(scan_id)
+            try:
+                scan_shard(analyzer, worker_id, scan_id, markets, deadline_seconds, results, rate)
+            finally:
+                SCAN_ID.reset(token)
+    finally:
+        stopped.set()
+        results.put(('bye', worker_id))
+
+
+class ShardScan:
+    def __init__(self, scan_id):
+        """
+        샤드로 나눈 한 번의 스캔 결과 (워커가 보내는 대로 채워짐)
+
+        Attributes:
+            analyses (dict): 종목별 분석 결과 (분석 실패 시 None)
+            frames (dict): 종목별 캔들 데이터
+            reasons (dict): 건너뛴 종목과 사유
+            pending (dict): 아직 결과가 오지 않은 종목 → 맡은 워커
+        """
+        self.scan_id = scan_id
+        self.analyses = {}
+        self.frames = {}
+        self.reasons = {}
+        self.pending = {}
+        self.reassigned = 0
+
+    def receive(self, message):
+        _, worker_id, scan_id, symbol, analysis, reason, frame = message
+        # 지난 스캔 결과나 재배정 후 늦게 온 중복 결과는 무시
+        if scan_id != self.scan_id or symbol not in self.pending:
+            return
+        del self.pending[symbol]
+        self.analyses[symbol] = analysis
+        if frame is not None:
+            self.frames[symbol] = frame
+        if reason:
+            self.reasons[symbol] = reason
+
+
+class ShardCoordinator:
+    def __init__(self, transport, heartbeat_timeout=10.0, virtual_nodes=128, is_alive=None, rate_budget=None):
+        """
+        종목을 워커에 나눠 맡기고 결과를 모으는 코디네이터
+
+        워커는 hello/하트비트로 합류하고, heartbeat_timeout 초 동안 소식이 없거나
+        is_alive 가 False 를 돌려주면 빠진 것으로 봅니다. 스캔 중에 워커가 빠지면
+        그 워커가 아직 보내지 않은 종목을 남은 워커에 다시 배정합니다.
+
+        워커는 작업을 하나씩 처리하므로 작업마다 초당 요청 예산을 보낼 때의 워커
+        수로 나눠 주면 동시에 도는 워커들의 요청 합이 예산을 넘지 않습니다.
+
+        Args:
+            transport (LocalTransport|ManagerTransport): 전송 계층
+            heartbeat_timeout (float): 워커를 빠진 것으로 보는 무응답 시간(초)
+            virtual_nodes (int): 해시 링의 워커당 점 수
+            is_alive (callable): 워커 ID → 생존 여부 (알 수 없으면 None)
+            rate_budget (float): 모든 워커가 나눠 쓰는 초당 요청 수 (None 이면 워커별 request_delay)
+        """
+        self.transport = transport
+        self.heartbeat_timeout = heartbeat_timeout
+        self.rate_budget = rate_budget
+        self.ring = ConsistentHashRing(virtual_nodes=virtual_nodes)
+        self.is_alive = is_alive
+        self.last_seen = {}
+
+    def join(self, worker_id):
+        if self.ring.add(worker_id):
+            logger.info(f"샤드 워커 합류: {worker_id} (총 {len(self.ring)}개)")
+
+    def leave(self, worker_id, reason):
+        self.last_seen.pop(worker_id, None)
+        if self.ring.remove(worker_id):
+            logger.warning(f"샤드 워커 제외: {worker_id} ({reason}, 남은 워커 {len(self.ring)}개)")
+
+    def handle(self, message, scan=None):
+        if isinstance(message, logging.LogRecord):
+            logging.getLogger(message.name).handle(message)
+            return
+        kind, worker_id = message[0], message[1]
+        if kind == 'bye':
+            self.leave(worker_id, "종료")
+            return
+        self.last_seen[worker_id] = time.monotonic()
+        if worker_id not in self.ring:
+            self.join(worker_id)
+        if kind == 'result' and scan is not None:
+            scan.receive(message)
+
+    def poll(self, timeout=0.0, scan=None):
+        """
+        결과 큐의 메시지를 처리합니다. 첫 메시지는 timeout 초까지 기다리고 나머지는 있는 만큼 처리합니다.
+        """
+        try:
+            message = self.transport.results.get(timeout=timeout) if timeout > 0 else self.transport.results.get_nowait()
+        except queue.Empty:
+            return 0
+        count = 1
+        self.handle(message, scan)
+        while True:
+            try:
+                message = self.transport.results.get_nowait()
+            except queue.Empty:
+                return count
+            self.handle(message, scan)
+            count += 1
+
+    def expire(self):
+        """
+        응답이 없거나 종료된 워커를 링에서 뺍니다.
+
+        Returns:
+            list: 뺀 워커 목록
+        """
+        now = time.monotonic()
+        dead = []
+        for worker_id in list(self.ring.workers):
+            alive = self.is_alive(worker_id) if self.is_alive is not None else None
+            if alive is False:
+                self.leave(worker_id, "프로세스 종료")
+                dead.append(worker_id)
+            elif now - self.last_seen.get(worker_id, now) > self.heartbeat_timeout:
+                self.leave(worker_id, f"{self.heartbeat_timeout:.0f}초 무응답")
+                dead.append(worker_id)
+        return dead
+
+    def wait_for_workers(self, count, timeout=30.0):
+        """
+        워커가 count 개 이상 합류할 때까지 기다립니다.
+
+        Returns:
+            bool: 제시간에 모였으면 True
+        """
+        deadline = time.monotonic() + timeout
+        while len(self.ring) < count and time.monotonic() < deadline:
+            self.poll(min(0.2, max(deadline - time.monotonic(), 0.01)))
+        return len(self.ring) >= count
+
+    def dispatch(self, scan, markets, deadline_seconds=None):
+        rate = self.rate_budget / len(self.ring) if self.rate_budget and self.ring else None
+        for worker_id, shard in self.ring.assign(markets).items():
+            self.transport.tasks(worker_id).put(('scan', scan.scan_id, shard, deadline_seconds, rate))
+            for symbol in shard:
+                scan.pending[symbol] = worker_id
+
+    def scan(self, markets, timeout=None):
+        """
+        종목을 해시 링으로 나눠 워커에 보내고 결과를 모읍니다.
+
+        현재 스캔 ID 를 그대로 워커에 넘기므로 워커 로그도 같은 scan_id 로 남습니다.
+
+        Args:
+            markets (list): 스캔할 종목 목록
+            timeout (float): 결과를 기다리는 최대 시간(초, None 이면 워커가 남아 있는 한 대기)
+
+        Returns:
+            ShardScan: 모은 결과 (제시간에 오지 않은 종목은 reasons 에 사유)
+        """
+        scan = ShardScan(SCAN_ID.get() or new_scan_id())
+        started = time.monotonic()
+        deadline = started + timeout if timeout else None
+        self.poll(0)
+        self.expire()
+        self.dispatch(scan, markets, timeout)
+        shards = len(set(scan.pending.values()))
+
+        while scan.pending and self.ring:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            self.poll(0.5 if deadline is None else min(0.5, deadline - now), scan)
+            dead = self.expire()
+            if dead:
+                moved = [symbol for symbol, worker_id in scan.pending.items() if worker_id in dead]
+                if moved and self.ring:
+                    remaining = None if deadline is None else max(deadline - time.monotonic(), 1.0)
+                    self.dispatch(scan, moved, remaining)
+                    scan.reassigned += len(moved)
+                    logger.warning(f"빠진 워커의 종목 {len(moved)}개를 남은 워커 {len(self.ring)}개에 다시 배정")
+
+        for symbol in scan.pending:
+            scan.reasons[symbol] = "샤드 워커 응답 없음"
+        logger.info(f"샤드 스캔 완료: {len(scan.analyses)}/{len(markets)}개 종목, 워커 {shards}개, "
+                    f"재배정 {scan.reassigned}개, {time.monotonic() - started:.1f}초")
+        return scan
+
+
+class ShardPool:
+    def __init__(self, local_workers=2, listen=None, authkey=None, heartbeat_interval=2.0,
+                 heartbeat_timeout=10.0, start_timeout=30.0, rate_budget=None):
+        """
+        코디네이터와 로컬 워커 프로세스 묶음
+
+        listen 을 주면 그 주소로 다른 서버의 워커도 받으며, 이때는 로컬 워커도 같은
+        주소로 접속합니다. 죽은 로컬 워커는 다음 스캔 전에 새 워커로 다시 띄웁니다.
+
+        multiprocessing.managers 는 받은 데이터를 unpickle 하므로 listen 에는 인증 키가
+        반드시 필요합니다.
+
+        Args:
+            local_workers (int): 띄울 로컬 워커 프로세스 수
+            listen (tuple): 원격 워커 접속 주소 (호스트, 포트), None 이면 로컬 큐만 사용
+            authkey (bytes): 원격 접속 인증 키 (listen 사용 시 필수)
+            heartbeat_interval (float): 워커 하트비트 주기(초)
+            heartbeat_timeout (float): 워커를 빠진 것으로 보는 무응답 시간(초)
+            start_timeout (float): 처음 로컬 워커가 모두 합류하기를 기다리는 시간(초)
+            rate_budget (float): 모든 워커가 나눠 쓰는 초당 요청 수
+
+        Raises:
+            ValueError: listen 을 주었는데 authkey 가 없는 경우
+        """
+        if listen and not authkey:
+            raise ValueError("SHARD_LISTEN 을 쓰려면 SHARD_AUTHKEY 를 설정해야 합니다.")
+        self.local_workers = local_workers
+        self.heartbeat_interval = heartbeat_interval
+        self.transport = ManagerTransport(listen, authkey) if listen else LocalTransport()
+        self.coordinator = ShardCoordinator(self.transport, heartbeat_timeout, is_alive=self._is_alive,
+                                            rate_budget=rate_budget)
+        self.processes = {}
+        self.started = 0
+        self.ensure_workers()
+        if not self.coordinator.wait_for_workers(local_workers, start_timeout):
+            logger.warning(f"샤드 워커 {len(self.coordinator.ring)}/{local_workers}개만 합류했습니다.")
+        atexit.register(self.stop)
+
+    def _is_alive(self, worker_id):
+        process = self.processes.get(worker_id)
+        return None if process is None else process.is_alive()
+
+    def ensure_workers(self):
+        """
+        종료된 로컬 워커를 정리하고 모자란 만큼 새로 띄웁니다.
+        """
+        for worker_id, process in list(self.processes.items()):
+            if not process.is_alive():
+                process.join(0)
+                del self.processes[worker_id]
+                self.coordinator.leave(worker_id, f"프로세스 종료 (코드 {process.exitcode})")
+        while len(self.processes) < self.local_workers:
+            self.started += 1
+            worker_id = f"{socket.gethostname()}-{os.getpid()}-{self.started}"
+            process = multiprocessing.Process(
+                target=run_worker,
+                args=(worker_id, self.transport.client(worker_id), self.heartbeat_interval),
+                name=f"shard-{self.started}",
+                daemon=True
+            )
+            process.start()
+            self.processes[worker_id] = process
+
+    def ready(self, timeout=10.0):
+        """
+        합류한 워커가 있는지 확인합니다. (죽은 로컬 워커는 다시 띄우고 합류를 잠시 기다림)
+        """
+        self.ensure_workers()
+        deadline = time.monotonic() + timeout
+        self.coordinator.poll(0)
+        while (any(worker_id not in self.coordinator.ring for worker_id in self.processes)
+               and time.monotonic() < deadline):
+            self.coordinator.poll(0.1)
+        return len(self.coordinator.ring) > 0
+
+    def scan(self, markets, timeout=None):
+        self.ensure_workers()
+        return self.coordinator.scan(markets, timeout)
+
+    def stop(self, timeout=5.0):
+        for worker_id in list(self.coordinator.ring.workers):
+            self.transport.tasks(worker_id).put(('stop',))
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = {}
+        self.coordinator.poll(0)
+        self.transport.close()
+
+
+def parse_address(text):
+    """
+    "호스트:포트" 또는 ":포트" 를 (호스트, 포트) 로 바꿉니다. (호스트가 없으면 127.0.0.1)
+    """
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def shard_pool_from_env():
+    """
+    환경변수로 샤드 풀을 만듭니다. (SHARD_WORKERS 와 SHARD_LISTEN 이 모두 없으면 None)
+    """
+    local_workers = int(os.getenv('SHARD_WORKERS', '0'))
+    listen = os.getenv('SHARD_LISTEN')
+    if local_workers <= 0 and not listen:
+        return None
+    authkey = os.getenv('SHARD_AUTHKEY', '')
+    return ShardPool(
+        local_workers=max(local_workers, 0),
+        listen=parse_address(listen) if listen else None,
+        authkey=authkey.encode('utf-8') if authkey else None,
+        heartbeat_timeout=float(os.getenv('SHARD_HEARTBEAT_TIMEOUT_SECONDS', '10')),
+        rate_budget=float(os.getenv('RATE_BUDGET', '8')) or None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='업비트 샤드 스캔 워커/분배 계획')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    worker = subparsers.add_parser('worker', help='코디네이터(SHARD_LISTEN)에 접속하는 원격 워커 실행')
+    worker.add_argument('--connect', required=True, help='코디네이터 주소 (호스트:포트)')
+    worker.add_argument('--authkey', default=os.getenv('SHARD_AUTHKEY'), help='접속 인증 키 (기본값: SHARD_AUTHKEY)')
+    worker.add_argument('--id', default=f"{socket.gethostname()}-{os.getpid()}", help='워커 이름')
+    worker.add_argument('--heartbeat', type=float, default=2.0, help='하트비트 주기(초)')
+
+    plan = subparsers.add_parser('plan', help='워커 수에 따른 종목 분배와 워커 증감 시 이동량 출력')
+    plan.add_argument('--markets', type=int, default=200, help='종목 수')
+    plan.add_argument('--workers', type=int, default=4, help='워커 수')
+    plan.add_argument('--virtual-nodes', type=int, default=128, help='워커당 해시 링 점 수')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        if not args.authkey:
+            parser.error("--authkey 또는 SHARD_AUTHKEY 가 필요합니다.")
+        logging.basicConfig(level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+                            format='%(asctime)s - %(levelname)s - %(message)s')
+        host, port = parse_address(args.connect)
+        logger.info(f"코디네이터 접속: {host}:{port} ({args.id})")
+        run_worker(args.id, ManagerClient((host, port), args.authkey.encode('utf-8')), args.heartbeat)
+        return
+
+    markets = [f"KRW-M{i:04d}" for i in range(args.markets)]
+    workers = [f"worker-{i + 1}" for i in range(args.workers)]
+    ring = ConsistentHashRing(workers, virtual_nodes=args.virtual_nodes)
+    before = {market: ring.owner(market) for market in markets}
+    sizes = sorted(len(shard) for shard in ring.assign(markets).values())
+    print(f"종목 {len(markets)}개 / 워커 {len(workers)}개: 샤드 크기 최소 {sizes[0]}, 최대 {sizes[-1]}")
+
+    ring.add(f"worker-{len(workers) + 1}")
+    moved = sum(ring.owner(market) != before[market] for market in markets)
+    print(f"워커 1개 합류: {moved}개 종목 이동 ({moved / len(markets) * 100:.1f}%)")
+
+    ring.remove(f"worker-{len(workers) + 1}")
+    ring.remove(workers[0])
+    moved = sum(ring.owner(market) != before[market] for market in markets)
+    print(f"워커 1개 이탈: {moved}개 종목 이동 ({moved / len(markets) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
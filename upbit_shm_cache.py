@@ -0,0 +1,269 @@
+import os
+import mmap
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'UPBCACHE'
+VERSION = 1
+FIELDS = ('open', 'high', 'low', 'close', 'volume', 'value')
+NAME_BYTES = 32
+
+# 파일 헤더: magic, version, max_markets, capacity, unit_seconds, market_count
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('max_markets', '<u4'),
+    ('capacity', '<u4'),
+    ('unit_seconds', '<u4'),
+    ('market_count', '<u4'),
+    ('reserved', '<u4', 9),
+])
+# 종목별 슬롯 헤더: seq 가 홀수이면 쓰는 중
+SLOT_DTYPE = np.dtype([
+    ('seq', '<u8'),
+    ('count', '<u8'),
+    ('head', '<u8'),
+    ('last_timestamp', '<i8'),
+])
+
+
+class CacheLayout:
+    def __init__(self, max_markets, capacity):
+        """
+        캐시 파일의 고정 레이아웃 (모든 구역은 8바이트 정렬)
+
+        [헤더][종목 이름 목록][종목별 슬롯 헤더][timestamp (종목, 용량) int64][값 (필드, 종목, 용량) float64]
+        """
+        self.max_markets = max_markets
+        self.capacity = capacity
+        self.names_offset = HEADER_DTYPE.itemsize
+        self.slots_offset = self.names_offset + max_markets * NAME_BYTES
+        self.timestamps_offset = self.slots_offset + max_markets * SLOT_DTYPE.itemsize
+        self.values_offset = self.timestamps_offset + max_markets * capacity * 8
+        self.size = self.values_offset + len(FIELDS) * max_markets * capacity * 8
+
+    def arrays(self, buffer):
+        """
+        버퍼 위에 복사 없이 NumPy 배열을 만듭니다.
+        """
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer, offset=0)
+        names = np.ndarray((self.max_markets,), dtype=f'S{NAME_BYTES}', buffer=buffer, offset=self.names_offset)
+        slots = np.ndarray((self.max_markets,), dtype=SLOT_DTYPE, buffer=buffer, offset=self.slots_offset)
+        timestamps = np.ndarray((self.max_markets, self.capacity), dtype='<i8', buffer=buffer,
+                                offset=self.timestamps_offset)
+        values = np.ndarray((len(FIELDS), self.max_markets, self.capacity), dtype='<f8', buffer=buffer,
+                            offset=self.values_offset)
+        return header, names, slots, timestamps, values
+
+
+def _read_layout(mapped):
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=mapped, offset=0)
+    if bytes(header['magic']) != MAGIC or int(header['version']) != VERSION:
+        raise ValueError("캔들 캐시 파일 형식이 아닙니다.")
+    return CacheLayout(int(header['max_markets']), int(header['capacity']))
+
+
+class CandleCacheWriter:
+    def __init__(self, path, max_markets=512, capacity=1024, unit_seconds=3600):
+        """
+        메모리 매핑 캔들 캐시의 단일 작성자
+
+        종목별 링 버퍼에 캔들을 추가합니다. 종목별 시퀀스 번호(seqlock)를 쓰기 전후로
+        1씩 올려 쓰는 동안에는 홀수가 되도록 하므로, 독자는 읽기 전후 시퀀스가 같은
+        짝수일 때만 결과를 사용합니다. 작성자는 파일에 배타적 잠금을 걸어 하나만
+        존재하도록 합니다.
+
+        Args:
+            path (str): 캐시 파일 경로 (없으면 생성)
+            max_markets (int): 최대 종목 수
+            capacity (int): 종목별로 보관할 캔들 수
+            unit_seconds (int): 캔들 길이(초)
+        """
+        self.path = path
+        exists = os.path.exists(path)
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._file.close()
+                raise RuntimeError(f"다른 프로세스가 이미 캔들 캐시에 쓰고 있습니다: {path}")
+
+        if exists and os.path.getsize(path) > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+            self.layout = _read_layout(self._mmap)
+            self.header, self.names, self.slots, self.timestamps, self.values = self.layout.arrays(self._mmap)
+            if int(self.header['unit_seconds']) != unit_seconds:
+                raise ValueError(f"캐시 캔들 단위({int(self.header['unit_seconds'])}초)가 요청한 단위({unit_seconds}초)와 다릅니다.")
+            # 이전 작성자가 쓰는 도중 종료된 슬롯 복구
+            torn = (self.slots['seq'] % 2) == 1
+            self.slots['seq'][torn] += 1
+        else:
+            self.layout = CacheLayout(max_markets, capacity)
+            self._file.truncate(self.layout.size)
+            self._mmap = mmap.mmap(self._file.fileno(), self.layout.size)
+            self.header, self.names, self.slots, self.timestamps, self.values = self.layout.arrays(self._mmap)
+            self.header['max_markets'] = max_markets
+            self.header['capacity'] = capacity
+            self.header['unit_seconds'] = unit_seconds
+            self.header['version'] = VERSION
+            self.header['magic'] = MAGIC
+
+        self.unit_seconds = int(self.header['unit_seconds'])
+        count = int(self.header['market_count'])
+        self.index = {name.decode(): i for i, name in enumerate(self.names[:count])}
+
+    def _slot(self, market):
+        slot = self.index.get(market)
+        if slot is None:
+            slot = int(self.header['market_count'])
+            if slot >= self.layout.max_markets:
+                raise RuntimeError(f"캔들 캐시 종목 수 한도({self.layout.max_markets})를 초과했습니다.")
+            # 이름을 먼저 쓰고 종목 수를 올려 독자가 빈 이름을 보지 않도록 함
+            self.names[slot] = market.encode()[:NAME_BYTES]
+            self.header['market_count'] = slot + 1
+            self.index[market] = slot
+        return slot
+
+    def write_candles(self, market, frame):
+        """
+        캔들을 캐시에 추가합니다.
+
+        마지막 캔들보다 새 캔들은 추가하고, 같은 시각의 캔들은 (진행 중 캔들 갱신으로 보고)
+        덮어쓰며, 더 오래된 캔들은 무시합니다.
+
+        Args:
+            market (str): 마켓 코드
+            frame (pd.DataFrame): candles_to_frame 형식, timestamp 오름차순
+
+        Returns:
+            int: 기록한 캔들 수
+        """
+        if frame is None or frame.empty:
+            return 0
+        slot = self._slot(market)
+        state = self.slots[slot]
+        capacity = self.layout.capacity
+        count = int(state['count'])
+        last = int(state['last_timestamp']) if count else None
+
+        timestamps = frame['timestamp'].values.astype(np.int64)
+        keep = np.ones(len(frame), dtype=bool) if last is None else timestamps >= last
+        if not keep.any():
+            return 0
+        timestamps = timestamps[keep][-capacity:]
+        rows = frame[list(FIELDS)].values[keep][-capacity:].astype(np.float64)
+
+        head = int(state['head'])
+        if last is not None and timestamps[0] == last:
+            # 진행 중이던 마지막 캔들을 덮어쓰기 위해 한 칸 뒤로
+            head = (head - 1) % capacity
+            count -= 1
+        positions = (head + np.arange(len(timestamps))) % capacity
+
+        self.slots['seq'][slot] += 1  # 홀수: 쓰는 중
+        self.timestamps[slot, positions] = timestamps
+        self.values[:, slot, positions] = rows.T
+        self.slots['head'][slot] = (head + len(timestamps)) % capacity
+        self.slots['count'][slot] = min(count + len(timestamps), capacity)
+        self.slots['last_timestamp'][slot] = timestamps[-1]
+        self.slots['seq'][slot] += 1  # 짝수: 쓰기 완료
+        return len(timestamps)
+
+    def close(self):
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+
+class CandleCacheReader:
+    def __init__(self, path, max_retries=1000):
+        """
+        메모리 매핑 캔들 캐시 독자 (여러 프로세스에서 동시에 사용 가능)
+
+        Args:
+            path (str): 캐시 파일 경로
+            max_retries (int): 쓰기와 겹쳤을 때 다시 읽는 최대 횟수
+        """
+        self.path = path
+        self.max_retries = max_retries
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.layout = _read_layout(self._mmap)
+        self.header, self.names, self.slots, self.timestamps, self.values = self.layout.arrays(self._mmap)
+        self.unit_seconds = int(self.header['unit_seconds'])
+
+    def markets(self):
+        """
+        캐시에 있는 종목 목록을 반환합니다.
+        """
+        count = int(self.header['market_count'])
+        return [name.decode() for name in self.names[:count]]
+
+    def _slot(self, market):
+        markets = self.markets()
+        if market not in markets:
+            raise KeyError(f"캐시에 없는 종목입니다: {market}")
+        return markets.index(market)
+
+    def view(self, market):
+        """
+        종목 슬롯을 복사 없이 반환합니다. (seqlock 검증 없음, 링 버퍼 순서 그대로)
+
+        Returns:
+            tuple: (timestamps (용량,), values (필드, 용량), 슬롯 헤더)
+        """
+        slot = self._slot(market)
+        return self.timestamps[slot], self.values[:, slot], self.slots[slot]
+
+    def read_arrays(self, market, last=None):
+        """
+        종목의 캔들을 오래된 것부터 일관된 상태로 복사해 반환합니다.
+
+        Args:
+            market (str): 마켓 코드
+            last (int): 최근 캔들 개수 (기본값: 전체)
+
+        Returns:
+            tuple: (timestamps (n,) int64, values (필드, n) float64)
+        """
+        slot = self._slot(market)
+        capacity = self.layout.capacity
+        for _ in range(self.max_retries):
+            before = int(self.slots['seq'][slot])
+            if before % 2:
+                time.sleep(0)
+                continue
+            count = int(self.slots['count'][slot])
+            head = int(self.slots['head'][slot])
+            n = count if last is None else min(last, count)
+            positions = (head - n + np.arange(n)) % capacity
+            timestamps = self.timestamps[slot, positions]
+            values = self.values[:, slot, positions]
+            if int(self.slots['seq'][slot]) == before:
+                return timestamps, values
+        raise RuntimeError(f"캔들 캐시를 일관되게 읽지 못했습니다 ({market})")
+
+    def read(self, market, last=None):
+        """
+        종목의 캔들을 candles_to_frame 형식의 데이터프레임으로 반환합니다.
+        """
+        timestamps, values = self.read_arrays(market, last)
+        frame = pd.DataFrame({'timestamp': timestamps})
+        for i, name in enumerate(FIELDS):
+            frame[name] = values[i]
+        return frame
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# 이력 조각에 담는 값과 소수 자릿수 (가격은 유효숫자)
+SERIES_FIELDS = ('close', 'upper', 'middle', 'lower', 'rsi')
+
+
+def round_significant(values, digits=7):
+    """
+    배열을 유효숫자 digits 자리로 반올림하고 NaN 은 None 으로 바꾼 리스트를 반환합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+        scale = np.where(np.isfinite(magnitude), 10.0 ** (digits - 1 - magnitude), 1.0)
+        rounded = np.round(values * scale) / scale
+    return [None if not np.isfinite(value) else float(value) for value in rounded]
+
+
+def encode_chunk(data):
+    """
+    조각을 JSON 바이트로 직렬화합니다. (같은 내용이면 항상 같은 바이트)
+    """
+    return json.dumps(data, separators=(',', ':'), sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+class DashboardSnapshot:
+    def __init__(self, out_dir, history_points=168, block_candles=24, candle_seconds=3600, max_alerts=50):
+        """
+        정적 대시보드(index.html)가 읽는 스냅샷을 만듭니다.
+
+        manifest.json 만 매번 바뀌고 나머지는 내용 해시가 파일 이름에 들어간
+        조각이라, 내용이 같은 조각은 같은 주소로 남아 브라우저 캐시를 그대로
+        씁니다. 종목별 이력은 UTC 기준 block_candles 개 캔들 단위로 나누므로 지난
+        블록은 바뀌지 않고 진행 중인 블록만 새로 받습니다. 최근 알림은 이전
+        스냅샷의 알림에 이어 붙입니다.
+
+        Args:
+            out_dir (str): 스냅샷 디렉토리 (index.html 기준 data/)
+            history_points (int): 종목별로 보여줄 최근 캔들 수
+            block_candles (int): 이력 조각 하나의 캔들 수
+            candle_seconds (int): 캔들 길이(초)
+            max_alerts (int): 보관할 최근 알림 수
+        """
+        self.out_dir = out_dir
+        self.history_points = history_points
+        self.block_candles = block_candles
+        self.candle_seconds = candle_seconds
+        self.max_alerts = max_alerts
+        self.markets = {}
+        self.series = {}
+        self.alerts = []
+
+    def add_market(self, analysis, conditions, series=None):
+        """
+        한 종목의 분석 결과를 추가합니다.
+
+        Args:
+            analysis (dict): analyze_symbol 결과
+            conditions (dict): 조건별 만족 여부 (rsi, band_width, upper_breakout, lower_breakout, alert)
+            series (dict): timestamp, close, upper, middle, lower, rsi 배열 (없으면 이력 생략)
+        """
+        symbol = analysis['symbol']
+        self.markets[symbol] = {
+            'price': round_significant([analysis['current_price']])[0],
+            'rsi': round(float(analysis['rsi']), 2),
+            'band_width': round(float(analysis['band_width']), 4),
+            'upper': round_significant([analysis['upper_band']])[0],
+            'middle': round_significant([analysis['middle_band']])[0],
+            'lower': round_significant([analysis['lower_band']])[0],
+            'conditions': {key: bool(value) for key, value in conditions.items()},
+        }
+        if series is not None:
+            self.series[symbol] = series
+        if conditions.get('alert'):
+            timestamp = int(series['timestamp'][-1]) if series is not None else None
+            self.alerts.append({
+                'symbol': symbol,
+                'candle': timestamp,
+                'price': self.markets[symbol]['price'],
+                'rsi': self.markets[symbol]['rsi'],
+                'band_width': self.markets[symbol]['band_width'],
+                'side': 'upper' if conditions.get('upper_breakout') else 'lower',
+            })
+
+    def history_chunks(self, symbol):
+        """
+        종목 이력을 UTC 블록 단위 조각으로 나눕니다.
+
+        Returns:
+            list: (블록 번호, 조각 데이터) 목록
+        """
+        series = self.series[symbol]
+        timestamp = np.asarray(series['timestamp'], dtype=np.int64)[-self.history_points:]
+        blocks = timestamp // (self.block_candles * self.candle_seconds)
+        chunks = []
+        for block in np.unique(blocks):
+            mask = blocks == block
+            times = timestamp[mask]
+            chunk = {
+                'start': int(times[0]),
+                'step': self.candle_seconds,
+                # 빈 캔들이 있을 수 있어 시각은 캔들 간격 단위의 차이로 저장
+                'offsets': ((times - times[0]) // self.candle_seconds).tolist(),
+            }
+            for field in SERIES_FIELDS:
+                values = np.asarray(series[field], dtype=np.float64)[-self.history_points:][mask]
+                chunk[field] = ([None if not np.isfinite(v) else round(float(v), 2) for v in values]
+                                if field == 'rsi' else round_significant(values))
+            chunks.append((int(block), chunk))
+        return chunks
+
+    def _write_chunk(self, name, data, written):
+        payload = encode_chunk(data)
+        filename = f"{name}-{content_hash(payload)}.json"
+        path = os.path.join(self.out_dir, filename)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+            written.append(filename)
+        return filename
+
+    def load_manifest(self):
+        path = os.path.join(self.out_dir, 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"이전 대시보드 스냅샷을 읽을 수 없습니다: {e}")
+            return None
+
+    def load_alerts(self, manifest):
+        if not manifest or not manifest.get('alerts'):
+            return []
+        try:
+            with open(os.path.join(self.out_dir, manifest['alerts']), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def write(self, generated_at=None):
+        """
+        조각과 manifest.json 을 기록하고 참조되지 않는 오래된 조각을 지웁니다.
+
+        manifest 를 마지막에 교체하므로 기록 중에 열린 페이지도 이전 스냅샷을
+        온전히 읽습니다. 직전 manifest 가 참조하던 조각은 한 번 더 남겨 둡니다.
+
+        Returns:
+            dict: 새 manifest
+        """
+        generated_at = int(time.time() if generated_at is None else generated_at)
+        os.makedirs(self.out_dir, exist_ok=True)
+        previous = self.load_manifest()
+        written = []
+
+        # 최근 알림: 새 알림을 앞에, 같은 (종목, 캔들) 알림은 한 번만
+        alerts = [dict(alert, time=generated_at) for alert in self.alerts]
+        seen = {(alert['symbol'], alert['candle']) for alert in alerts}
+        for alert in self.load_alerts(previous):
+            if (alert['symbol'], alert['candle']) not in seen:
+                seen.add((alert['symbol'], alert['candle']))
+                alerts.append(alert)
+        alerts = alerts[:self.max_alerts]
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'generated_at': generated_at,
+            'candle_seconds': self.candle_seconds,
+            'summary': self._write_chunk('summary', {'markets': self.markets}, written),
+            'alerts': self._write_chunk('alerts', alerts, written),
+            'history': {
+                symbol: [self._write_chunk(f"history/{symbol}-{block}", chunk, written)
+                         for block, chunk in self.history_chunks(symbol)]
+                for symbol in sorted(self.series)
+            },
+        }
+
+        path = os.path.join(self.out_dir, 'manifest.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+        removed = self.collect_garbage(manifest, previous)
+        logger.info(f"대시보드 스냅샷 기록: 종목 {len(self.markets)}개, 새 조각 {len(written)}개, 삭제 {removed}개")
+        return manifest
+
+    def collect_garbage(self, manifest, previous=None):
+        """
+        현재/직전 manifest 가 참조하지 않는 조각을 지웁니다.
+
+        Returns:
+            int: 지운 파일 수
+        """
+        referenced = set()
+        for entry in (manifest, previous):
+            if not entry:
+                continue
+            referenced.update((entry.get('summary'), entry.get('alerts')))
+            for names in entry.get('history', {}).values():
+                referenced.update(names)
+
+        removed = 0
+        for directory in (self.out_dir, os.path.join(self.out_dir, 'history')):
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                relative = os.path.relpath(os.path.join(directory, name), self.out_dir).replace(os.sep, '/')
+                if name == 'manifest.json' or not name.endswith('.json') or relative in referenced:
+                    continue
+                os.remove(os.path.join(directory, name))
+                removed += 1
+        return removed
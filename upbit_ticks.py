@@ -0,0 +1,701 @@
+import os
+import re
+import json
+import gzip
+import time
+import uuid
+import argparse
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+
+from upbit_candles import to_analysis_frame
+
+try:
+    import websocket
+except ImportError:  # 웹소켓 수신을 쓸 때만 필요 (pip install websocket-client)
+    websocket = None
+
+logger = logging.getLogger(__name__)
+
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+
+# 기본 봉 길이(초)와 마켓별 보관 봉 수
+DEFAULT_INTERVALS = (1, 10, 30)
+DEFAULT_CAPACITY = 240
+
+# compute_analysis 가 지표를 계산하는 최소 봉 수
+MIN_BARS = 50
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'value', 'vwap')
+
+
+def parse_intervals(text):
+    """
+    "1s,10s,30s" 형식의 봉 길이 목록을 초 단위로 변환합니다. (빈 문자열이면 빈 목록)
+    """
+    intervals = []
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        match = re.fullmatch(r'(\d+)(s|m)', item)
+        if match is None:
+            raise ValueError(f"봉 길이는 1s, 10s, 1m 형식이어야 합니다: {item}")
+        seconds = int(match.group(1)) * (60 if match.group(2) == 'm' else 1)
+        if seconds <= 0:
+            raise ValueError(f"봉 길이는 0보다 커야 합니다: {item}")
+        intervals.append(seconds)
+    return sorted(set(intervals))
+
+
+def interval_name(seconds):
+    return f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+
+
+class TickBars:
+    def __init__(self, markets, interval, capacity=DEFAULT_CAPACITY):
+        """
+        한 봉 길이의 (마켓, 봉) 링 버퍼
+
+        모든 배열을 처음에 할당하고, 체결 묶음을 (마켓, 봉) 그룹으로 나눠 reduceat 으로
+        한 번에 합칩니다. 마켓별 마지막 봉(진행 중)에 이어지는 그룹은 그 봉에 더하고,
+        나머지는 새 봉으로 링에 씁니다. 진행 중인 봉보다 이른 체결은 버린 건수만 셉니다.
+
+        Args:
+            markets (int): 마켓 수
+            interval (int): 봉 길이(초)
+            capacity (int): 마켓별 보관 봉 수 (넘으면 오래된 봉부터 덮어씀)
+        """
+        self.interval = interval
+        self.capacity = capacity
+        shape = (markets, capacity)
+        self.start = np.zeros(shape, dtype=np.int64)
+        self.open = np.zeros(shape)
+        self.high = np.zeros(shape)
+        self.low = np.zeros(shape)
+        self.close = np.zeros(shape)
+        self.volume = np.zeros(shape)
+        self.value = np.zeros(shape)
+        self.count = np.zeros(shape, dtype=np.int64)
+        # 마켓별 마지막 봉의 링 위치, 저장된 봉 수, 마지막 봉 번호(시각 // interval)
+        self.head = np.full(markets, -1, dtype=np.int64)
+        self.length = np.zeros(markets, dtype=np.int64)
+        self.current = np.full(markets, -1, dtype=np.int64)
+        self.late = 0
+
+    def add(self, rows, times, prices, volumes, values):
+        """
+        (마켓, 시각) 순으로 정렬된 체결 묶음을 반영합니다.
+
+        Args:
+            rows (np.ndarray): 마켓 행 번호
+            times (np.ndarray): 체결 시각 (ms)
+            prices, volumes, values (np.ndarray): 체결가, 체결량, 체결 금액
+        """
+        bucket = times // (self.interval * 1000)
+        late = bucket < self.current[rows]
+        if late.any():
+            self.late += int(late.sum())
+            keep = ~late
+            rows, bucket, prices, volumes, values = rows[keep], bucket[keep], prices[keep], volumes[keep], values[keep]
+        if not len(rows):
+            return
+
+        change = np.empty(len(rows), dtype=bool)
+        change[0] = True
+        change[1:] = (rows[1:] != rows[:-1]) | (bucket[1:] != bucket[:-1])
+        starts = np.flatnonzero(change)
+        ends = np.append(starts[1:], len(rows)) - 1
+        group_row = rows[starts]
+        group_bucket = bucket[starts]
+        group_high = np.maximum.reduceat(prices, starts)
+        group_low = np.minimum.reduceat(prices, starts)
+        group_volume = np.add.reduceat(volumes, starts)
+        group_value = np.add.reduceat(values, starts)
+        group_count = np.diff(np.append(starts, len(rows)))
+
+        first = np.ones(len(starts), dtype=bool)
+        first[1:] = group_row[1:] != group_row[:-1]
+        last = np.ones(len(starts), dtype=bool)
+        last[:-1] = first[1:]
+
+        # 진행 중인 봉에 이어지는 그룹
+        merge = first & (group_bucket == self.current[group_row])
+        if merge.any():
+            r, p = group_row[merge], self.head[group_row[merge]]
+            self.high[r, p] = np.maximum(self.high[r, p], group_high[merge])
+            self.low[r, p] = np.minimum(self.low[r, p], group_low[merge])
+            self.close[r, p] = prices[ends[merge]]
+            self.volume[r, p] += group_volume[merge]
+            self.value[r, p] += group_value[merge]
+            self.count[r, p] += group_count[merge]
+
+        # 새 봉 (마켓 안에서 몇 번째 새 봉인지로 링 위치 계산)
+        new = ~merge
+        if new.any():
+            r = group_row[new]
+            index = np.arange(len(r))
+            row_first = np.ones(len(r), dtype=bool)
+            row_first[1:] = r[1:] != r[:-1]
+            rank = index - np.maximum.accumulate(np.where(row_first, index, 0)) + 1
+            p = (self.head[r] + rank) % self.capacity
+            self.start[r, p] = group_bucket[new] * self.interval
+            self.open[r, p] = prices[starts[new]]
+            self.high[r, p] = group_high[new]
+            self.low[r, p] = group_low[new]
+            self.close[r, p] = prices[ends[new]]
+            self.volume[r, p] = group_volume[new]
+            self.value[r, p] = group_value[new]
+            self.count[r, p] = group_count[new]
+            row_last = np.ones(len(r), dtype=bool)
+            row_last[:-1] = row_first[1:]
+            self.head[r[row_last]] = p[row_last]
+            self.length[r[row_last]] = np.minimum(self.length[r[row_last]] + rank[row_last], self.capacity)
+
+        self.current[group_row[last]] = group_bucket[last]
+
+    def completed(self, now):
+        """
+        마켓별 (완성된 봉 수, 마지막 완성 봉 시작 시각) 을 반환합니다. (없으면 -1)
+
+        Args:
+            now (float): 현재 시각(epoch 초)
+        """
+        in_progress = (self.current + 1) * self.interval > now
+        rows = np.arange(len(self.head))
+        previous = self.start[rows, (self.head - 1) % self.capacity]
+        last = np.where(in_progress, np.where(self.length >= 2, previous, -1), self.current * self.interval)
+        count = self.length - (in_progress & (self.length > 0))
+        return count, np.where(self.length > 0, last, -1)
+
+    def frame(self, row, now=None):
+        """
+        한 마켓의 봉을 오래된 것부터 candles_to_frame 형식으로 반환합니다.
+
+        체결이 없던 구간은 직전 종가, 거래량 0 인 봉으로 채우고 최근 capacity 개
+        구간만 담습니다. (compute_analysis 의 빈 캔들 채우기를 다시 거치지 않음)
+
+        Args:
+            row (int): 마켓 행 번호
+            now (float): 현재 시각(epoch 초). 주면 진행 중인 봉은 제외
+
+        Returns:
+            pd.DataFrame: timestamp, open, high, low, close, volume, value, vwap
+        """
+        n = int(self.length[row])
+        positions = (self.head[row] - np.arange(n)[::-1]) % self.capacity
+        if n and now is not None and (self.current[row] + 1) * self.interval > now:
+            positions = positions[:-1]
+        start = self.start[row, positions]
+        if not len(start):
+            return pd.DataFrame({column: [] for column in ('timestamp',) + BAR_COLUMNS})
+
+        grid = np.arange(max(start[0], start[-1] - (self.capacity - 1) * self.interval),
+                         start[-1] + 1, self.interval)
+        source = positions[np.searchsorted(start, grid, side='right') - 1]
+        traded = self.start[row, source] == grid
+        close = self.close[row, source]
+        volume = np.where(traded, self.volume[row, source], 0.0)
+        value = np.where(traded, self.value[row, source], 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(volume > 0, value / volume, close)
+        return pd.DataFrame({
+            'timestamp': grid,
+            'open': np.where(traded, self.open[row, source], close),
+            'high': np.where(traded, self.high[row, source], close),
+            'low': np.where(traded, self.low[row, source], close),
+            'close': close,
+            'volume': volume,
+            'value': value,
+            'vwap': vwap,
+        })
+
+
+class TickBarEngine:
+    def __init__(self, markets, intervals=DEFAULT_INTERVALS, capacity=DEFAULT_CAPACITY):
+        """
+        체결 틱으로 마켓별 초 단위 OHLCV/VWAP 봉을 만드는 엔진
+
+        체결은 묶음으로 받아 (마켓, 시각) 순으로 한 번 정렬한 뒤 모든 봉 길이에
+        반영하므로, 체결 하나마다 파이썬 반복을 돌지 않습니다.
+
+        Args:
+            markets (list): 마켓 목록 (목록에 없는 마켓의 체결은 버림)
+            intervals (tuple): 봉 길이(초) 목록
+            capacity (int): 마켓별 보관 봉 수
+        """
+        self.markets = list(markets)
+        self.index = {market: i for i, market in enumerate(self.markets)}
+        self.bars = {interval: TickBars(len(self.markets), interval, capacity) for interval in intervals}
+        self.ticks = 0
+        self.unknown = 0
+
+    @property
+    def late(self):
+        return sum(bars.late for bars in self.bars.values())
+
+    def ingest(self, rows, times, prices, volumes):
+        """
+        배열 형태의 체결 묶음을 반영합니다.
+
+        Args:
+            rows (np.ndarray): 마켓 행 번호
+            times (np.ndarray): 체결 시각 (ms)
+            prices (np.ndarray): 체결가
+            volumes (np.ndarray): 체결량
+
+        Returns:
+            int: 반영한 체결 수
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return 0
+        times = np.asarray(times, dtype=np.int64)
+        order = np.lexsort((times, rows))
+        rows, times = rows[order], times[order]
+        prices = np.asarray(prices, dtype=np.float64)[order]
+        volumes = np.asarray(volumes, dtype=np.float64)[order]
+        values = prices * volumes
+        for bars in self.bars.values():
+            bars.add(rows, times, prices, volumes, values)
+        self.ticks += len(rows)
+        return len(rows)
+
+    def ingest_ticks(self, ticks):
+        """
+        /trades/ticks 응답 또는 웹소켓 trade 메시지 목록을 반영합니다.
+
+        Returns:
+            int: 반영한 체결 수
+        """
+        rows, times, prices, volumes = [], [], [], []
+        for tick in ticks:
+            row = self.index.get(tick.get('code') or tick.get('market'))
+            if row is None:
+                self.unknown += 1
+                continue
+            rows.append(row)
+            times.append(tick.get('trade_timestamp') or tick['timestamp'])
+            prices.append(tick['trade_price'])
+            volumes.append(tick['trade_volume'])
+        return self.ingest(rows, times, prices, volumes)
+
+    def frame(self, market, interval, now=None):
+        return self.bars[interval].frame(self.index[market], now)
+
+    def analysis_frame(self, market, interval, now=None):
+        """
+        compute_analysis 에 넘길 업비트 캔들 응답 형식의 봉 데이터
+        """
+        return to_analysis_frame(self.frame(market, interval, now))
+
+
+class TickPoller:
+    def __init__(self, fetcher, base_url, markets, count=200, interval=1.0, pace=None):
+        """
+        /trades/ticks 를 마켓마다 돌아가며 조회해 새 체결만 넘기는 틱 수신기
+
+        sequential_id 는 순서를 보장하지 않으므로 직전 응답에 있던 체결과
+        그보다 오래된 체결을 빼는 방식으로 중복을 거릅니다.
+
+        Args:
+            fetcher (ResilientFetcher): 재시도/서킷 브레이커가 적용된 요청기
+            base_url (str): 업비트 API 주소
+            markets (list): 조회할 마켓
+            count (int): 요청당 체결 수 (최대 500)
+            interval (float): 모든 마켓을 한 바퀴 조회하는 최소 간격(초)
+            pace (callable): 요청마다 먼저 호출해 요청 예산에 맞춰 대기하는 함수 (예: 분석기의 pace)
+        """
+        self.fetcher = fetcher
+        self.base_url = base_url
+        self.markets = list(markets)
+        self.count = count
+        self.interval = interval
+        self.pace = pace
+        self.seen = {}
+
+    def poll(self, market):
+        ticks = self.fetcher.get_json('trades', f"{self.base_url}/trades/ticks",
+                                      params={'market': market, 'count': self.count})
+        previous = self.seen.get(market)
+        self.seen[market] = ({tick['sequential_id'] for tick in ticks},
+                             min((tick['timestamp'] for tick in ticks), default=0))
+        if previous is None:
+            fresh = ticks
+        else:
+            ids, oldest = previous
+            fresh = [tick for tick in ticks if tick['sequential_id'] not in ids and tick['timestamp'] >= oldest]
+        return fresh[::-1]
+
+    def run(self, callback, stop):
+        while not stop.is_set():
+            started = time.monotonic()
+            for market in self.markets:
+                if stop.is_set():
+                    return
+                if self.pace is not None:
+                    self.pace()
+                try:
+                    ticks = self.poll(market)
+                except Exception as e:
+                    logger.warning(f"체결 조회 실패 ({market}): {e}")
+                    continue
+                if ticks:
+                    callback(ticks)
+            stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+
+class TradeStream:
+    def __init__(self, markets, url=UPBIT_WS_URL, max_delay=60.0):
+        """
+        업비트 웹소켓 trade 채널 수신기 (끊기면 지수 백오프로 다시 접속)
+
+        Args:
+            markets (list): 구독할 마켓
+            url (str): 웹소켓 주소
+            max_delay (float): 재접속 최대 대기(초)
+        """
+        if websocket is None:
+            raise RuntimeError("웹소켓 체결 수신을 사용하려면 websocket-client 패키지를 설치하세요: "
+                               "pip install websocket-client")
+        self.markets = list(markets)
+        self.url = url
+        self.max_delay = max_delay
+
+    def subscription(self):
+        return json.dumps([
+            {'ticket': uuid.uuid4().hex},
+            {'type': 'trade', 'codes': self.markets, 'isOnlyRealtime': True},
+        ])
+
+    def run(self, callback, stop):
+        delay = 1.0
+        while not stop.is_set():
+            connection = None
+            try:
+                connection = websocket.create_connection(self.url, timeout=10)
+                connection.send(self.subscription())
+                logger.info(f"체결 웹소켓 접속: {len(self.markets)}개 마켓")
+                delay = 1.0
+                while not stop.is_set():
+                    message = json.loads(connection.recv())
+                    if message.get('type') == 'trade':
+                        callback([message])
+            except Exception as e:
+                if stop.is_set():
+                    return
+                logger.warning(f"체결 웹소켓 끊김: {e} ({delay:.0f}초 후 재접속)")
+                stop.wait(delay)
+                delay = min(delay * 2, self.max_delay)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+def open_ticks(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class TickRecorder:
+    def __init__(self, path):
+        """
+        받은 체결을 JSON lines 로 기록합니다. (.gz 로 끝나면 압축, replay_ticks 로 재생)
+        """
+        self.path = path
+        self.file = open_ticks(path, 'a')
+        self.lock = threading.Lock()
+
+    def write(self, ticks):
+        with self.lock:
+            for tick in ticks:
+                self.file.write(json.dumps(tick, ensure_ascii=False) + '\n')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_ticks(path):
+    with open_ticks(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay_ticks(path, engine, batch_seconds=1.0, on_batch=None):
+    """
+    기록한 체결을 체결 시각 기준 batch_seconds 묶음으로 엔진에 재생합니다.
+
+    Args:
+        path (str): TickRecorder 가 기록한 파일
+        engine (TickBarEngine): 봉을 만들 엔진
+        batch_seconds (float): 묶음 길이(초, 체결 시각 기준)
+        on_batch (callable): 묶음마다 on_batch(묶음 끝 시각 epoch 초) 호출 (스캔 시뮬레이션)
+
+    Returns:
+        int: 재생한 체결 수
+    """
+    batch = []
+    batch_end = None
+    total = 0
+    for tick in read_ticks(path):
+        timestamp = (tick.get('trade_timestamp') or tick['timestamp']) / 1000
+        if batch_end is None:
+            batch_end = (timestamp // batch_seconds + 1) * batch_seconds
+        if timestamp >= batch_end:
+            total += engine.ingest_ticks(batch)
+            if on_batch is not None:
+                on_batch(batch_end)
+            batch = []
+            batch_end = (timestamp // batch_seconds + 1) * batch_seconds
+        batch.append(tick)
+    if batch:
+        total += engine.ingest_ticks(batch)
+        if on_batch is not None:
+            on_batch(batch_end)
+    return total
+
+
+class TickScanner:
+    def __init__(self, analyzer, engine, notify=True):
+        """
+        완성된 초 단위 봉에 분석기의 지표 계산(compute_analysis)과 알림 조건(evaluate_conditions)을
+        그대로 적용합니다.
+
+        봉 길이마다 새 봉이 완성된 마켓만 분석하고, 같은 봉에서는 한 번만 알립니다.
+        분석이 늦어지면 밀린 봉을 하나씩 따라가지 않고 가장 최근 봉만 분석합니다.
+        지표 계산은 분석기 상태를 바꾸지 않으므로 동시에 도는 정시 스캔의 건너뛴
+        종목 보고에 섞이지 않습니다. 거래가 드문 봉은 RSI 가 자주 NaN 이라 건너뛴
+        사유는 DEBUG 로만 남기고 skipped 에 개수를 셉니다.
+
+        Args:
+            analyzer: compute_analysis/evaluate_conditions/format_alert_message 를 제공하는 분석기
+            engine (TickBarEngine): 봉 엔진
+            notify (bool): False 면 알림을 보내지 않고 결과만 반환 (재생 확인용)
+        """
+        self.analyzer = analyzer
+        self.engine = engine
+        self.notify = notify
+        self.analyzed = {interval: np.full(len(engine.markets), -1, dtype=np.int64) for interval in engine.bars}
+        self.alerted = {}
+        self.analyses = 0
+        self.skipped = 0
+        self.analysis_seconds = 0.0
+
+    def scan(self, now=None):
+        """
+        Returns:
+            list: 이번에 조건을 만족한 분석 결과
+        """
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        alerts = []
+        records = []
+        for interval, bars in self.engine.bars.items():
+            count, last = bars.completed(now)
+            due = np.flatnonzero((count >= MIN_BARS) & (last > self.analyzed[interval]))
+            self.analyzed[interval][due] = last[due]
+            self.analyses += len(due)
+            name = interval_name(interval)
+            for row in due:
+                symbol = self.engine.markets[row]
+                frame = bars.frame(row, now)
+                analysis, reason = self.analyzer.compute_analysis(symbol, to_analysis_frame(frame))
+                if analysis is None:
+                    self.skipped += 1
+                    logger.debug(f"초 단위 봉 분석 건너뜀: {symbol} [{name}] - {reason}")
+                    continue
+                analysis['timeframe'] = name
+                analysis['vwap'] = float(frame['vwap'].iloc[-1])
+                conditions = self.analyzer.evaluate_conditions(analysis)
+                records.append((analysis, conditions))
+                key = (symbol, name)
+                if not conditions['alert'] or self.alerted.get(key) == analysis['candle_time']:
+                    continue
+                self.alerted[key] = analysis['candle_time']
+                alerts.append(analysis)
+                logger.info(f"조건 만족: {symbol} [{name}] - RSI: {analysis['rsi']:.2f}, "
+                            f"밴드폭: {analysis['band_width']:.3f}%, VWAP: {analysis['vwap']:,.0f}")
+        self.analysis_seconds += time.perf_counter() - started
+
+        # 대기 인스턴스(리더 아님)는 봉만 유지하고 알림/기록은 하지 않음
+        if self.notify and (not hasattr(self.analyzer, 'is_active') or self.analyzer.is_active()):
+            if records and hasattr(self.analyzer, 'record_history'):
+                self.analyzer.record_history(records)
+            if alerts:
+                self.analyzer.send_telegram_message(self.analyzer.format_alert_message(alerts))
+                if hasattr(self.analyzer, 'send_alert_charts'):
+                    self.analyzer.send_alert_charts(alerts)
+        return alerts
+
+
+class TickRunner:
+    def __init__(self, engine, source, scanner, batch_seconds=0.5, recorder=None, report_interval=60.0):
+        """
+        수신 스레드가 모은 체결을 batch_seconds 마다 한 번에 봉에 반영하고 스캔합니다.
+
+        Args:
+            engine (TickBarEngine): 봉 엔진
+            source (TradeStream|TickPoller): run(callback, stop) 을 제공하는 체결 수신기
+            scanner (TickScanner): 봉 완성 시 분석/알림
+            batch_seconds (float): 반영 주기(초)
+            recorder (TickRecorder): 받은 체결 기록 (재생 테스트용)
+            report_interval (float): 처리량 로그 간격(초)
+        """
+        self.engine = engine
+        self.source = source
+        self.scanner = scanner
+        self.batch_seconds = batch_seconds
+        self.recorder = recorder
+        self.report_interval = report_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self.ingest_seconds = 0.0
+
+    def receive(self, ticks):
+        with self.lock:
+            self.buffer.extend(ticks)
+
+    def start(self):
+        threading.Thread(target=self.source.run, args=(self.receive, self._stop),
+                         name='tick-source', daemon=True).start()
+        threading.Thread(target=self.run, name='tick-bars', daemon=True).start()
+        logger.info(f"초 단위 봉 사용: {', '.join(interval_name(i) for i in self.engine.bars)} "
+                    f"({len(self.engine.markets)}개 마켓, {type(self.source).__name__})")
+
+    def stop(self):
+        self._stop.set()
+
+    def step(self, now=None):
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        if batch:
+            if self.recorder is not None:
+                self.recorder.write(batch)
+            started = time.perf_counter()
+            self.engine.ingest_ticks(batch)
+            self.ingest_seconds += time.perf_counter() - started
+        return self.scanner.scan(now)
+
+    def run(self):
+        reported_at = time.monotonic()
+        reported_ticks = reported_analyses = reported_skipped = 0
+        while not self._stop.wait(self.batch_seconds):
+            try:
+                self.step()
+            except Exception as e:
+                logger.error(f"초 단위 봉 처리 중 오류: {e}")
+            elapsed = time.monotonic() - reported_at
+            if elapsed >= self.report_interval:
+                ticks = self.engine.ticks - reported_ticks
+                analyses = self.scanner.analyses - reported_analyses
+                skipped = self.scanner.skipped - reported_skipped
+                busy = self.scanner.analysis_seconds / elapsed
+                logger.info(f"체결 {ticks / elapsed:.0f}건/초 (반영 {self.ingest_seconds / max(ticks, 1) * 1e6:.1f}µs/건), "
+                            f"봉 분석 {analyses}건 (평균 {self.scanner.analysis_seconds / max(analyses, 1) * 1000:.1f}ms, "
+                            f"지표 계산 불가 {skipped}건), "
+                            f"늦은 체결 {self.engine.late}건")
+                # 분석 시간이 주기 대부분을 차지하면 최근 봉만 분석하며 따라가는 중
+                if busy > 0.8:
+                    logger.warning(f"봉 분석이 처리 시간의 {busy * 100:.0f}% 를 차지합니다. "
+                                   "짧은 봉 길이나 감시 종목을 줄이는 것을 고려하세요.")
+                reported_at = time.monotonic()
+                reported_ticks, reported_analyses = self.engine.ticks, self.scanner.analyses
+                reported_skipped = self.scanner.skipped
+                self.ingest_seconds = self.scanner.analysis_seconds = 0.0
+
+
+def tick_runner_from_env(analyzer):
+    """
+    TICK_BARS 가 설정되어 있으면 분석기 감시 종목으로 초 단위 봉 실행기를 만듭니다. (없으면 None)
+    """
+    intervals = parse_intervals(os.getenv('TICK_BARS', ''))
+    if not intervals:
+        return None
+    engine = TickBarEngine(analyzer.symbols, intervals, capacity=int(os.getenv('TICK_CAPACITY', str(DEFAULT_CAPACITY))))
+    source_name = os.getenv('TICK_SOURCE', 'ws')
+    if source_name == 'ws':
+        source = TradeStream(analyzer.symbols, url=os.getenv('UPBIT_WS_URL', UPBIT_WS_URL))
+    elif source_name == 'rest':
+        # 스캔과 같은 요청 예산을 나눠 씀
+        source = TickPoller(analyzer.fetcher, analyzer.base_url, analyzer.symbols, pace=analyzer.pace)
+    else:
+        raise ValueError(f"TICK_SOURCE 는 ws 또는 rest 여야 합니다: {source_name}")
+    record_path = os.getenv('TICK_RECORD_PATH')
+    return TickRunner(engine, source, TickScanner(analyzer, engine),
+                      recorder=TickRecorder(record_path) if record_path else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='체결 틱 기록/재생 (초 단위 봉)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='체결을 JSON lines 로 기록')
+    record.add_argument('--markets', required=True, help='쉼표로 구분한 마켓 (예: KRW-BTC,KRW-ETH)')
+    record.add_argument('--seconds', type=float, default=60, help='기록 시간(초)')
+    record.add_argument('--out', required=True, help='기록 파일 (.gz 면 압축)')
+    record.add_argument('--source', choices=('ws', 'rest'), default='ws', help='체결 수신 방식')
+
+    replay = subparsers.add_parser('replay', help='기록한 체결로 봉을 만들고 알림 조건을 평가')
+    replay.add_argument('path', help='기록 파일')
+    replay.add_argument('--intervals', default='1s,10s,30s', help='봉 길이 목록')
+    replay.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='마켓별 보관 봉 수')
+    replay.add_argument('--no-rules', action='store_true', help='봉만 만들고 분석/조건 평가는 생략 (처리량 측정)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'record':
+        markets = [market.strip() for market in args.markets.split(',') if market.strip()]
+        if args.source == 'ws':
+            source = TradeStream(markets, url=os.getenv('UPBIT_WS_URL', UPBIT_WS_URL))
+        else:
+            from upbit_resilience import ResilientFetcher, TokenBucket
+            rate = float(os.getenv('RATE_BUDGET', '8'))
+            source = TickPoller(ResilientFetcher(timeout=10),
+                                os.getenv('UPBIT_API_URL', "https://api.upbit.com/v1"), markets,
+                                pace=TokenBucket(rate, capacity=1).acquire if rate > 0 else None)
+        recorder = TickRecorder(args.out)
+        stop = threading.Event()
+        counted = []
+
+        def write(ticks):
+            recorder.write(ticks)
+            counted.append(len(ticks))
+
+        threading.Thread(target=source.run, args=(write, stop), daemon=True).start()
+        stop.wait(args.seconds)
+        stop.set()
+        recorder.close()
+        print(f"체결 {sum(counted)}건 기록: {args.out}")
+        return
+
+    markets = sorted({tick.get('code') or tick['market'] for tick in read_ticks(args.path)})
+    engine = TickBarEngine(markets, parse_intervals(args.intervals), capacity=args.capacity)
+    alerts = []
+    on_batch = None
+    if not args.no_rules:
+        from upbit_sharding import cloud_analyzer
+        analyzer = cloud_analyzer()
+        analyzer.symbols = markets
+        scanner = TickScanner(analyzer, engine, notify=False)
+        on_batch = lambda now: alerts.extend(scanner.scan(now))
+
+    started = time.perf_counter()
+    total = replay_ticks(args.path, engine, on_batch=on_batch)
+    elapsed = time.perf_counter() - started
+    print(f"체결 {total}건, 마켓 {len(markets)}개, {elapsed:.2f}초 ({total / max(elapsed, 1e-9):,.0f}건/초), "
+          f"늦은 체결 {engine.late}건")
+    for interval, bars in engine.bars.items():
+        print(f"  {interval_name(interval)}: 봉 {int(bars.length.sum())}개")
+    for analysis in alerts:
+        print(f"  조건 만족: {analysis['symbol']} [{analysis['timeframe']}] {analysis['candle_time']} "
+              f"RSI {analysis['rsi']:.2f}, 밴드폭 {analysis['band_width']:.3f}%, VWAP {analysis['vwap']:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
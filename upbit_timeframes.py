@@ -0,0 +1,273 @@
+import math
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from upbit_candles import MINUTE_UNITS, candles_to_frame, to_analysis_frame
+from upbit_resilience import ScanDeadline
+from upbit_logging import with_scan_id
+
+logger = logging.getLogger(__name__)
+
+# 타임프레임 이름 → 분
+TIMEFRAMES = {
+    '1m': 1,
+    '3m': 3,
+    '5m': 5,
+    '10m': 10,
+    '15m': 15,
+    '30m': 30,
+    '60m': 60,
+    '240m': 240,
+    '1d': 1440,
+}
+
+
+def parse_timeframes(text):
+    """
+    쉼표로 구분한 타임프레임 문자열을 분 단위 오름차순 목록으로 변환합니다.
+
+    Args:
+        text (str): 예) "5m,15m,60m,240m,1d"
+
+    Returns:
+        list: 타임프레임 이름 목록
+    """
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TIMEFRAMES]
+    if unknown:
+        raise ValueError(f"지원하지 않는 타임프레임입니다: {', '.join(unknown)}")
+    return sorted(set(names), key=TIMEFRAMES.get)
+
+
+def resample_candles(frame, minutes):
+    """
+    기본 단위 캔들을 상위 타임프레임으로 묶습니다.
+
+    업비트 분봉과 240분봉/일봉은 모두 UTC 기준 정각(= KST 09시 기준)으로 나뉘므로
+    UTC epoch 을 타임프레임 길이로 나눈 몫을 묶음 키로 사용합니다. 첫 묶음이
+    경계에서 시작하지 않으면 불완전하므로 버립니다. 마지막 묶음은 업비트 최신
+    캔들과 마찬가지로 진행 중인 캔들입니다.
+
+    Args:
+        frame (pd.DataFrame): candles_to_frame 형식, timestamp 오름차순
+        minutes (int): 목표 타임프레임(분)
+
+    Returns:
+        pd.DataFrame: 같은 형식의 상위 타임프레임 캔들
+    """
+    if frame.empty:
+        return frame
+
+    span = minutes * 60
+    timestamps = frame['timestamp'].values
+    buckets = timestamps // span
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+
+    resampled = pd.DataFrame({
+        'timestamp': buckets[starts] * span,
+        'open': frame['open'].values[starts],
+        'high': np.maximum.reduceat(frame['high'].values, starts),
+        'low': np.minimum.reduceat(frame['low'].values, starts),
+        'close': frame['close'].values[ends],
+        'volume': np.add.reduceat(frame['volume'].values.astype(np.float64), starts),
+        'value': np.add.reduceat(frame['value'].values.astype(np.float64), starts),
+    })
+    if timestamps[0] != buckets[0] * span:
+        resampled = resampled.iloc[1:].reset_index(drop=True)
+    return resampled
+
+
+class MultiTimeframeScanner:
+    def __init__(self, analyzer, timeframes, min_bars=50, max_history_pages=80, page_size=200):
+        """
+        가장 짧은 타임프레임 캔들만 받아 상위 타임프레임을 로컬에서 만들어 분석하는 스캐너
+
+        종목별 기본 단위 캔들 이력을 메모리에 유지합니다. 처음 한 번만 필요한 만큼
+        과거 페이지를 받고, 이후 스캔에서는 마지막 캔들 이후의 새 캔들만 받습니다.
+        필요한 이력이 max_history_pages 를 넘는 타임프레임은 제외합니다.
+
+        스캔 결과는 분석기의 finish_scan 으로 넘겨 60분봉 스캔과 같은 후처리(시장 지표,
+        호가 확인, 기록, 모의 매매, 분석 캐시, 알림)를 거칩니다. 분석 캐시와 시장 지표에는
+        대표 타임프레임(60m, 없으면 가장 짧은 타임프레임) 결과를 씁니다.
+
+        Args:
+            analyzer: get_candles/analyze_candles/evaluate_conditions/finish_scan 을 제공하는 분석기
+            timeframes (list): 타임프레임 이름 목록 (예: ['5m', '60m', '1d'])
+            min_bars (int): 지표 계산에 필요한 최소 캔들 수
+            max_history_pages (int): 종목별로 유지할 기본 단위 이력의 최대 페이지 수
+            page_size (int): 한 번에 받을 수 있는 캔들 수
+        """
+        self.analyzer = analyzer
+        self.min_bars = min_bars
+        self.page_size = page_size
+
+        finest = TIMEFRAMES[timeframes[0]]
+        self.base_unit = finest if finest in MINUTE_UNITS else 'days'
+        self.base_minutes = finest
+        self.timeframes = []
+        self.history_bars = 0
+        for name in timeframes:
+            minutes = TIMEFRAMES[name]
+            if minutes % self.base_minutes:
+                logger.warning(f"{name} 은(는) 기본 단위 {self.base_minutes}분으로 나누어지지 않아 제외합니다.")
+                continue
+            # 첫 묶음이 잘릴 수 있으므로 한 캔들 여유
+            bars = (min_bars + 1) * minutes // self.base_minutes
+            if math.ceil(bars / page_size) > max_history_pages:
+                logger.warning(f"{name} 은(는) 기본 단위 이력이 {bars}개 필요해 최대 {max_history_pages}페이지를 넘으므로 제외합니다.")
+                continue
+            self.timeframes.append(name)
+            self.history_bars = max(self.history_bars, bars)
+
+        self.primary = '60m' if '60m' in self.timeframes else self.timeframes[0]
+        self.histories = {}
+        logger.info(f"멀티 타임프레임: 기본 단위 {self.base_unit}, 분석 {', '.join(self.timeframes)}, "
+                    f"종목당 이력 {self.history_bars}개 (대표 {self.primary})")
+
+    def update_history(self, symbol):
+        """
+        종목의 기본 단위 캔들 이력을 최신 상태로 갱신합니다.
+
+        Returns:
+            pd.DataFrame: 갱신된 이력 (실패 시 기존 이력 또는 None)
+        """
+        history = self.histories.get(symbol)
+        base_seconds = self.base_minutes * 60
+
+        if history is not None and not history.empty:
+            missing = int((time.time() - history['timestamp'].iloc[-1]) // base_seconds) + 1
+            if missing > self.page_size:
+                # 한 페이지로 메울 수 없는 공백이 생기면 이력을 새로 받음
+                history = None
+
+        if history is None or history.empty:
+            # 처음에는 필요한 만큼 과거 방향으로 페이지 조회
+            pages = []
+            to = None
+            remaining = self.history_bars
+            while remaining > 0:
+                self.analyzer.pace()
+                df = self.analyzer.get_candles(symbol, count=min(self.page_size, remaining), unit=self.base_unit, to=to)
+                if df is None or df.empty:
+                    break
+                page = candles_to_frame(df, float_dtype=np.float64)
+                pages.append(page)
+                remaining -= len(page)
+                to = int(page['timestamp'].iloc[0])
+            if not pages:
+                return history
+            history = pd.concat(pages, ignore_index=True)
+        else:
+            # 마지막(진행 중이던) 캔들부터 다시 받아 덮어씀
+            self.analyzer.pace()
+            df = self.analyzer.get_candles(symbol, count=min(max(missing, 1), self.page_size), unit=self.base_unit)
+            if df is None or df.empty:
+                return history
+            history = pd.concat([history, candles_to_frame(df, float_dtype=np.float64)], ignore_index=True)
+
+        history = (history.drop_duplicates('timestamp', keep='last')
+                          .sort_values('timestamp')
+                          .iloc[-self.history_bars:]
+                          .reset_index(drop=True))
+        self.histories[symbol] = history
+        return history
+
+    def analyze(self, symbol):
+        """
+        한 종목을 모든 타임프레임에서 분석합니다.
+
+        Returns:
+            dict: 타임프레임별 분석 결과 (분석 불가 타임프레임은 None)
+        """
+        history = self.update_history(symbol)
+        results = {}
+        for name in self.timeframes:
+            if history is None or history.empty:
+                results[name] = None
+                continue
+            minutes = TIMEFRAMES[name]
+            frame = to_analysis_frame(history if minutes == self.base_minutes else resample_candles(history, minutes))
+            # 대표 타임프레임 캔들은 종목 간 시장 지표 계산에 씀
+            if name == self.primary and not frame.empty:
+                self.analyzer.candle_frames[symbol] = frame
+            analysis = self.analyzer.analyze_candles(symbol, frame)
+            if analysis is not None:
+                analysis['timeframe'] = name
+            results[name] = analysis
+        return results
+
+    @with_scan_id
+    def scan(self):
+        """
+        모든 종목을 모든 타임프레임에서 한 번에 스캔하고, 조건을 만족하면 알림을 보냅니다.
+
+        Returns:
+            dict: {종목: {타임프레임: 분석 결과}}
+        """
+        analyzer = self.analyzer
+        if analyzer.leader is not None and not analyzer.leader.is_leader():
+            logger.info("대기 인스턴스 - 리더가 스캔하므로 건너뜁니다.")
+            return {}
+
+        logger.info(f"멀티 타임프레임 조건 체크 시작 ({', '.join(self.timeframes)})")
+        symbols = analyzer.symbols
+        base_seconds = self.base_minutes * 60
+        candle_start = int(time.time()) // base_seconds * base_seconds
+        claimed_elsewhere = []
+        alerts = []
+        results = {}
+        records = []
+        analyzer.skip_reasons = {}
+        analyzer.scan_deadline = ScanDeadline(analyzer.scan_deadline_seconds)
+
+        for index, symbol in enumerate(symbols):
+            # 마감 시간이 지나면 남은 종목은 건너뛰고 지금까지의 결과로 마무리
+            if analyzer.scan_deadline.expired():
+                for skipped in symbols[index:]:
+                    analyzer.skip_reasons[skipped] = "스캔 마감 시간 초과"
+                logger.warning(f"스캔 마감 시간({analyzer.scan_deadline_seconds:.0f}초) 초과 - 남은 {len(symbols) - index}개 종목 건너뜀")
+                break
+
+            # 다른 인스턴스가 이미 스캔한 (종목, 기본 단위 캔들)은 건너뜀
+            if analyzer.leader is not None and not analyzer.leader.claim(symbol, candle_start, base_seconds):
+                claimed_elsewhere.append(symbol)
+                continue
+
+            try:
+                results[symbol] = self.analyze(symbol)
+            except Exception as e:
+                logger.error(f"멀티 타임프레임 분석 오류 ({symbol}): {e}")
+                analyzer.skip_reasons[symbol] = f"분석 실패: {e}"
+                analyzer.unclaim(symbol, candle_start)
+                continue
+            # 모든 타임프레임 분석에 실패하면 점유를 풀어 다른 인스턴스가 다시 시도할 수 있게 함
+            if all(analysis is None for analysis in results[symbol].values()):
+                analyzer.unclaim(symbol, candle_start)
+
+            for name, analysis in results[symbol].items():
+                if analysis is None:
+                    continue
+                conditions = analyzer.evaluate_conditions(analysis)
+                records.append((analysis, conditions))
+                if not conditions['alert']:
+                    continue
+                # 같은 타임프레임 캔들에서는 한 번만 알림
+                key = (symbol, name)
+                if analyzer.alerted_candles.get(key) == analysis['candle_time']:
+                    continue
+                analyzer.alerted_candles[key] = analysis['candle_time']
+                alerts.append(analysis)
+                logger.info(f"조건 만족: {symbol} [{name}] - RSI: {analysis['rsi']:.2f}, 밴드폭: {analysis['band_width']:.3f}%")
+
+        analyzer.scan_deadline = None
+
+        if claimed_elsewhere:
+            logger.info(f"다른 인스턴스가 이번 캔들을 이미 스캔한 종목 {len(claimed_elsewhere)}개 건너뜀")
+
+        primary = {symbol: analyses.get(self.primary) for symbol, analyses in results.items()}
+        analyzer.finish_scan(primary, records, alerts, unit_seconds=TIMEFRAMES[self.primary] * 60)
+        return results
@@ -0,0 +1,68 @@
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def volume_spike_stats(volume, window=20, elapsed=None, min_elapsed=0.2):
+    """
+    마지막 캔들 거래량을 직전 window 개 캔들과 비교합니다.
+
+    마지막 축이 시간인 배열을 받으므로 (시간,) 한 종목이나 (종목, 시간) 전체 종목을
+    같은 방식으로 한 번에 계산합니다. 진행 중인 캔들은 거래량이 아직 덜 쌓였으므로
+    elapsed(캔들 경과 비율)를 주면 캔들 전체 기준으로 환산합니다. 캔들 초반에
+    값이 튀지 않도록 경과 비율은 min_elapsed 이상으로 봅니다.
+
+    Args:
+        volume (np.ndarray): 거래량, shape (..., 시간). 거래 전 구간은 NaN 가능
+        window (int): 비교할 직전 캔들 수
+        elapsed (float|np.ndarray): 마지막 캔들 경과 비율 (0~1, None 이면 완성된 캔들로 간주)
+        min_elapsed (float): 환산에 쓰는 최소 경과 비율
+
+    Returns:
+        tuple: (중앙값 대비 배수, 로그 거래량 z-score). 비교 구간이 비었거나
+            중앙값이 0 이면 NaN
+    """
+    volume = np.asarray(volume, dtype=np.float64)
+    trailing = volume[..., -window - 1:-1]
+    current = volume[..., -1]
+    if elapsed is not None:
+        current = current / np.clip(elapsed, min_elapsed, 1.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        # 비교 구간이 전부 NaN 인 종목은 경고 없이 NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(trailing, axis=-1)
+        ratio = np.where(median > 0, current / median, np.nan)
+
+        # 거래량은 한쪽으로 긴 꼬리 분포라 로그 스케일에서 z-score 계산
+        logs = np.log1p(trailing)
+        mean = np.nanmean(logs, axis=-1)
+        std = np.nanstd(logs, axis=-1)
+        zscore = np.where(std > 0, (np.log1p(current) - mean) / std, np.nan)
+    return ratio, zscore
+
+
+def rolling_volume_ratio(volume, window=20):
+    """
+    모든 캔들에 대해 직전 window 개 캔들 거래량 중앙값 대비 배수를 계산합니다.
+
+    Args:
+        volume (np.ndarray): 거래량, shape (..., 시간)
+        window (int): 비교할 직전 캔들 수
+
+    Returns:
+        np.ndarray: 같은 shape 의 배수 (처음 window 개 캔들은 NaN)
+    """
+    volume = np.asarray(volume, dtype=np.float64)
+    ratio = np.full(volume.shape, np.nan)
+    if volume.shape[-1] <= window:
+        return ratio
+    # 각 시점 직전 window 개 구간 (복사 없는 뷰)
+    windows = sliding_window_view(volume[..., :-1], window, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(windows, axis=-1)
+        ratio[..., window:] = np.where(median > 0, volume[..., window:] / median, np.nan)
+    return ratio
+